@@ -0,0 +1,283 @@
+from IPython.display import display
+from Language import _
+import html
+import ipywidgets as widgets
+import numpy as np
+import pandas as pd
+import re
+import traceback
+
+
+class Allocation:
+    # Allocates the time of the employees to projects, e.g. third-party
+    # projects of different funding sources. The allocations are a sparse
+    # employees × projects matrix, kept as coordinates (employee, project,
+    # share) like a COO matrix. The costs per project are the product of
+    # its transpose with the cost columns, computed with np.bincount.
+
+    def __init__(self, finances) -> None:
+        self.finances = finances
+
+        # allocations are written like "SNF-1234: 40, EU-Horizon: 20"
+        self.ALLOCATION_PATTERN = r"([^:,]+?)\s*:\s*(\d+(?:\.\d*)?)"
+
+        # project -> funding source, entered as "SNF-1234: SNF" per line,
+        # saved with the parameters of the budget
+        self.funding_sources = {}
+
+        # the name of the funding sources in the journal, like the
+        # attributes of the other parameters
+        self.FUNDING_SOURCES_PARAMETER = "funding_sources"
+
+        self.PROJECT_COLOR = "#8C6BB1"
+        self.FUNDING_SOURCE_COLOR = "#5E3C99"
+
+        self.employee_dropdown = widgets.Dropdown()
+        self.employee_dropdown.observe(
+            lambda change: self.show_employee(), names="value")
+        self.projects_text = widgets.Text(
+            placeholder="SNF-1234: 40, EU-Horizon: 20",
+            layout=widgets.Layout(width="450px"))
+        self.apply_button = widgets.Button()
+        self.apply_button.on_click(lambda b: self.apply_employee())
+        self.message = widgets.HTML()
+
+        self.funding_sources_text = widgets.Textarea(
+            placeholder="SNF-1234: SNF\nEU-Horizon: EU",
+            layout=widgets.Layout(width="450px", height="100px"))
+        self.funding_sources_button = widgets.Button()
+        self.funding_sources_button.on_click(
+            lambda b: self.apply_funding_sources())
+
+        self.table = widgets.HTML()
+        self.output = widgets.Output()
+
+        self.shown = False
+        finances.refresh_listeners.append(self.refresh)
+        finances.translation_listeners.append(self.translate)
+        self.translate()
+
+    # sets the texts of the widgets, again after every language switch
+    def translate(self):
+        self.employee_dropdown.description = _("Employee")
+        self.projects_text.description = _("Projects (%)")
+        self.apply_button.description = _("Apply")
+        self.funding_sources_text.description = _("Funding Sources")
+        self.funding_sources_button.description = _("Apply")
+        self.message.value = ""
+
+    def get_matrix(self, df):
+        # the coordinates of the allocation matrix: employee positions,
+        # project codes, shares (0..1) and the project names of the codes
+        finances = self.finances
+        if finances.PROJECTS_KEY not in df.columns:
+            return (np.zeros(0, dtype=int), np.zeros(0, dtype=int),
+                    np.zeros(0), [])
+
+        texts = pd.Series(df[finances.PROJECTS_KEY].to_numpy(), dtype=object)
+        matches = texts.where(texts.notna(), "").astype(str).str.extractall(
+            self.ALLOCATION_PATTERN)
+        codes, projects = pd.factorize(matches[0].str.strip(), sort=True)
+        return (matches.index.get_level_values(0).to_numpy(), codes,
+                matches[1].astype(float).to_numpy() / 100, list(projects))
+
+    def get_cost_columns(self):
+        finances = self.finances
+        return {
+            finances.ACQUISITION_COSTS_KEY: _("Acquisition"),
+            finances.ADMINISTRATION_COSTS_KEY: _("Administration"),
+            finances.MANAGEMENT_COSTS_KEY: _("Management"),
+            finances.VACATION_COSTS_KEY: _("Vacation")
+        }
+
+    def get_project_costs(self, df):
+        # one row per project with the allocated costs per category, the
+        # rest of the costs stays with the group
+        columns = self.get_cost_columns()
+        costs = df[list(columns)].apply(
+            pd.to_numeric, errors="coerce").fillna(0.0).to_numpy()
+        positions, codes, shares, projects = self.get_matrix(df)
+
+        weighted = costs[positions] * shares[:, None]
+        allocated = np.column_stack([
+            np.bincount(codes, weights=weighted[:, k],
+                        minlength=len(projects))
+            for k in range(costs.shape[1])]).reshape(len(projects), -1)
+
+        table = pd.DataFrame(
+            allocated, index=projects, columns=list(columns.values()))
+        table.loc[_("Not allocated")] = costs.sum(axis=0) - allocated.sum(
+            axis=0)
+        table[_("Total")] = table.sum(axis=1)
+        return table
+
+    def get_funding_costs(self, project_costs):
+        # the project costs summed up per funding source
+        sources = project_costs.index.map(
+            lambda project: self.funding_sources.get(
+                project, _("No funding source")))
+        return project_costs.groupby(sources, sort=True).sum()
+
+    def get_links(self, df, employee_nodes, first_node):
+        # the project level of the budget flow: employee -> project ->
+        # funding source, for Visualization. Returns the labels, colors,
+        # sources, targets and values of the additional nodes and links.
+        positions, codes, shares, projects = self.get_matrix(df)
+        if len(projects) == 0:
+            return [], [], [], [], []
+
+        funds = pd.to_numeric(
+            df[self.finances.PUBLIC_FUNDS_KEY], errors="coerce").fillna(
+                0.0).to_numpy()
+        values = funds[positions] * shares
+        sources = employee_nodes[positions]
+        targets = first_node + codes
+        labels = list(projects)
+        colors = [self.PROJECT_COLOR] * len(projects)
+
+        if self.funding_sources:
+            per_project = np.bincount(
+                codes, weights=values, minlength=len(projects))
+            funding = pd.Series(projects).map(self.funding_sources)
+            funded = funding.notna().to_numpy() & (per_project > 0)
+            source_codes, source_names = pd.factorize(funding[funded])
+            source_nodes = first_node + len(projects)
+            sources = np.concatenate(
+                [sources, first_node + np.flatnonzero(funded)])
+            targets = np.concatenate(
+                [targets, source_nodes + source_codes])
+            values = np.concatenate([values, per_project[funded]])
+            labels += list(source_names)
+            colors += [self.FUNDING_SOURCE_COLOR] * len(source_names)
+
+        mask = values > 0
+        return (labels, colors, sources[mask].tolist(),
+                targets[mask].tolist(), values[mask].tolist())
+
+    def refresh(self):
+        if not self.shown:
+            return
+
+        try:
+            self.refresh_employees()
+            # the costs scaled by the contract dates like the chart
+            project_costs = self.get_project_costs(
+                self.finances.get_projected_df())
+            self.table.value = (
+                "<b>" + _("Costs per Project (CHF)") + "</b>" +
+                self.to_html(project_costs) +
+                "<b>" + _("Costs per Funding Source (CHF)") + "</b>" +
+                self.to_html(self.get_funding_costs(project_costs)))
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def to_html(self, table):
+        header = "".join(
+            f"<th>{html.escape(str(col))}</th>" for col in table.columns)
+        rows = "".join(
+            f"<tr><td style='text-align:left'>{html.escape(str(name))}</td>" +
+            "".join(f"<td>{value:,.2f}</td>" for value in row) +
+            "</tr>"
+            for name, row in table.iterrows()
+        )
+        return (
+            "<table style='text-align:right'>"
+            f"<tr><th></th>{header}</tr>{rows}</table>"
+        )
+
+    def refresh_employees(self):
+        finances = self.finances
+        options = [
+            (str(name), idx)
+            for idx, name in finances.df[finances.NAME_KEY].items()]
+        if list(self.employee_dropdown.options) != options:
+            value = self.employee_dropdown.value
+            self.employee_dropdown.options = options
+            if value in finances.df.index:
+                self.employee_dropdown.value = value
+
+    def show_employee(self):
+        finances = self.finances
+        idx = self.employee_dropdown.value
+        if idx is None or idx not in finances.df.index:
+            return
+
+        value = finances.df.loc[idx].get(finances.PROJECTS_KEY)
+        self.projects_text.value = "" if pd.isna(value) else str(value)
+        self.message.value = ""
+
+    def apply_employee(self):
+        finances = self.finances
+        idx = self.employee_dropdown.value
+        if idx is None or idx not in finances.df.index:
+            return
+
+        try:
+            parts = [
+                part.strip() for part in self.projects_text.value.split(",")
+                if part.strip()]
+            matches = [
+                re.fullmatch(self.ALLOCATION_PATTERN, part) for part in parts]
+            for part, match in zip(parts, matches):
+                if match is None:
+                    self.message.value = _(
+                        "Invalid allocation: {allocation}").format(
+                            allocation=part)
+                    return
+
+            if sum(float(match.group(2)) for match in matches) > 100:
+                self.message.value = _(
+                    "The allocations add up to more than 100%.")
+                return
+
+            if finances.PROJECTS_KEY not in finances.df.columns:
+                finances.df[finances.PROJECTS_KEY] = ""
+
+            # recorded in the journal like an edit of a cell
+            self.message.value = ""
+            finances.update_cell(idx, finances.PROJECTS_KEY, ", ".join(parts))
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def apply_funding_sources(self):
+        funding_sources = {}
+        for line in self.funding_sources_text.value.splitlines():
+            project, separator, source = line.partition(":")
+            if separator and project.strip() and source.strip():
+                funding_sources[project.strip()] = source.strip()
+
+        self.finances.journal.record(
+            None, self.FUNDING_SOURCES_PARAMETER, self.funding_sources,
+            funding_sources)
+        self.set_funding_sources(funding_sources)
+
+    def set_funding_sources(self, funding_sources):
+        # also called by loading, restoring and undoing
+        finances = self.finances
+        self.funding_sources = dict(funding_sources)
+        self.funding_sources_text.value = "\n".join(
+            f"{project}: {source}"
+            for project, source in self.funding_sources.items())
+        finances.parameters_dirty = True
+        finances.refresh_visualization()
+
+    def show(self):
+        self.shown = True
+        display(widgets.VBox([
+            widgets.HBox(
+                [self.employee_dropdown, self.projects_text,
+                 self.apply_button, self.message],
+                layout=widgets.Layout(padding="5px")),
+            widgets.HBox(
+                [self.funding_sources_text, self.funding_sources_button],
+                layout=widgets.Layout(padding="5px")),
+            self.table,
+            self.output]))
+        self.refresh()
+        self.show_employee()
@@ -0,0 +1,90 @@
+from datetime import datetime
+import glob
+import os
+
+
+class Autosave:
+    # Autosaves the working budget into the file system of the kernel. In
+    # JupyterLite this is the contents store of the browser (IndexedDB), so
+    # the budget survives a crashed or closed tab.
+    #
+    # A full snapshot is written only now and then. In between, every
+    # autosave writes a small delta file with the parameters and the rows
+    # that changed since the last autosave.
+
+    def __init__(self, file_handler, directory=".autosave") -> None:
+        self.file_handler = file_handler
+        self.DIRECTORY = directory
+        self.SNAPSHOT_FILE = os.path.join(directory, "snapshot.json")
+        self.DELTA_PATTERN = os.path.join(directory, "delta-*.json")
+
+        # a new snapshot replaces the deltas after this many deltas
+        self.MAX_DELTAS = 100
+
+        self.delta_count = len(glob.glob(self.DELTA_PATTERN))
+
+    def exists(self):
+        return os.path.exists(self.SNAPSHOT_FILE)
+
+    def get_time(self):
+        paths = [self.SNAPSHOT_FILE] + glob.glob(self.DELTA_PATTERN)
+        return datetime.fromtimestamp(max(os.path.getmtime(p) for p in paths))
+
+    def needs_snapshot(self):
+        return not self.exists() or self.delta_count >= self.MAX_DELTAS
+
+    def write_snapshot(self, parameters, rows):
+        # parameters: FileHandler keys -> values
+        # rows: row index -> row dict
+        os.makedirs(self.DIRECTORY, exist_ok=True)
+        data = dict(parameters)
+        data[self.file_handler.EMPLOYEES_KEY] = rows
+        self._write(self.SNAPSHOT_FILE, data)
+
+        for path in glob.glob(self.DELTA_PATTERN):
+            os.remove(path)
+        self.delta_count = 0
+
+    def write_delta(self, parameters, rows, deleted):
+        self.delta_count += 1
+        self._write(
+            os.path.join(
+                self.DIRECTORY, f"delta-{self.delta_count:05d}.json"),
+            {
+                "parameters": parameters,
+                "rows": rows,
+                "deleted": sorted(deleted)
+            })
+
+    def restore(self):
+        # returns the parameters and the rows (row index -> row dict)
+        data = self._read(self.SNAPSHOT_FILE)
+        rows = data.pop(self.file_handler.EMPLOYEES_KEY, {})
+
+        for path in sorted(glob.glob(self.DELTA_PATTERN)):
+            delta = self._read(path)
+            data.update(delta["parameters"])
+            # deleted first, a row of the delta may have been deleted and
+            # added again since the previous autosave
+            for idx in delta["deleted"]:
+                rows.pop(str(idx), None)
+            rows.update(delta["rows"])
+
+        return data, {int(idx): row for idx, row in rows.items()}
+
+    def clear(self):
+        for path in [self.SNAPSHOT_FILE] + glob.glob(self.DELTA_PATTERN):
+            if os.path.exists(path):
+                os.remove(path)
+        self.delta_count = 0
+
+    def _write(self, path, data):
+        # write and rename, so that a crash never leaves a broken file
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(self.file_handler.to_json(data))
+        os.replace(temp_path, path)
+
+    def _read(self, path):
+        with open(path, encoding="utf-8") as file:
+            return self.file_handler.from_json(file.read())
@@ -0,0 +1,185 @@
+from Calculations import Calculations
+from datetime import date, timedelta
+from FileHandler import FileHandler
+import argparse
+import random
+
+
+class BudgetGenerator:
+
+    def __init__(self, finances=None, seed=None) -> None:
+        if finances is None:
+            # only the column keys are needed, e.g. on the command line,
+            # without the widgets of a whole budget
+            from Finances import Finances
+            finances = Finances.__new__(Finances)
+            finances.init_keys()
+            finances.calculations = Calculations()
+            finances.file_handler = FileHandler()
+
+        self.finances = finances
+        self.calculations = finances.calculations
+        self.file_handler = finances.file_handler
+        self.random = random.Random(seed)
+
+        self.FIRST_NAMES = [
+            "Anna", "Beat", "Chiara", "Daniel", "Elena", "Fabian", "Gabriela",
+            "Hans", "Irina", "Jonas", "Katharina", "Luca", "Marta", "Nico",
+            "Olivia", "Pascal", "Regula", "Simon", "Tanja", "Urs", "Vera",
+            "Walter", "Yvonne", "Zoe"]
+        self.LAST_NAMES = [
+            "Ammann", "Baumann", "Brunner", "Fischer", "Frei", "Gerber",
+            "Graf", "Huber", "Keller", "Kunz", "Meier", "Moser", "Müller",
+            "Schmid", "Schneider", "Steiner", "Weber", "Widmer", "Wyss",
+            "Zimmermann"]
+
+        # role -> (relative frequency, youngest age, oldest age,
+        #          indices into Calculations.known_hourly_rates)
+        self.ROLE_PROFILES = {
+            "Lecturer": (2, 35, 64, (4, 5)),
+            "Scientific Staff": (5, 28, 60, (2, 3, 4)),
+            "Research Assistant": (4, 23, 35, (0, 1))
+        }
+
+        self.MANAGEMENT_PROBABILITY = 0.25
+        self.ILV_PROBABILITY = 0.1
+
+        # the generated total budget leaves some money unspent
+        self.UTILIZATION = 0.9
+
+    def generate(self, size, year=None, management_allowance=20000.0,
+                 budgeted_sick_leave=None, administration_percentage=None):
+        calculations = self.calculations
+
+        if year is None:
+            year = date.today().year
+        if administration_percentage is None:
+            administration_percentage = (
+                calculations.DEFAULT_ADMINISTRATION_PERCENTAGE)
+        annual_working_time = calculations.DEFAULT_ANNUAL_WORKING_HOURS
+
+        employees = [
+            self.generate_employee(
+                year, annual_working_time, administration_percentage)
+            for _ in range(size)]
+        self.make_names_unique(employees)
+        self.spread_management_allowance(employees, management_allowance)
+
+        public_funds = sum(
+            employee[self.finances.PUBLIC_FUNDS_KEY]
+            for employee in employees)
+        if budgeted_sick_leave is None:
+            budgeted_sick_leave = round(public_funds * 0.03, -2)
+        total_budget = round(
+            (public_funds + management_allowance + budgeted_sick_leave) /
+            self.UTILIZATION, -3)
+
+        return self.file_handler.get_data(
+            year, annual_working_time, total_budget, management_allowance,
+            budgeted_sick_leave, administration_percentage, employees)
+
+    def generate_employee(self, year, annual_working_time,
+                          administration_percentage):
+        finances = self.finances
+        calculations = self.calculations
+        rnd = self.random
+
+        role = rnd.choices(
+            list(self.ROLE_PROFILES),
+            weights=[p[0] for p in self.ROLE_PROFILES.values()])[0]
+        _, youngest, oldest, rate_indices = self.ROLE_PROFILES[role]
+
+        age = rnd.randint(youngest, oldest)
+        date_of_birth = (
+            date(year - age, 1, 1) + timedelta(days=rnd.randint(0, 364)))
+        hourly_rate = calculations.get_int(
+            calculations.known_hourly_rates[rnd.choice(rate_indices)])
+        is_management = (
+            role != "Research Assistant" and
+            rnd.random() < self.MANAGEMENT_PROBABILITY)
+        is_ilv = rnd.random() < self.ILV_PROBABILITY
+        employment_percentage = float(rnd.choice(range(40, 101, 10)))
+        research_percentage = float(rnd.choice(range(10, 81, 5)))
+        acquisition_hours = float(rnd.choice(range(0, 201, 10)))
+
+        # the same calculations as in Finances.add_row
+        vacation_days = calculations.get_vacation_days(date_of_birth, year)
+        annual_working_hours = calculations.get_annual_working_hours(
+            annual_working_time, employment_percentage, vacation_days)
+        annual_vacation_hours = calculations.get_annual_vacation_hours(
+            vacation_days, employment_percentage)
+        vacation_costs = calculations.get_vacation_costs(
+            is_ilv, hourly_rate, annual_vacation_hours)
+        administration_hours = calculations.get_administration_hours(
+            is_management, annual_working_hours, administration_percentage)
+
+        return {
+            finances.NAME_KEY: (
+                rnd.choice(self.FIRST_NAMES) + " " +
+                rnd.choice(self.LAST_NAMES)),
+            finances.ROLE_KEY: role,
+            finances.ILV_KEY: is_ilv,
+            finances.HOURLY_RATE_KEY: hourly_rate,
+            finances.DATE_OF_BIRTH_KEY: date_of_birth,
+            finances.VACATION_DAYS_KEY: vacation_days,
+            finances.EMPLOYMENT_PERCENTAGE_KEY: employment_percentage,
+            finances.ANNUAL_WORKING_HOURS_KEY: annual_working_hours,
+            finances.ANNUAL_VACATION_HOURS_KEY: annual_vacation_hours,
+            finances.VACATION_COSTS_KEY: vacation_costs,
+            finances.RESEARCH_PERCENTAGE_KEY: research_percentage,
+            finances.RESEARCH_HOURS_KEY: calculations.get_research_hours(
+                annual_working_hours, research_percentage),
+            finances.ACQUISITION_HOURS_KEY: acquisition_hours,
+            finances.ACQUISITION_COSTS_KEY: calculations.get_costs(
+                hourly_rate, acquisition_hours),
+            finances.IS_MANAGEMENT_KEY: is_management,
+            finances.MANAGEMENT_COSTS_KEY: 0.0,
+            finances.ADMINISTRATION_HOURS_KEY: administration_hours,
+            finances.ADMINISTRATION_COSTS_KEY: calculations.get_costs(
+                hourly_rate, administration_hours),
+            finances.PUBLIC_FUNDS_KEY: 0.0
+        }
+
+    def make_names_unique(self, employees):
+        # the visualization needs unique names
+        counts = {}
+        for employee in employees:
+            name = employee[self.finances.NAME_KEY]
+            counts[name] = counts.get(name, 0) + 1
+            if counts[name] > 1:
+                employee[self.finances.NAME_KEY] = f"{name} {counts[name]}"
+
+    def spread_management_allowance(self, employees, management_allowance):
+        finances = self.finances
+        managers = sum(
+            1 for employee in employees
+            if employee[finances.IS_MANAGEMENT_KEY])
+
+        for employee in employees:
+            if employee[finances.IS_MANAGEMENT_KEY]:
+                employee[finances.MANAGEMENT_COSTS_KEY] = (
+                    management_allowance / managers)
+            employee[finances.PUBLIC_FUNDS_KEY] = (
+                self.calculations.get_public_funds(
+                    employee[finances.VACATION_COSTS_KEY],
+                    employee[finances.ACQUISITION_COSTS_KEY],
+                    employee[finances.MANAGEMENT_COSTS_KEY],
+                    employee[finances.ADMINISTRATION_COSTS_KEY]))
+
+    def save(self, file_name, size, **kwargs):
+        with open(file_name, "w", encoding="utf-8") as file:
+            file.write(self.file_handler.to_json(
+                self.generate(size, **kwargs)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generates a synthetic group budget file.")
+    parser.add_argument("size", type=int, help="number of employees")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--year", type=int, default=None)
+    parser.add_argument("--output", default="budget.json")
+    args = parser.parse_args()
+
+    BudgetGenerator(seed=args.seed).save(
+        args.output, args.size, year=args.year)
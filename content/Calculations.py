@@ -1,3 +1,7 @@
+from datetime import date
+import numpy as np
+
+
 class Calculations:
 
     def __init__(self) -> None:
@@ -8,6 +12,15 @@ class Calculations:
         self.HOURS_PER_DAY = 8.4
         self.known_hourly_rates = ["55", "69", "87", "89", "103", "117"]
 
+        # Vacation days only depend on the age in the plan year. They are
+        # looked up in this table, indexed by age, instead of being
+        # computed for every single row. Younger ages use the first entry
+        # and older ages the last one.
+        self.MAX_AGE = 120
+        ages = np.arange(self.MAX_AGE + 1)
+        self.vacation_days_by_age = np.select(
+            [ages <= 20, ages <= 44, ages <= 55], [28, 25, 28], 33)
+
     def get_management_share(self, management_allowance,
                              df, management_key, row):
         managers = df[df.get(management_key, False).fillna(False)]
@@ -80,16 +93,20 @@ class Calculations:
         if not birthdate:
             return 0
 
-        age = year - birthdate.year
-
-        if age <= 20:
-            return 28
-        elif age <= 44:
-            return 25
-        elif age <= 55:
-            return 28
-        else:
-            return 33
+        age = min(max(int(year - birthdate.year), 0), self.MAX_AGE)
+        return int(self.vacation_days_by_age[age])
+
+    # vectorized get_vacation_days(), e.g. for a whole column of birth
+    # dates, entries without a date get 0 vacation days
+    def vacation_days_for(self, birthdates, year):
+        birth_years = np.fromiter(
+            (birthdate.year if isinstance(birthdate, date) else -1
+             for birthdate in birthdates),
+            dtype=int, count=len(birthdates))
+        ages = np.clip(
+            (year - birth_years).astype(int), 0, self.MAX_AGE)
+        return np.where(
+            birth_years < 0, 0, self.vacation_days_by_age[ages])
 
     def _get_percentage(self, value, percentage):
         return value * percentage / 100
@@ -0,0 +1,367 @@
+from IPython.display import clear_output, display, HTML
+from Language import _
+import html
+import ipywidgets as widgets
+import numpy as np
+import os
+import pandas as pd
+import traceback
+
+
+class Consolidation:
+    # Combines the saved budget files of several groups, e.g. of a whole
+    # department. The employees of all files are kept in one table with a
+    # group column, all totals are computed with grouped operations on that
+    # table.
+
+    def __init__(self, finances=None) -> None:
+        if finances is None:
+            from Finances import Finances
+            finances = Finances()
+
+        self.finances = finances
+        self.file_handler = finances.file_handler
+        self.calculations = finances.calculations
+
+        self.GROUP_KEY = "Group"
+        self.EMPLOYEES_KEY = "Employees"
+        self.TOTAL_BUDGET_KEY = "Total Budget (CHF)"
+        self.SICK_LEAVE_KEY = "Sick Leave (CHF)"
+        self.REMAINING_KEY = "Remaining (CHF)"
+        self.UTILIZATION_KEY = "Utilization (%)"
+
+        # cost column -> node color, the same colors as in Visualization,
+        # the labels are translated by get_labels()
+        self.CATEGORIES = {
+            finances.ACQUISITION_COSTS_KEY: "#5BAE6E",
+            finances.ADMINISTRATION_COSTS_KEY: "#9E9E9E",
+            finances.MANAGEMENT_COSTS_KEY: "#4A6FA5",
+            finances.VACATION_COSTS_KEY: "#FFC067"
+        }
+        self.GROUP_COLOR = "#C76A2A"
+        self.SICK_LEAVE_COLOR = "#D9534F"
+        self.REMAINING_COLOR = "#3C8D5A"
+        self.EMPLOYEE_COLOR = "#D8E4E8"
+
+        # larger charts are not readable anymore and slow to render, then
+        # the chart stops at the categories
+        self.MAX_EMPLOYEE_NODES = 300
+
+        # one row per employee of all groups
+        self.df = pd.DataFrame(columns=[self.GROUP_KEY])
+        # one row per group with the parameters of its file
+        self.groups = pd.DataFrame()
+
+        self.upload_button = widgets.FileUpload(
+            accept=".json", multiple=True)
+        self.upload_button.observe(self.load_files, names="value")
+
+        # the value of all groups is None, a group may have any name
+        self.group_dropdown = widgets.Dropdown()
+        self.group_dropdown.observe(self.select_group, names="value")
+        self.translating = False
+
+        self.totals = widgets.HTML()
+        self.output = widgets.Output()
+        self.chart_output = widgets.Output()
+
+        finances.translation_listeners.append(self.translate)
+        self.translate()
+
+    # sets the texts of the widgets, again after every language switch
+    def translate(self):
+        self.upload_button.description = _("Open")
+        self.group_dropdown.description = _("Group")
+
+        # the selected group stays, the chart is drawn once by refresh()
+        self.translating = True
+        try:
+            group = self.group_dropdown.value
+            self.set_group_options()
+            self.group_dropdown.value = group
+        finally:
+            self.translating = False
+        if len(self.groups) > 0:
+            self.refresh()
+
+    def set_group_options(self):
+        self.group_dropdown.options = (
+            [(_("All Groups"), None)] +
+            [(name, name) for name in self.groups.index])
+
+    def select_group(self, change):
+        if not self.translating:
+            self.refresh_chart()
+
+    def get_labels(self):
+        # cost column -> node label, with the sick leave and the remaining
+        # budget
+        finances = self.finances
+        return {
+            finances.ACQUISITION_COSTS_KEY: _("Acquisition"),
+            finances.ADMINISTRATION_COSTS_KEY: _("Administration"),
+            finances.MANAGEMENT_COSTS_KEY: _("Management"),
+            finances.VACATION_COSTS_KEY: _("Vacation"),
+            self.SICK_LEAVE_KEY: _("Sick Leave"),
+            self.REMAINING_KEY: _("Remaining")
+        }
+
+    def load_files(self, change):
+        if not change["new"]:
+            return
+
+        try:
+            employees = []
+            groups = []
+            for upload in self.upload_button.value:
+                data = self.file_handler.load_data(upload["content"])
+                group = self.get_group_name(
+                    upload["name"], [g[self.GROUP_KEY] for g in groups])
+
+                groups.append({
+                    self.GROUP_KEY: group,
+                    self.file_handler.YEAR_KEY: data.get(
+                        self.file_handler.YEAR_KEY),
+                    self.file_handler.TOTAL_BUDGET_KEY: data.get(
+                        self.file_handler.TOTAL_BUDGET_KEY, 0),
+                    self.file_handler.MANAGEMENT_ALLOWANCE_KEY: data.get(
+                        self.file_handler.MANAGEMENT_ALLOWANCE_KEY, 0),
+                    self.file_handler.BUDGETED_SICK_LEAVE_KEY: data.get(
+                        self.file_handler.BUDGETED_SICK_LEAVE_KEY, 0)
+                })
+
+                df = pd.DataFrame(
+                    data.get(self.file_handler.EMPLOYEES_KEY, []))
+                df[self.GROUP_KEY] = group
+                employees.append(df)
+
+            self.set_data(pd.DataFrame(groups), employees)
+
+            self.upload_button.value = ()
+            self.upload_button._counter = 0
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def get_group_name(self, file_name, existing):
+        name = os.path.splitext(file_name)[0]
+        group = name
+        number = 1
+        while group in existing:
+            number += 1
+            group = f"{name} ({number})"
+        return group
+
+    def set_data(self, groups, employees):
+        finances = self.finances
+        df = pd.concat(employees, ignore_index=True)
+
+        # e.g. files of older versions without these columns
+        for col in list(self.CATEGORIES) + [finances.PUBLIC_FUNDS_KEY]:
+            if col not in df.columns:
+                df[col] = 0.0
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+
+        df[self.GROUP_KEY] = pd.Categorical(
+            df[self.GROUP_KEY], categories=groups[self.GROUP_KEY])
+        self.df = df
+        self.groups = groups.set_index(self.GROUP_KEY)
+
+        self.set_group_options()
+        self.group_dropdown.value = None
+        self.refresh()
+
+    def get_totals(self):
+        # one row per group and a total row at the end
+        finances = self.finances
+        costs = list(self.CATEGORIES)
+
+        grouped = self.df.groupby(self.GROUP_KEY, observed=False)
+        totals = grouped[costs].sum()
+        totals.insert(0, self.EMPLOYEES_KEY, grouped.size())
+        totals.insert(
+            1, self.TOTAL_BUDGET_KEY,
+            self.groups[self.file_handler.TOTAL_BUDGET_KEY])
+        totals[self.SICK_LEAVE_KEY] = (
+            self.groups[self.file_handler.BUDGETED_SICK_LEAVE_KEY])
+
+        # appended, a group may have the name of the total row
+        totals.index = totals.index.astype(str)
+        totals = pd.concat([
+            totals, totals.sum().to_frame(_("Total")).T]).rename_axis(
+            self.GROUP_KEY)
+
+        totals[self.REMAINING_KEY] = self.calculations.get_remaining_budget(
+            totals[self.TOTAL_BUDGET_KEY],
+            totals[finances.MANAGEMENT_COSTS_KEY],
+            totals[self.SICK_LEAVE_KEY],
+            totals[finances.VACATION_COSTS_KEY],
+            totals[finances.ACQUISITION_COSTS_KEY],
+            totals[finances.ADMINISTRATION_COSTS_KEY])
+        spent = totals[self.TOTAL_BUDGET_KEY] - totals[self.REMAINING_KEY]
+        totals[self.UTILIZATION_KEY] = (
+            spent / totals[self.TOTAL_BUDGET_KEY].where(
+                totals[self.TOTAL_BUDGET_KEY] > 0) * 100).fillna(0.0)
+        return totals
+
+    def to_html(self, totals):
+        headers = {
+            self.EMPLOYEES_KEY: _("Employees"),
+            self.TOTAL_BUDGET_KEY: _("Total Budget")
+        }
+        headers.update(self.get_labels())
+        headers[self.UTILIZATION_KEY] = _("Utilization (%)")
+        formats = {self.EMPLOYEES_KEY: ",.0f", self.UTILIZATION_KEY: ",.1f"}
+
+        header = "".join(f"<th>{headers[col]}</th>" for col in headers)
+        rows = "".join(
+            f"<tr><td style='text-align:left'>{html.escape(group)}</td>" +
+            "".join(
+                f"<td>{row[col]:{formats.get(col, ',.2f')}}</td>"
+                for col in headers) +
+            "</tr>"
+            for group, row in totals[list(headers)].iterrows()
+        )
+        return (
+            "<table style='text-align:right'>"
+            f"<tr><th></th>{header}</tr>{rows}</table>"
+        )
+
+    def get_links(self, df, groups):
+        # returns the node labels, node colors and the links as lists of
+        # sources, targets and values, the nodes are the groups, the
+        # categories and the employees in this order and are found by
+        # their position, never by their label
+        finances = self.finances
+        costs = list(self.CATEGORIES)
+        category_labels = self.get_labels()
+        categories = pd.Index(category_labels)
+
+        labels = list(groups.index) + list(category_labels.values())
+        colors = ([self.GROUP_COLOR] * len(groups) +
+                  list(self.CATEGORIES.values()) +
+                  [self.SICK_LEAVE_COLOR, self.REMAINING_COLOR])
+
+        # group -> category
+        per_group = df.groupby(self.GROUP_KEY, observed=True)[costs].sum()
+        per_group[self.SICK_LEAVE_KEY] = (
+            groups[self.file_handler.BUDGETED_SICK_LEAVE_KEY])
+        per_group = per_group.reindex(groups.index, fill_value=0.0)
+        per_group[self.REMAINING_KEY] = (
+            groups[self.file_handler.TOTAL_BUDGET_KEY] -
+            per_group.sum(axis=1)).clip(lower=0)
+        group_links = per_group.stack()
+        sources = [groups.index.get_indexer(
+            group_links.index.get_level_values(0))]
+        targets = [len(groups) + categories.get_indexer(
+            group_links.index.get_level_values(1))]
+        values = [group_links.to_numpy()]
+
+        # category -> employee, employees of different groups may have
+        # the same name
+        if len(df) <= self.MAX_EMPLOYEE_NODES:
+            employees = (
+                df[finances.NAME_KEY].astype(str) + " (" +
+                df[self.GROUP_KEY].astype(str) + ")")
+            if len(groups) == 1:
+                employees = df[finances.NAME_KEY].astype(str)
+            order = df[finances.PUBLIC_FUNDS_KEY].sort_values(
+                ascending=False).index
+            positions = pd.Series(
+                len(labels) + np.arange(len(order)), index=order)
+            labels += list(employees[order])
+            colors += [self.EMPLOYEE_COLOR] * len(order)
+
+            employee_links = df[costs].stack()
+            sources.append(len(groups) + categories.get_indexer(
+                employee_links.index.get_level_values(1)))
+            targets.append(positions[
+                employee_links.index.get_level_values(0)].to_numpy())
+            values.append(employee_links.to_numpy())
+
+        sources = np.concatenate(sources)
+        targets = np.concatenate(targets)
+        values = np.concatenate(values).astype(float)
+        positive = values > 0
+        return (labels, colors, sources[positive].tolist(),
+                targets[positive].tolist(), values[positive].tolist())
+
+    def refresh(self):
+        try:
+            self.totals.value = self.to_html(self.get_totals())
+            self.refresh_chart()
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def refresh_chart(self):
+        if len(self.groups) == 0:
+            return
+
+        try:
+            # imported here like in Visualization, plotly is expensive
+            import plotly.graph_objects as go
+
+            group = self.group_dropdown.value
+            df = self.df
+            groups = self.groups
+            if group is not None:
+                df = df[df[self.GROUP_KEY] == group]
+                groups = groups.loc[[group]]
+
+            labels, colors, sources, targets, values = self.get_links(
+                df, groups)
+
+            def with_alpha(hex_color, alpha=0.45):
+                h = hex_color.lstrip("#")
+                r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
+                return f"rgba({r},{g},{b},{alpha})"
+
+            fig = go.Figure(data=[go.Sankey(
+                arrangement="fixed",
+                node=dict(
+                    label=labels,
+                    color=colors,
+                    pad=16,
+                    thickness=15,
+                    hovertemplate=(
+                        '%{label}<br>CHF %{value:,.2f}<extra></extra>')
+                ),
+                link=dict(
+                    source=sources,
+                    target=targets,
+                    value=values,
+                    color=[with_alpha(colors[src]) for src in sources],
+                    hovertemplate=(
+                        '%{source.label} → %{target.label}<br>'
+                        'CHF %{value:,.2f}<extra></extra>'
+                        )
+                )
+            )])
+            fig.update_layout(
+                title_text="<b>" + _("Consolidated Budget Flow") + "</b>",
+                height=900, font_size=11,
+                margin=dict(t=100, b=100, l=0, r=0)
+            )
+
+            with self.chart_output:
+                clear_output(wait=True)
+                display(HTML(fig.to_html(include_plotlyjs='cdn')))
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def show(self):
+        display(widgets.VBox([
+            widgets.HBox(
+                [self.upload_button, self.group_dropdown],
+                layout=widgets.Layout(padding="5px")),
+            self.totals,
+            self.output,
+            self.chart_output]))
@@ -0,0 +1,105 @@
+import os
+import pandas as pd
+
+
+class Exporter:
+    # Writes the computed employee table and the budget summary into files
+    # of the kernel file system. In JupyterLite they show up in the file
+    # browser, from where they can be downloaded without going through a
+    # base64 encoded link.
+
+    def __init__(self, finances, directory="exports") -> None:
+        self.finances = finances
+        self.DIRECTORY = directory
+
+        # rows written at once, keeps the memory of the conversions small
+        self.CHUNK_SIZE = 5000
+
+        # format -> file extension
+        self.FORMATS = {
+            "CSV": ".csv",
+            "Parquet": ".parquet",
+            "Excel": ".xlsx"
+        }
+
+    def export(self, file_format, name):
+        # returns the paths of the written files
+        os.makedirs(self.DIRECTORY, exist_ok=True)
+        employees = self.get_employee_table()
+        summary = self.get_summary_table()
+        path = os.path.join(self.DIRECTORY, name)
+        extension = self.FORMATS[file_format]
+
+        if file_format == "Excel":
+            self.write_excel(employees, summary, path + extension)
+            return [path + extension]
+
+        write = self.write_csv if file_format == "CSV" else self.write_parquet
+        paths = [
+            path + "-employees" + extension, path + "-summary" + extension]
+        write(employees, paths[0])
+        write(summary, paths[1])
+        return paths
+
+    def get_employee_table(self):
+        # the columns with their real types instead of the object columns
+        # that the widgets leave behind, the costs are projected with the
+        # contract dates so that they add up to the summary
+        finances = self.finances
+        df = finances.get_projected_df()[list(finances.COLUMNS.keys())]
+        types = {
+            finances.NAME_KEY: "string",
+            finances.ROLE_KEY: "string",
+            finances.ILV_KEY: bool,
+            finances.HOURLY_RATE_KEY: int,
+            finances.VACATION_DAYS_KEY: int,
+            finances.IS_MANAGEMENT_KEY: bool
+        }
+        table = pd.DataFrame(index=df.index)
+        for col in df.columns:
+            if col == finances.DATE_OF_BIRTH_KEY:
+                table[col] = pd.to_datetime(df[col], errors="coerce")
+            else:
+                column_type = types.get(col, float)
+                table[col] = df[col].fillna(
+                    "" if column_type == "string" else 0).astype(column_type)
+        return table.reset_index(drop=True)
+
+    def get_summary_table(self):
+        summary = self.finances.get_summary()
+        return pd.DataFrame({
+            "Item": pd.Series(list(summary.keys()), dtype="string"),
+            "Value": pd.Series(list(summary.values()), dtype=float)
+        })
+
+    def get_chunks(self, df):
+        for start in range(0, max(len(df), 1), self.CHUNK_SIZE):
+            yield start, df.iloc[start:start + self.CHUNK_SIZE]
+
+    def write_csv(self, df, path):
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            for start, chunk in self.get_chunks(df):
+                chunk.to_csv(
+                    file, index=False, header=start == 0,
+                    date_format="%Y-%m-%d")
+
+    def write_parquet(self, df, path):
+        # pyarrow is optional, it is only imported for this format
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pq.ParquetWriter(path, schema) as writer:
+            for start, chunk in self.get_chunks(df):
+                writer.write_table(pa.Table.from_pandas(
+                    chunk, schema=schema, preserve_index=False))
+
+    def write_excel(self, employees, summary, path):
+        # needs openpyxl, like the Excel import
+        with pd.ExcelWriter(
+                path, engine="openpyxl", date_format="YYYY-MM-DD") as writer:
+            summary.to_excel(writer, sheet_name="Summary", index=False)
+            for start, chunk in self.get_chunks(employees):
+                chunk.to_excel(
+                    writer, sheet_name="Employees", index=False,
+                    header=start == 0, startrow=start + 1 if start else 0)
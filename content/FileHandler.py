@@ -14,36 +14,62 @@ class FileHandler:
         self.MANAGEMENT_ALLOWANCE_KEY = "managementAllowance"
         self.BUDGETED_SICK_LEAVE_KEY = "budgetedSickLeave"
         self.ADMINISTRATION_PERCENTAGE_KEY = "administrationPercentage"
+        self.FUNDING_SOURCES_KEY = "fundingSources"
         self.EMPLOYEES_KEY = "employees"
 
     def load_data(self, content):
-        return self._restore_dates(json.loads(bytes(content).decode('utf-8')))
+        return self.from_json(bytes(content).decode('utf-8'))
 
-    def save_data(self, year, annual_working_time, total_budget,
-                  management_allowance, budgeted_sick_leave,
-                  administration_percentage, df, download_output):
-
-        data_to_export = {
+    def get_parameters(self, year, annual_working_time, total_budget,
+                       management_allowance, budgeted_sick_leave,
+                       administration_percentage, funding_sources=None):
+        return {
             self.YEAR_KEY: year,
             self.ANNUAL_WORKING_TIME_KEY: annual_working_time,
             self.TOTAL_BUDGET_KEY: total_budget,
             self.MANAGEMENT_ALLOWANCE_KEY: management_allowance,
             self.BUDGETED_SICK_LEAVE_KEY: budgeted_sick_leave,
             self.ADMINISTRATION_PERCENTAGE_KEY: administration_percentage,
-            self.EMPLOYEES_KEY: df.to_dict(orient='records')
+            self.FUNDING_SOURCES_KEY: funding_sources or {}
         }
 
-        json_str = json.dumps(
-            data_to_export,
-            indent=2,
-            default=self._json_serializer
-        )
+    def get_data(self, year, annual_working_time, total_budget,
+                 management_allowance, budgeted_sick_leave,
+                 administration_percentage, employees, funding_sources=None):
+        data = self.get_parameters(
+            year, annual_working_time, total_budget, management_allowance,
+            budgeted_sick_leave, administration_percentage, funding_sources)
+        data[self.EMPLOYEES_KEY] = employees
+        return data
+
+    def to_json(self, data):
+        return json.dumps(data, indent=2, default=self._json_serializer)
+
+    def from_json(self, text):
+        return self._restore_dates(json.loads(text))
+
+    def save_data(self, year, annual_working_time, total_budget,
+                  management_allowance, budgeted_sick_leave,
+                  administration_percentage, df, download_output,
+                  funding_sources=None):
+
+        data_to_export = self.get_data(
+            year, annual_working_time, total_budget, management_allowance,
+            budgeted_sick_leave, administration_percentage,
+            df.to_dict(orient='records'), funding_sources)
+
+        self._download(data_to_export, "data.json", download_output)
+
+    def save_trace(self, trace, download_output):
+        self._download(trace, "trace.json", download_output)
 
+    def _download(self, data, file_name, download_output):
+        json_str = self.to_json(data)
         b64 = base64.b64encode(json_str.encode()).decode()
 
         html = f"""
         <a id="download-link"
-        download="data.json"
+        download="{file_name}"
         href="data:text/json;base64,{b64}"
         style="display:none;">
         </a>
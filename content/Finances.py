@@ -1,17 +1,27 @@
 from Calculations import Calculations
+from Exporter import Exporter
 from FileHandler import FileHandler
-from Visualization import Visualization
+from Importer import Importer
+from Journal import Journal
+from Autosave import Autosave
+from Allocation import Allocation
+from Language import _, get_language, set_language, LANGUAGES
+from Profiler import Profiler, profiled
+from Projection import Projection
+from RateCard import RateCard
+from Validation import Validation
+from WidgetPool import WidgetPool
 from IPython.display import display, HTML
-import gettext
+import asyncio
 import ipywidgets as widgets
 import pandas as pd
 import traceback
+from contextlib import contextmanager
 from datetime import date
-
-gettext.bindtextdomain('finances', 'translations')
-gettext.textdomain('finances')
-
-_ = gettext.gettext
+from ipywidgets.widgets.widget_bool import CheckboxStyle
+from ipywidgets.widgets.widget_description import DescriptionStyle
+from ipywidgets.widgets.widget_string import LabelStyle, TextStyle
+from traitlets import Bunch
 
 # fixing the order of the df:
 # finances.df = finances.df.reindex(columns=finances.COLUMNS.keys())
@@ -23,14 +33,115 @@ class Finances:
 
         self.calculations = Calculations()
         self.file_handler = FileHandler()
+        self.profiler = Profiler()
+        self.journal = Journal()
 
+        # all texts of the widgets are set by init_translations()
         self.upload_button = widgets.FileUpload(
-            description=_("Open"), accept=".json", multiple=False)
+            accept=".json", multiple=False)
         self.upload_button.observe(self.load_data, names="value")
 
-        self.save_button = widgets.Button(description="💾 " + _("Save"))
+        # bulk import of employees from CSV or Excel files
+        self.import_button = widgets.FileUpload(
+            accept=".csv,.xlsx", multiple=False)
+        self.import_button.observe(self.import_data, names="value")
+        self.import_report = widgets.HTML(
+            layout=widgets.Layout(display="none", padding="0px 5px"))
+
+        # export of the computed table and the summary for reporting
+        self.export_format = widgets.Dropdown(
+            options=["CSV", "Parquet", "Excel"],
+            layout=widgets.Layout(width="90px"))
+        self.export_button = widgets.Button()
+        self.export_button.on_click(lambda b: self.export_data())
+        self.export_report = widgets.HTML(
+            layout=widgets.Layout(display="none", padding="0px 5px"))
+
+        # changes a column of all filtered rows at once, e.g. when the
+        # rate cards change
+        self.bulk_column = widgets.Dropdown(
+            layout=widgets.Layout(width="180px"))
+        self.bulk_mode = widgets.Dropdown(
+            layout=widgets.Layout(width="150px"))
+        self.bulk_value = widgets.FloatText(
+            value=0.0, layout=widgets.Layout(width="90px"))
+        self.bulk_button = widgets.Button()
+        self.bulk_button.on_click(lambda b: self.bulk_edit(
+            self.bulk_column.value, self.bulk_mode.value,
+            self.bulk_value.value))
+        self.bulk_report = widgets.HTML(
+            layout=widgets.Layout(padding="0px 5px"))
+
+        self.save_button = widgets.Button()
         self.save_button.on_click(lambda b: self.save_data())
 
+        self.undo_button = widgets.Button(disabled=True)
+        self.undo_button.on_click(lambda b: self.undo())
+
+        self.redo_button = widgets.Button(disabled=True)
+        self.redo_button.on_click(lambda b: self.redo())
+
+        self.journal.listeners.append(self.update_undo_buttons)
+
+        # periodic autosave into the browser storage, only the rows that
+        # changed since the last autosave are written
+        self.autosave = Autosave(self.file_handler)
+        self.AUTOSAVE_SECONDS = 5
+        self.autosave_task = None
+        self.snapshot_needed = True
+        self.parameters_dirty = False
+        self.dirty_rows = set()
+        self.deleted_rows = set()
+        self.next_index = 0
+
+        self.restore_button = widgets.Button(button_style="success")
+        self.restore_button.on_click(lambda b: self.restore_autosave())
+        self.discard_button = widgets.Button()
+        self.discard_button.on_click(lambda b: self.discard_autosave())
+        self.autosave_label = widgets.HTML()
+        self.autosave_box = widgets.HBox(
+            [self.autosave_label, self.restore_button, self.discard_button],
+            layout=widgets.Layout(display="none", padding="5px"))
+
+        # opt-in timing instrumentation, e.g. for finding slow steps in
+        # browser sessions where no external profiler is available
+        self.profiling_checkbox = widgets.Checkbox(
+            value=False, indent=False,
+            layout=widgets.Layout(width="100px"))
+        self.profiling_checkbox.observe(
+            lambda change: self.toggle_profiling(change["new"]),
+            names="value")
+
+        self.export_trace_button = widgets.Button(
+            layout=widgets.Layout(display="none"))
+        self.export_trace_button.on_click(lambda b: self.export_trace())
+
+        self.reset_trace_button = widgets.Button(
+            layout=widgets.Layout(display="none"))
+        self.reset_trace_button.on_click(lambda b: self.reset_trace())
+
+        # compact table: one widget for the whole table instead of one
+        # widget per cell
+        self.grid_table = None
+        self.grid_table_checkbox = widgets.Checkbox(
+            value=False, indent=False,
+            layout=widgets.Layout(width="150px"))
+        self.grid_table_checkbox.observe(
+            lambda change: self.toggle_grid_table(change["new"]),
+            names="value")
+
+        self.language_dropdown = widgets.Dropdown(
+            options=[(name, code) for code, name in LANGUAGES.items()],
+            value=get_language() if get_language() in LANGUAGES else "en",
+            layout=widgets.Layout(width="100px"))
+        self.language_dropdown.observe(
+            lambda change: self.switch_language(change["new"]),
+            names="value")
+
+        self.profiling_panel = widgets.HTML(
+            layout=widgets.Layout(display="none"))
+        self.profiler.listeners.append(self.refresh_profiling_panel)
+
         finances_description_width = "250px"
         finances_widget_width = "400px"
         finances_style = {'description_width': finances_description_width}
@@ -40,20 +151,23 @@ class Finances:
                 text_align='right')
 
         self.year = self.get_money_floattext(
-            date.today().year, _("Year")
+            date.today().year
         )
         self.year.observe(
-            lambda change: self.update_year(),
+            lambda change: self.schedule_recompute(),
             names="value"
         )
 
         self.annual_working_time = self.get_money_floattext(
-            self.calculations.DEFAULT_ANNUAL_WORKING_HOURS,
-            _("Annual Working Time (h):")
+            self.calculations.DEFAULT_ANNUAL_WORKING_HOURS
+        )
+        self.annual_working_time.observe(
+            lambda change: self.schedule_recompute(),
+            names="value"
         )
 
         self.total_budget = self.get_money_floattext(
-            0.0, _("Total Budget (CHF):")
+            0.0
         )
 
         self.total_budget.observe(
@@ -66,15 +180,15 @@ class Finances:
         )
 
         self.management_allowance = self.get_money_floattext(
-            0.0, _("Management Allowance (CHF):")
+            0.0
         )
         self.management_allowance.observe(
-            lambda change: self.update_management_allowance(),
+            lambda change: self.schedule_recompute(),
             names="value"
         )
 
         self.budgeted_sick_leave = self.get_money_floattext(
-            0.0, _("Budgeted Sick Leave Costs (CHF):")
+            0.0
         )
         self.budgeted_sick_leave.observe(
             lambda change: self.update_budgeted_sick_leave(),
@@ -86,90 +200,45 @@ class Finances:
             max=100,
             step=1,
             value=self.calculations.DEFAULT_ADMINISTRATION_PERCENTAGE,
-            description=_("Administration (%)"),
             style=finances_style,
             layout=finances_layout
         )
         self.administration_percentage.observe(
-            self.handle_administration_percentage_update,
+            lambda change: self.schedule_recompute(),
             names="value"
         )
 
         self.vacation_expenses = self.get_money_floattext(
-            0.0, _("Vacation Costs (CHF):"), disabled=True
+            0.0, disabled=True
         )
 
         self.acquisition_expenses = self.get_money_floattext(
-            0.0, _("Acquisition Costs (CHF):"), disabled=True
+            0.0, disabled=True
         )
 
         self.administrative_expenses = self.get_money_floattext(
-            0.0, _("Administative Costs (CHF):"), disabled=True
+            0.0, disabled=True
         )
 
         self.remaining_budget = self.get_money_floattext(
-            0.0, _("Remaining Budget (CHF):"), disabled=True
+            0.0, disabled=True
         )
 
-        self.PUBLIC_FUNDS_KEY = "Public Funds (CHF)"
-        self.ADMINISTRATION_PERCENTAGE_KEY = "Administration (%)"
-        self.MANAGEMENT_ALLOWANCE_KEY = "Management Allowance (CHF)"
-        self.IS_MANAGEMENT_KEY = "Is Management"
-        self.NAME_KEY = "Name"
-        self.ROLE_KEY = "Role"
-        self.ILV_KEY = "ILV"
-        self.HOURLY_RATE_KEY = "Hourly Rate (CHF)"
-        self.DATE_OF_BIRTH_KEY = "Date of Birth"
-        self.VACATION_DAYS_KEY = "Vacation Days"
-        self.EMPLOYMENT_PERCENTAGE_KEY = "Employment (%)"
-        self.ANNUAL_WORKING_HOURS_KEY = "Annual Working Hours (h)"
-        self.ANNUAL_VACATION_HOURS_KEY = "Annual Vacation Hours (h)"
-        self.VACATION_COSTS_KEY = "Vacation (CHF)"
-        self.RESEARCH_PERCENTAGE_KEY = "Research (%)"
-        self.RESEARCH_HOURS_KEY = "Research (h)"
-        self.ACQUISITION_HOURS_KEY = "Acquisition (h)"
-        self.ACQUISITION_COSTS_KEY = "Acquisition (CHF)"
-        self.MANAGEMENT_COSTS_KEY = "Management (CHF)"
-        self.ADMINISTRATION_HOURS_KEY = "Administration (h)"
-        self.ADMINISTRATION_COSTS_KEY = "Administration (CHF)"
+        # changes of the global parameters are journaled with their
+        # attribute name and None as row
+        for name in ("year", "annual_working_time", "total_budget",
+                     "management_allowance", "budgeted_sick_leave",
+                     "administration_percentage"):
+            getattr(self, name).observe(
+                lambda change, n=name: self.handle_parameter_change(
+                    n, change),
+                names="value")
 
-        self.COLUMNS = {
-            self.NAME_KEY: _("Name"),
-            self.ROLE_KEY: _("Role"),
-            self.ILV_KEY: _("ILV"),
-            self.HOURLY_RATE_KEY: _("Hourly<br>Rate<br>(CHF)"),
-            self.DATE_OF_BIRTH_KEY: _("Date of Birth"),
-            self.VACATION_DAYS_KEY: _("Vacation<br>Days"),
-            self.EMPLOYMENT_PERCENTAGE_KEY: _("Employment<br>(%)"),
-            self.ANNUAL_WORKING_HOURS_KEY:
-                _("Annual<br>Working<br>Hours<br>(h)"),
-            self.ANNUAL_VACATION_HOURS_KEY:
-                _("Annual<br>Vacation<br>Hours<br>(h)"),
-            self.VACATION_COSTS_KEY: _("Vacation<br>(CHF)"),
-            self.RESEARCH_PERCENTAGE_KEY: _("Research<br>(%)"),
-            self.RESEARCH_HOURS_KEY: _("Research<br>(h)"),
-            self.ACQUISITION_HOURS_KEY: _("Acquisition<br>(h)"),
-            self.ACQUISITION_COSTS_KEY: _("Acquisition<br>(CHF)"),
-            self.IS_MANAGEMENT_KEY: _("Management"),
-            self.MANAGEMENT_COSTS_KEY: _("Management<br>(CHF)"),
-            self.ADMINISTRATION_HOURS_KEY: _("Administration<br>(h)"),
-            self.ADMINISTRATION_COSTS_KEY: (
-                _("Administration<br>(CHF)")),
-            self.PUBLIC_FUNDS_KEY: _("Public<br>Funds<br>(CHF)")
-            }
+        self.init_keys()
+        self.init_labels()
 
-        # see https://en.wikipedia.org/wiki/List_of_academic_ranks
-        self.ROLES = {
-            "Lecturer": _("Lecturer"),
-            "Scientific Staff": _("Scientific Staff"),
-            "Research Assistant": _("Research Assistant")
-            }
-        self.REVERSED_ROLES = {_(k): k for k in self.ROLES}
-
-        self.DEFAULT_ROLE = self.ROLES["Scientific Staff"]
-
-        # predefined translations
-        self.ACTIONS = _("Actions")
+        self.importer = Importer(self)
+        self.exporter = Exporter(self)
 
         self.df = pd.DataFrame(columns=self.COLUMNS.keys())
 
@@ -193,11 +262,19 @@ class Finances:
             self.ADMINISTRATION_HOURS_KEY: "120px",
             self.ADMINISTRATION_COSTS_KEY: "120px",
             self.PUBLIC_FUNDS_KEY: "120px",
-            self.ACTIONS: "100px"
+            self.ACTIONS_KEY: "100px"
         }
 
         self.sort_states = {column: None for column in self.COLUMNS.keys()}
 
+        # shared Layout and style models of the table cells, see
+        # get_cell_layout() and get_cell_style()
+        self.cell_layouts = {}
+        self.cell_styles = {}
+        self.row_layout = widgets.Layout(padding="0px 5px", flex="0 0 auto")
+        self.delete_button_layout = widgets.Layout(
+            width=self.column_widths[self.ACTIONS_KEY])
+
         self.input_widgets = {
 
             self.NAME_KEY:
@@ -264,9 +341,8 @@ class Finances:
         self.reset_input_widgets()
 
         self.add_button = widgets.Button(
-            description=_("Add"),
             button_style="success",
-            layout=widgets.Layout(width=self.column_widths[self.ACTIONS]))
+            layout=widgets.Layout(width=self.column_widths[self.ACTIONS_KEY]))
         self.add_button.on_click(lambda b: self.add_row())
 
         self.sort_buttons = {}
@@ -282,9 +358,37 @@ class Finances:
         self.administration_cost_labels = {}
         self.public_funds_labels = {}
 
+        # label -> text and the totals to update at the end of
+        # batch_labels(), None outside of a batch
+        self.pending_labels = None
+        self.pending_totals = None
+        self.batch_depth = 0
+
+        # (row, column) -> widget of the editable cells
+        self.input_cells = {}
+
+        # the rows of the table are reused after a refresh, see
+        # get_row_boxes()
+        self.widget_pool = WidgetPool()
+        self.row_boxes = []
+        self.sort_filter_row = None
+
+        # column -> label dict of the (read only) label columns
+        self.label_columns = {
+            self.VACATION_DAYS_KEY: self.vacation_days_labels,
+            self.ANNUAL_WORKING_HOURS_KEY: self.annual_working_hours_labels,
+            self.ANNUAL_VACATION_HOURS_KEY: self.annual_vacation_hours_labels,
+            self.VACATION_COSTS_KEY: self.vacation_cost_labels,
+            self.RESEARCH_HOURS_KEY: self.research_hours_labels,
+            self.ACQUISITION_COSTS_KEY: self.acquisition_cost_labels,
+            self.MANAGEMENT_COSTS_KEY: self.management_cost_labels,
+            self.ADMINISTRATION_HOURS_KEY: self.administration_hours_labels,
+            self.ADMINISTRATION_COSTS_KEY: self.administration_cost_labels,
+            self.PUBLIC_FUNDS_KEY: self.public_funds_labels
+        }
+
         for col in self.COLUMNS.keys():
             self.filter_widgets[col] = widgets.Text(
-                placeholder=_("Filter").format(col=self.COLUMNS[col]),
                 layout=widgets.Layout(width=self.column_widths[col]))
             self.filter_widgets[col].continuous_update = False
             self.sort_buttons[col] = widgets.Button(
@@ -307,28 +411,239 @@ class Finances:
 
         self.output_inner = widgets.VBox(layout=widgets.Layout(padding="5px"))
 
-        self.visualization = Visualization()
+        # rows shown immediately by refresh_table, the remaining rows are
+        # added in chunks by render_task
+        self.FIRST_PAGE_SIZE = 20
+        self.ROW_CHUNK_SIZE = 50
+        self.render_task = None
+
+        # recomputation of all rows after a change of the parameters, see
+        # schedule_recompute()
+        self.RECOMPUTE_CHUNK_SIZE = 200
+        self.RECOMPUTE_DELAY = 0.3
+        self.recompute_task = None
+
+        # the Visualization module (and with it plotly) is only imported
+        # when the chart is rendered for the first time
+        self.visualization = None
+        self.visualization_pending = False
+        self.visualization_suspended = False
         self.visualization_output = widgets.Output()
 
+        # called with every refresh of the chart, e.g. by other views of
+        # the budget like Projection
+        self.refresh_listeners = []
+
+        # called with every language switch, e.g. by the views in other
+        # cells of the notebook to translate their texts
+        self.translation_listeners = []
+
+        # hourly rates by role, step and year, shown by its own cell of
+        # the notebook
+        self.rate_card = RateCard(self)
+
+        # time of the employees per project, shown by its own cell of the
+        # notebook and as a level of the chart
+        self.allocation = Allocation(self)
+
+        # monthly costs with the contract dates, they also scale the totals
+        # of the budget panel, shown by its own cell of the notebook
+        self.projection = Projection(self)
+
+        # consistency checks of the rows, summarized in the budget panel
+        self.validation = Validation(self)
+
+        # column -> header widget, created by show()
+        self.header_widgets = {}
+        self.translating = False
+
         with self.output:
             display(self.output_inner)
 
-    def update_year(self):
+        self.init_translations()
 
-        try:
+    # the column keys of the data frame and the files, they need no
+    # widgets, e.g. for BudgetGenerator
+    def init_keys(self):
+        self.PUBLIC_FUNDS_KEY = "Public Funds (CHF)"
+        self.ADMINISTRATION_PERCENTAGE_KEY = "Administration (%)"
+        self.MANAGEMENT_ALLOWANCE_KEY = "Management Allowance (CHF)"
+        self.IS_MANAGEMENT_KEY = "Is Management"
+        self.NAME_KEY = "Name"
+        self.ROLE_KEY = "Role"
+        self.ILV_KEY = "ILV"
+        self.HOURLY_RATE_KEY = "Hourly Rate (CHF)"
+        self.DATE_OF_BIRTH_KEY = "Date of Birth"
+        self.VACATION_DAYS_KEY = "Vacation Days"
+        self.EMPLOYMENT_PERCENTAGE_KEY = "Employment (%)"
+        self.ANNUAL_WORKING_HOURS_KEY = "Annual Working Hours (h)"
+        self.ANNUAL_VACATION_HOURS_KEY = "Annual Vacation Hours (h)"
+        self.VACATION_COSTS_KEY = "Vacation (CHF)"
+        self.RESEARCH_PERCENTAGE_KEY = "Research (%)"
+        self.RESEARCH_HOURS_KEY = "Research (h)"
+        self.ACQUISITION_HOURS_KEY = "Acquisition (h)"
+        self.ACQUISITION_COSTS_KEY = "Acquisition (CHF)"
+        self.MANAGEMENT_COSTS_KEY = "Management (CHF)"
+        self.ADMINISTRATION_HOURS_KEY = "Administration (h)"
+        self.ADMINISTRATION_COSTS_KEY = "Administration (CHF)"
 
-            for idx, date_of_birth in self.df[self.DATE_OF_BIRTH_KEY].items():
-                if isinstance(date_of_birth, date):
-                    self.df.at[idx, self.VACATION_DAYS_KEY] = (
-                        self.calculations.get_vacation_days(
-                            date_of_birth, self.year.value))
-                    self.update_vacation_days_label(idx)
-                    self.update_annual_working_hours(idx)
-                    self.update_annual_vacation_hours(idx)
-                    self.update_vacation_costs(idx)
-                    self.update_administration_hours(idx)
-                    self.update_administration_costs(idx)
-                    self.update_public_funds(idx)
+        # optional columns of the monthly projection, they are not shown
+        # in the table, see Projection
+        self.START_DATE_KEY = "Start Date"
+        self.END_DATE_KEY = "End Date"
+        self.EMPLOYMENT_CHANGES_KEY = "Employment Changes"
+
+        # optional columns of the rate card, see RateCard
+        self.STEP_KEY = "Step"
+        self.STEP_YEAR_KEY = "Step Year"
+
+        # optional column of the project allocations, see Allocation
+        self.PROJECTS_KEY = "Projects"
+
+        # kept by imports and recomputations besides the table columns
+        self.OPTIONAL_COLUMNS = [
+            self.START_DATE_KEY,
+            self.END_DATE_KEY,
+            self.EMPLOYMENT_CHANGES_KEY,
+            self.STEP_KEY,
+            self.STEP_YEAR_KEY,
+            self.PROJECTS_KEY
+        ]
+
+        self.ACTIONS_KEY = "Actions"
+
+        # columns that can be changed for all filtered rows at once
+        self.BULK_COLUMNS = [
+            self.EMPLOYMENT_PERCENTAGE_KEY,
+            self.RESEARCH_PERCENTAGE_KEY,
+            self.HOURLY_RATE_KEY,
+            self.ACQUISITION_HOURS_KEY
+        ]
+
+    # the translated column headers and roles, the keys are never translated
+    def init_labels(self):
+        self.COLUMNS = {
+            self.NAME_KEY: _("Name"),
+            self.ROLE_KEY: _("Role"),
+            self.ILV_KEY: _("ILV"),
+            self.HOURLY_RATE_KEY: _("Hourly<br>Rate<br>(CHF)"),
+            self.DATE_OF_BIRTH_KEY: _("Date of Birth"),
+            self.VACATION_DAYS_KEY: _("Vacation<br>Days"),
+            self.EMPLOYMENT_PERCENTAGE_KEY: _("Employment<br>(%)"),
+            self.ANNUAL_WORKING_HOURS_KEY:
+                _("Annual<br>Working<br>Hours<br>(h)"),
+            self.ANNUAL_VACATION_HOURS_KEY:
+                _("Annual<br>Vacation<br>Hours<br>(h)"),
+            self.VACATION_COSTS_KEY: _("Vacation<br>(CHF)"),
+            self.RESEARCH_PERCENTAGE_KEY: _("Research<br>(%)"),
+            self.RESEARCH_HOURS_KEY: _("Research<br>(h)"),
+            self.ACQUISITION_HOURS_KEY: _("Acquisition<br>(h)"),
+            self.ACQUISITION_COSTS_KEY: _("Acquisition<br>(CHF)"),
+            self.IS_MANAGEMENT_KEY: _("Management"),
+            self.MANAGEMENT_COSTS_KEY: _("Management<br>(CHF)"),
+            self.ADMINISTRATION_HOURS_KEY: _("Administration<br>(h)"),
+            self.ADMINISTRATION_COSTS_KEY: (
+                _("Administration<br>(CHF)")),
+            self.PUBLIC_FUNDS_KEY: _("Public<br>Funds<br>(CHF)")
+            }
+
+        # see https://en.wikipedia.org/wiki/List_of_academic_ranks
+        self.ROLES = {
+            "Lecturer": _("Lecturer"),
+            "Scientific Staff": _("Scientific Staff"),
+            "Research Assistant": _("Research Assistant")
+            }
+        self.REVERSED_ROLES = {_(k): k for k in self.ROLES}
+
+        self.DEFAULT_ROLE = self.ROLES["Scientific Staff"]
+
+        # predefined translations
+        self.ACTIONS = _("Actions")
+
+    # sets the texts of all widgets, again after every language switch
+    def init_translations(self):
+        self.validation.update_summary()
+        self.upload_button.description = _("Open")
+        self.import_button.description = _("Import")
+        self.export_button.description = _("Export")
+        self.save_button.description = "💾 " + _("Save")
+        self.undo_button.description = "↶ " + _("Undo")
+        self.redo_button.description = "↷ " + _("Redo")
+        self.restore_button.description = _("Restore")
+        self.discard_button.description = _("Discard")
+        self.profiling_checkbox.description = _("Profiling")
+        self.export_trace_button.description = _("Export Trace")
+        self.reset_trace_button.description = _("Reset Trace")
+        self.grid_table_checkbox.description = _("Compact Table")
+        self.add_button.description = _("Add")
+        self.bulk_button.description = _("Apply to Filtered Rows")
+        column = self.bulk_column.value
+        self.bulk_column.options = [
+            (self.COLUMNS[col].replace("<br>", " "), col)
+            for col in self.BULK_COLUMNS]
+        self.bulk_column.value = column or self.BULK_COLUMNS[0]
+        mode = self.bulk_mode.value
+        self.bulk_mode.options = [
+            (_("Set to"), "set"), (_("Change by (%)"), "percent")]
+        self.bulk_mode.value = mode or "set"
+
+        self.year.description = _("Year")
+        self.annual_working_time.description = _("Annual Working Time (h):")
+        self.total_budget.description = _("Total Budget (CHF):")
+        self.management_allowance.description = _(
+            "Management Allowance (CHF):")
+        self.budgeted_sick_leave.description = _(
+            "Budgeted Sick Leave Costs (CHF):")
+        self.administration_percentage.description = _("Administration (%)")
+        self.vacation_expenses.description = _("Vacation Costs (CHF):")
+        self.acquisition_expenses.description = _("Acquisition Costs (CHF):")
+        self.administrative_expenses.description = _(
+            "Administative Costs (CHF):")
+        self.remaining_budget.description = _("Remaining Budget (CHF):")
+
+        for col in self.COLUMNS.keys():
+            self.filter_widgets[col].placeholder = _("Filter").format(
+                col=self.COLUMNS[col])
+
+        for col, header in self.header_widgets.items():
+            header.value = self.get_header_html(
+                self.ACTIONS if col == self.ACTIONS_KEY else self.COLUMNS[col])
+
+        for listener in self.translation_listeners:
+            listener()
+
+    # Switches the language of the running notebook. Only the texts are
+    # updated, the data, the journal and all computed values stay as they
+    # are.
+    @profiled("switch_language")
+    def switch_language(self, language):
+        try:
+            set_language(language)
+            self.init_labels()
+            self.init_translations()
+
+            # the role dropdowns show translated roles, the data frame has
+            # the untranslated ones
+            self.translating = True
+            try:
+                dropdowns = [self.input_widgets[self.ROLE_KEY]] + [
+                    cell for (idx, col), cell in self.input_cells.items()
+                    if col == self.ROLE_KEY]
+                for dropdown in dropdowns:
+                    idx = dropdown.index
+                    with dropdown.hold_sync():
+                        dropdown.options = list(self.ROLES.values())
+                        dropdown.index = idx
+            finally:
+                self.translating = False
+
+            if self.grid_table is not None:
+                with self.grid_table.hold_sync():
+                    self.grid_table.columns = self.get_grid_columns()
+                    self.refresh_grid_table(self.filter_df())
+
+            if self.visualization is not None:
+                self.visualization.clear_labels()
             self.refresh_visualization()
 
         except Exception:
@@ -336,20 +651,146 @@ class Finances:
             with self.output:
                 print(traceback.format_exc())
 
+    def toggle_profiling(self, enabled):
+        self.profiler.enabled = enabled
+        display_value = None if enabled else "none"
+        self.export_trace_button.layout.display = display_value
+        self.reset_trace_button.layout.display = display_value
+        self.profiling_panel.layout.display = display_value
+        self.refresh_profiling_panel()
+
+    def refresh_profiling_panel(self):
+        self.profiling_panel.value = (
+            self.profiler.to_html() +
+            "<div style='font-size:11px'>" +
+            _("Live widget models: {count}").format(
+                count=self.widget_pool.get_live_count()) +
+            "</div>")
+
+    def reset_trace(self):
+        self.profiler.reset()
+        self.refresh_profiling_panel()
+
+    def export_trace(self):
+        try:
+            self.file_handler.save_trace(
+                self.profiler.get_trace(), self.download_output)
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    # Year, annual working time, administration percentage and management
+    # allowance change the derived columns of all rows. The recomputation
+    # runs as a task in chunks, so that the kernel keeps processing input.
+    # A task that has not finished yet is restarted when the parameters
+    # change again, e.g. while a year is typed digit by digit.
+    def schedule_recompute(self):
+        self.cancel_recompute()
+
+        loop = self.get_running_loop()
+        if loop is None:
+            self.recompute_all()
+        else:
+            self.recompute_task = loop.create_task(self.run_recompute())
+
+    def cancel_recompute(self):
+        if self.recompute_task is not None:
+            self.recompute_task.cancel()
+            self.recompute_task = None
+
+    def get_recompute_chunks(self):
+        index = self.df.index
+        return [index[start:start + self.RECOMPUTE_CHUNK_SIZE]
+                for start in range(0, len(index), self.RECOMPUTE_CHUNK_SIZE)]
+
+    async def run_recompute(self):
+        try:
+            # waits for further changes of the parameters
+            await asyncio.sleep(self.RECOMPUTE_DELAY)
+
+            for index in self.get_recompute_chunks():
+                with self.profiler.measure("recompute_chunk"):
+                    self.recompute_chunk(index)
+                # give the kernel a chance to process other messages
+                await asyncio.sleep(0)
+
+            self.recompute_task = None
+            self.spread_management_costs()
+            self.refresh_table()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    @profiled("recompute_all")
+    def recompute_all(self):
+        try:
+            for index in self.get_recompute_chunks():
+                self.recompute_chunk(index)
+            self.spread_management_costs()
+            self.refresh_table()
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def recompute_chunk(self, index):
+        # rows may have been deleted while the task was waiting
+        index = index.intersection(self.df.index)
+        if len(index) == 0:
+            return
+
+        # rows without a birth date keep their vacation days
+        birthdates = self.df.loc[index, self.DATE_OF_BIRTH_KEY]
+        dated = birthdates.index[
+            [isinstance(birthdate, date) for birthdate in birthdates]]
+        self.df.loc[dated, self.VACATION_DAYS_KEY] = (
+            self.calculations.vacation_days_for(
+                birthdates[dated], self.year.value))
+
+        # the steps increase with the year
+        self.rate_card.update_rates(index)
+        self.recompute_rows(index, spread_management=False)
+
+        # checked again with the new derived columns, also when a check
+        # has run while the recomputation was waiting
+        self.validation.mark_rows_dirty(index)
+
+    # All cells of a column share the same Layout model and all cells of a
+    # kind share the same style model, instead of allocating two extra
+    # widget models for every single cell.
+    def get_cell_layout(self, width_key, **kwargs):
+        key = (width_key,) + tuple(sorted(kwargs.items()))
+        if key not in self.cell_layouts:
+            self.cell_layouts[key] = widgets.Layout(
+                width=self.column_widths[width_key],
+                flex="0 0 auto",
+                **kwargs
+            )
+        return self.cell_layouts[key]
+
+    def get_cell_style(self, style_class, **kwargs):
+        key = (style_class,) + tuple(sorted(kwargs.items()))
+        if key not in self.cell_styles:
+            self.cell_styles[key] = style_class(**kwargs)
+        return self.cell_styles[key]
+
     def get_date_of_birth_picker(self, value=None):
         return widgets.DatePicker(
             value=value,
-            layout=widgets.Layout(
-                width=self.column_widths[self.DATE_OF_BIRTH_KEY],
-                flex="0 0 auto"
-            )
+            style=self.get_cell_style(DescriptionStyle),
+            layout=self.get_cell_layout(self.DATE_OF_BIRTH_KEY)
         )
 
-    def get_money_floattext(self, value, description, disabled=False):
+    def get_money_floattext(self, value, disabled=False):
         return widgets.FloatText(
             value=value,
             step=0.05,
-            description=description,
             readout_format=",.2f",
             disabled=disabled,
             style={
@@ -361,49 +802,26 @@ class Finances:
                 flex="0 0 auto")
         )
 
-    def handle_administration_percentage_update(self, change):
-        for idx in self.df.index:
-            is_management = self.df.at[idx, self.IS_MANAGEMENT_KEY]
-
-            administration_hours = self.calculations.get_administration_hours(
-                is_management,
-                self.df.at[idx, self.ANNUAL_WORKING_HOURS_KEY],
-                change["new"])
-
-            self.df.at[idx, self.ADMINISTRATION_HOURS_KEY] = (
-                administration_hours)
-            self.update_administration_hours_label(idx)
-            self.update_administration_costs(idx)
-            self.update_public_funds(idx)
-
-        self.refresh_table()
-
     def get_name_text(self, value):
         return widgets.Text(
             value=value,
-            layout=widgets.Layout(
-                width=self.column_widths[self.NAME_KEY],
-                flex="0 0 auto"
-            )
+            style=self.get_cell_style(TextStyle),
+            layout=self.get_cell_layout(self.NAME_KEY)
         )
 
     def get_role_dropdown(self, value):
         return widgets.Dropdown(
             value=value,
             options=self.ROLES.values(),
-            layout=widgets.Layout(
-                width=self.column_widths[self.ROLE_KEY],
-                flex="0 0 auto"
-            )
+            style=self.get_cell_style(DescriptionStyle),
+            layout=self.get_cell_layout(self.ROLE_KEY)
         )
 
     def get_checkbox(self, value, with_key):
         return widgets.Checkbox(
             value=value,
-            layout=widgets.Layout(
-                width=self.column_widths[with_key],
-                flex="0 0 auto"
-            )
+            style=self.get_cell_style(CheckboxStyle),
+            layout=self.get_cell_layout(with_key)
         )
 
     def get_hourly_rate_combobox(self, value):
@@ -411,10 +829,8 @@ class Finances:
             value=str(value),
             options=self.calculations.known_hourly_rates,
             ensure_option=False,
-            layout=widgets.Layout(
-                width=self.column_widths[self.HOURLY_RATE_KEY],
-                flex="0 0 auto"
-            )
+            style=self.get_cell_style(TextStyle),
+            layout=self.get_cell_layout(self.HOURLY_RATE_KEY)
         )
 
     def get_float_slider(self, value, width_key):
@@ -424,30 +840,26 @@ class Finances:
             step=1,
             readout_format=".0f",
             value=value,
-            layout=widgets.Layout(
-                width=self.column_widths[width_key],
-                flex="0 0 auto"
-            )
+            style=self.get_cell_style(widgets.SliderStyle),
+            layout=self.get_cell_layout(width_key)
         )
 
     def get_floattext(self, value, width_key):
         return widgets.FloatText(
             value=value,
             step=1,
-            layout=widgets.Layout(
-                width=self.column_widths[width_key],
-                flex="0 0 auto"
-            )
+            style=self.get_cell_style(DescriptionStyle),
+            layout=self.get_cell_layout(width_key)
         )
 
     def get_cost_label(self, value, width_key):
         return widgets.Label(
             value=value,
-            layout=widgets.Layout(
+            style=self.get_cell_style(LabelStyle),
+            layout=self.get_cell_layout(
+                width_key,
                 display="flex",
-                justify_content="flex-end",
-                width=self.column_widths[width_key],
-                flex="0 0 auto"
+                justify_content="flex-end"
             )
         )
 
@@ -459,7 +871,13 @@ class Finances:
             self.VACATION_DAYS_KEY: 0,
             self.ILV_KEY: False,
             self.ANNUAL_VACATION_HOURS_KEY: 0,
-            self.VACATION_COSTS_KEY: 0
+            self.VACATION_COSTS_KEY: 0,
+            self.START_DATE_KEY: None,
+            self.END_DATE_KEY: None,
+            self.EMPLOYMENT_CHANGES_KEY: "",
+            self.STEP_KEY: None,
+            self.STEP_YEAR_KEY: None,
+            self.PROJECTS_KEY: ""
         }
 
         for col, default in defaults.items():
@@ -470,59 +888,263 @@ class Finances:
             if default is not None:
                 self.df[col] = self.df[col].fillna(default)
 
+    @profiled("load_data")
     def load_data(self, change):
         if not change["new"]:
             return
 
         try:
             content = self.upload_button.value[0]["content"]
-            self.json_data = self.file_handler.load_data(content)
+            with self.profiler.measure("FileHandler.load_data"):
+                self.json_data = self.file_handler.load_data(content)
 
-            self.year.value = self.json_data.get(
+            self.apply_data(self.json_data, pd.DataFrame(self.json_data.get(
+                self.file_handler.EMPLOYEES_KEY, [])))
+
+            self.upload_button.value = ()
+            self.upload_button._counter = 0
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    # shows the parameters and employees of a loaded or restored budget
+    def apply_data(self, data, df):
+        # the parameters below trigger recomputations and refreshes,
+        # don't waste them on the rows of the previous file
+        self.df = self.df.iloc[0:0]
+        self.visualization_suspended = True
+
+        try:
+            self.year.value = data.get(
                 self.file_handler.YEAR_KEY, date.today().year)
 
-            self.annual_working_time.value = self.json_data.get(
+            self.annual_working_time.value = data.get(
                 self.file_handler.ANNUAL_WORKING_TIME_KEY,
                 self.calculations.DEFAULT_ANNUAL_WORKING_HOURS)
 
-            self.total_budget.value = self.json_data.get(
+            self.total_budget.value = data.get(
                 self.file_handler.TOTAL_BUDGET_KEY, 0)
 
-            self.management_allowance.value = self.json_data.get(
+            self.management_allowance.value = data.get(
                 self.file_handler.MANAGEMENT_ALLOWANCE_KEY, 0)
 
-            self.budgeted_sick_leave.value = self.json_data.get(
+            self.budgeted_sick_leave.value = data.get(
                 self.file_handler.BUDGETED_SICK_LEAVE_KEY, 0)
 
-            self.administration_percentage.value = self.json_data.get(
+            self.administration_percentage.value = data.get(
                 self.file_handler.ADMINISTRATION_PERCENTAGE_KEY,
                 self.calculations.DEFAULT_ADMINISTRATION_PERCENTAGE)
 
-            self.df = pd.DataFrame(self.json_data.get(
-                self.file_handler.EMPLOYEES_KEY, []))
+            self.allocation.set_funding_sources(data.get(
+                self.file_handler.FUNDING_SOURCES_KEY, {}))
 
-            self.ensure_columns()
-            self.refresh_table()
+        finally:
+            self.visualization_suspended = False
 
-            self.upload_button.value = ()
-            self.upload_button._counter = 0
+        # the loaded rows are computed with these parameters already
+        self.cancel_recompute()
+        self.df = df
+        self.ensure_columns()
+        self.refresh_table()
+
+        # the history belongs to the previous file
+        self.journal.clear()
+        self.mark_all_dirty()
+
+    @profiled("import_data")
+    def import_data(self, change):
+        if not change["new"]:
+            return
 
+        try:
+            upload = self.import_button.value[0]
+            df, report = self.importer.import_file(
+                upload["content"], upload["name"],
+                self.df[self.NAME_KEY])
+            self.import_rows(df)
+            self.show_import_report(len(df), report)
+
+            self.import_button.value = ()
+            self.import_button._counter = 0
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    # New rows get indices after all indices given so far. The journal,
+    # the cells and the autosave refer to the rows by their index, so the
+    # index of a deleted row is never given to another row.
+    def get_new_index(self, count):
+        start = max(
+            self.next_index,
+            self.df.index.max() + 1 if len(self.df) else 0)
+        self.next_index = start + count
+        return pd.RangeIndex(start, start + count)
+
+    # appends validated rows with all derived columns in one batch
+    def import_rows(self, df):
+        # the steps of the file are valid for the plan year
+        if self.STEP_KEY in df.columns:
+            df[self.STEP_YEAR_KEY] = pd.Series(
+                int(self.year.value), index=df.index, dtype=object).where(
+                    df[self.STEP_KEY].notna(), None)
+            df[self.HOURLY_RATE_KEY] = self.rate_card.resolve(
+                df, int(self.year.value)).fillna(
+                    df[self.HOURLY_RATE_KEY]).astype(int)
+
+        df = self.importer.compute_columns(
+            df, self.year.value, self.annual_working_time.value,
+            self.administration_percentage.value)
+
+        df.index = self.get_new_index(len(df))
+        if len(self.df):
+            df = pd.concat([self.df, df])
+
+        self.importer.compute_management_costs(
+            df, self.management_allowance.value)
+        self.df = df
+        self.mark_all_dirty()
+        self.refresh_table()
+
+    def show_import_report(self, imported, report):
+        text = _("{imported} employees imported.").format(imported=imported)
+        if len(report) > 0:
+            text += " " + _(
+                "{rejected} rows were rejected:").format(
+                    rejected=report["line"].nunique())
+            text += self.importer.to_html(report)
+        self.import_report.value = text
+        self.import_report.layout.display = None
+
+    @profiled("export_data")
+    def export_data(self):
+        try:
+            paths = self.exporter.export(
+                self.export_format.value, f"budget-{self.year.value:.0f}")
+            text = _("Exported to {paths}.").format(paths=", ".join(paths))
+
+        except ImportError as e:
+            # Parquet needs pyarrow, Excel needs openpyxl
+            text = _("This format needs {module}, install it with "
+                     "%pip install {module}").format(module=e.name)
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+            return
+
+        self.export_report.value = text
+        self.export_report.layout.display = None
+
+    def get_parameters(self):
+        return self.file_handler.get_parameters(
+            self.year.value,
+            self.annual_working_time.value,
+            self.total_budget.value,
+            self.management_allowance.value,
+            self.budgeted_sick_leave.value,
+            self.administration_percentage.value,
+            self.allocation.funding_sources)
+
+    def mark_dirty(self, idx):
+        self.dirty_rows.add(idx)
+        self.validation.mark_dirty(idx)
+
+    def mark_all_dirty(self):
+        self.snapshot_needed = True
+        self.validation.mark_all_dirty()
+
+    def handle_parameter_change(self, name, change):
+        self.journal.record(None, name, change["old"], change["new"])
+
+        if name in ("total_budget", "budgeted_sick_leave"):
+            self.parameters_dirty = True
+        else:
+            # the derived columns of all rows depend on these
+            self.mark_all_dirty()
+
+    def start_autosave(self):
+        loop = self.get_running_loop()
+        if loop is not None and self.autosave_task is None:
+            self.autosave_task = loop.create_task(self.run_autosave())
+
+    async def run_autosave(self):
+        while True:
+            await asyncio.sleep(self.AUTOSAVE_SECONDS)
+            self.save_autosave()
+
+    def save_autosave(self):
+        try:
+            with self.profiler.measure("autosave"):
+                if self.snapshot_needed or self.autosave.needs_snapshot():
+                    self.autosave.write_snapshot(
+                        self.get_parameters(), self.get_autosave_rows())
+
+                elif (self.dirty_rows or self.deleted_rows or
+                      self.parameters_dirty):
+                    self.autosave.write_delta(
+                        self.get_parameters(),
+                        self.get_autosave_rows(self.dirty_rows),
+                        self.deleted_rows)
+
+                self.snapshot_needed = False
+                self.parameters_dirty = False
+                self.dirty_rows = set()
+                self.deleted_rows = set()
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def get_autosave_rows(self, index=None):
+        df = self.df
+        if index is not None:
+            df = df.loc[[idx for idx in index if idx in df.index]]
+        return {int(idx): row for idx, row in df.to_dict("index").items()}
+
+    def restore_autosave(self):
+        try:
+            with self.profiler.measure("restore_autosave"):
+                data, rows = self.autosave.restore()
+                if rows:
+                    df = pd.DataFrame.from_dict(rows, orient="index")
+                    df = df.sort_index()
+                else:
+                    df = pd.DataFrame(columns=self.COLUMNS.keys())
+                self.apply_data(data, df)
         except Exception:
             print(traceback.format_exc())
             with self.output:
                 print(traceback.format_exc())
 
+        self.close_autosave_box()
+
+    def discard_autosave(self):
+        self.autosave.clear()
+        self.close_autosave_box()
+
+    def close_autosave_box(self):
+        self.autosave_box.layout.display = "none"
+        self.start_autosave()
+
     def save_data(self):
         try:
-            self.file_handler.save_data(
-                self.year.value,
-                self.annual_working_time.value,
-                self.total_budget.value,
-                self.management_allowance.value,
-                self.budgeted_sick_leave.value,
-                self.administration_percentage.value,
-                self.sort_df(self.df),
-                self.download_output)
+            with self.profiler.measure("FileHandler.save_data"):
+                self.file_handler.save_data(
+                    self.year.value,
+                    self.annual_working_time.value,
+                    self.total_budget.value,
+                    self.management_allowance.value,
+                    self.budgeted_sick_leave.value,
+                    self.administration_percentage.value,
+                    self.sort_df(self.df),
+                    self.download_output,
+                    self.allocation.funding_sources)
         except Exception:
             print(traceback.format_exc())
             with self.output:
@@ -560,13 +1182,54 @@ class Finances:
                 self.df, self.IS_MANAGEMENT_KEY, row),
             self.compute_administration_costs(row))
 
+    # Recomputations of many rows collect their label texts and send only
+    # the texts that have changed at the end, every label at most once.
+    # The totals are summed up once instead of after every row.
+    @contextmanager
+    def batch_labels(self):
+        self.batch_depth += 1
+        if self.batch_depth == 1:
+            self.pending_labels = {}
+            self.pending_totals = []
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                labels = self.pending_labels
+                totals = self.pending_totals
+                self.pending_labels = None
+                self.pending_totals = None
+                self.flush_labels(labels, totals)
+
+    def flush_labels(self, labels, totals):
+        with self.profiler.measure("flush_labels"):
+            for label, text in labels.items():
+                if label.value != text:
+                    label.value = text
+            for update in totals:
+                update()
+
+    def set_label_value(self, label, text):
+        if self.pending_labels is not None:
+            self.pending_labels[label] = text
+        elif label.value != text:
+            label.value = text
+
+    def update_total_later(self, update):
+        if self.pending_totals is None:
+            update()
+        elif update not in self.pending_totals:
+            self.pending_totals.append(update)
+
     def update_vacation_days_label(self, idx):
         if idx not in self.vacation_days_labels:
             return
 
         row = self.df.loc[idx]
         value = row[self.VACATION_DAYS_KEY]
-        self.vacation_days_labels[idx].value = (f"{value:.0f}")
+        self.set_label_value(
+            self.vacation_days_labels[idx], f"{value:.0f}")
 
     def update_annual_working_hours_label(self, idx):
         if idx not in self.annual_working_hours_labels:
@@ -574,21 +1237,23 @@ class Finances:
 
         row = self.df.loc[idx]
         value = row[self.ANNUAL_WORKING_HOURS_KEY]
-        self.annual_working_hours_labels[idx].value = (f"{value:.2f}")
+        self.set_label_value(
+            self.annual_working_hours_labels[idx], f"{value:.2f}")
 
     def update_annual_vacation_hours_label(self, idx):
         if idx not in self.annual_vacation_hours_labels:
             return
 
         value = self.df.at[idx, self.ANNUAL_VACATION_HOURS_KEY]
-        self.annual_vacation_hours_labels[idx].value = f"{value:.2f}"
+        self.set_label_value(
+            self.annual_vacation_hours_labels[idx], f"{value:.2f}")
 
     def update_vacation_costs_label(self, idx):
         if idx not in self.vacation_cost_labels:
             return
 
         value = self.df.at[idx, self.VACATION_COSTS_KEY]
-        self.vacation_cost_labels[idx].value = f"{value:,.2f}"
+        self.set_label_value(self.vacation_cost_labels[idx], f"{value:,.2f}")
 
     def update_research_hours_label(self, idx):
         if idx not in self.research_hours_labels:
@@ -596,7 +1261,8 @@ class Finances:
 
         row = self.df.loc[idx]
         value = row[self.RESEARCH_HOURS_KEY]
-        self.research_hours_labels[idx].value = (f"{value:.2f}")
+        self.set_label_value(
+            self.research_hours_labels[idx], f"{value:.2f}")
 
     def update_acquisition_costs_label(self, idx):
         if idx not in self.acquisition_cost_labels:
@@ -604,8 +1270,9 @@ class Finances:
 
         row = self.df.loc[idx]
         value = self.compute_acquisition_costs(row)
-        self.acquisition_cost_labels[idx].value = f"{value:,.2f}"
-        self.update_total_acquisition_costs()
+        self.set_label_value(
+            self.acquisition_cost_labels[idx], f"{value:,.2f}")
+        self.update_total_later(self.update_total_acquisition_costs)
 
     def update_management_costs_label(self, idx):
         if idx not in self.management_cost_labels:
@@ -615,7 +1282,7 @@ class Finances:
         value = self.calculations.get_management_share(
             self.management_allowance.value,
             self.df, self.IS_MANAGEMENT_KEY, row)
-        self.management_cost_labels[idx].value = f"{value:,.2f}"
+        self.set_label_value(self.management_cost_labels[idx], f"{value:,.2f}")
 
     def update_administration_hours_label(self, idx):
         if idx not in self.administration_hours_labels:
@@ -623,7 +1290,8 @@ class Finances:
 
         row = self.df.loc[idx]
         value = row[self.ADMINISTRATION_HOURS_KEY]
-        self.administration_hours_labels[idx].value = (f"{value:.2f}")
+        self.set_label_value(
+            self.administration_hours_labels[idx], f"{value:.2f}")
 
     def update_administration_costs_label(self, idx):
         if idx not in self.administration_cost_labels:
@@ -631,8 +1299,9 @@ class Finances:
 
         row = self.df.loc[idx]
         value = self.compute_administration_costs(row)
-        self.administration_cost_labels[idx].value = f"{value:,.2f}"
-        self.update_total_administration_costs()
+        self.set_label_value(
+            self.administration_cost_labels[idx], f"{value:,.2f}")
+        self.update_total_later(self.update_total_administration_costs)
 
     def update_public_funds_label(self, idx):
         if idx not in self.public_funds_labels:
@@ -640,23 +1309,71 @@ class Finances:
 
         row = self.df.loc[idx]
         value = self.compute_public_funds(row)
-        self.public_funds_labels[idx].value = f"{value:,.2f}"
+        self.set_label_value(self.public_funds_labels[idx], f"{value:,.2f}")
+
+    # The table with the annual costs of the rows scaled by the contract
+    # dates and the employment changes, the management share is paid every
+    # month, see Projection. The totals, the chart and the exports use it.
+    def get_projected_df(self):
+        keys = [self.VACATION_COSTS_KEY, self.ACQUISITION_COSTS_KEY,
+                self.ADMINISTRATION_COSTS_KEY]
+        factors = self.projection.get_factors(self.df, int(self.year.value))
+        projected = self.df.copy()
+        projected[keys] = self.df[keys].apply(
+            pd.to_numeric, errors="coerce").fillna(0.0).mul(factors, axis=0)
+        projected[self.PUBLIC_FUNDS_KEY] = projected[
+            keys + [self.MANAGEMENT_COSTS_KEY]].apply(
+                pd.to_numeric, errors="coerce").fillna(0.0).sum(axis=1)
+        return projected
+
+    @profiled("update_total_vacation_costs")
+    def update_total_vacation_costs(self, projected=None):
+        if projected is None:
+            projected = self.get_projected_df()
+        self.vacation_expenses.value = projected[self.VACATION_COSTS_KEY].sum()
+        self.update_remaining_budget()
 
-    def update_total_vacation_costs(self):
-        total = self.df.apply(self.compute_vacation_costs, axis=1).sum()
-        self.vacation_expenses.value = total
+    @profiled("update_total_acquisition_costs")
+    def update_total_acquisition_costs(self, projected=None):
+        if projected is None:
+            projected = self.get_projected_df()
+        self.acquisition_expenses.value = projected[
+            self.ACQUISITION_COSTS_KEY].sum()
         self.update_remaining_budget()
 
-    def update_total_acquisition_costs(self):
-        total = self.df.apply(self.compute_acquisition_costs, axis=1).sum()
-        self.acquisition_expenses.value = total
+    @profiled("update_total_administration_costs")
+    def update_total_administration_costs(self, projected=None):
+        if projected is None:
+            projected = self.get_projected_df()
+        self.administrative_expenses.value = round(
+            projected[self.ADMINISTRATION_COSTS_KEY].sum(), 2)
         self.update_remaining_budget()
 
-    def update_total_administration_costs(self):
-        total = self.df.apply(self.compute_administration_costs, axis=1).sum()
-        self.administrative_expenses.value = round(total, 2)
+    def update_totals(self):
+        # the projection is computed once for all totals
+        projected = self.get_projected_df()
+        self.update_total_vacation_costs(projected)
+        self.update_total_acquisition_costs(projected)
+        self.update_total_administration_costs(projected)
         self.update_remaining_budget()
 
+    # the budget panel as numbers, e.g. for the exports
+    def get_summary(self):
+        total_budget = self.total_budget.value
+        spent = total_budget - self.remaining_budget.value
+        return {
+            "Year": self.year.value,
+            "Total Budget (CHF)": total_budget,
+            "Management Allowance (CHF)": self.management_allowance.value,
+            "Budgeted Sick Leave (CHF)": self.budgeted_sick_leave.value,
+            "Vacation Costs (CHF)": self.vacation_expenses.value,
+            "Acquisition Costs (CHF)": self.acquisition_expenses.value,
+            "Administrative Costs (CHF)": self.administrative_expenses.value,
+            "Remaining Budget (CHF)": self.remaining_budget.value,
+            "Utilization (%)": (
+                spent / total_budget * 100 if total_budget else 0.0)
+        }
+
     def update_remaining_budget(self):
         value = self.calculations.get_remaining_budget(
             self.total_budget.value,
@@ -667,16 +1384,12 @@ class Finances:
             self.administrative_expenses.value)
         self.remaining_budget.value = round(value, 2)
 
-    def update_management_allowance(self):
-        self.spread_management_allowance()
-        self.update_remaining_budget()
-        self.refresh_visualization()
-
     def update_budgeted_sick_leave(self):
         self.update_remaining_budget()
         self.refresh_visualization()
 
     # adds a new row to the DataFrame df
+    @profiled("add_row")
     def add_row(self):
         try:
             new_row = {}
@@ -756,9 +1469,10 @@ class Finances:
 
                 new_row[col] = val
 
+            idx = self.get_new_index(1)[0]
             self.df = pd.concat(
-                [self.df, pd.DataFrame([new_row])],
-                ignore_index=True)
+                [self.df, pd.DataFrame([new_row], index=[idx])])
+            self.mark_dirty(idx)
             self.reset_input_widgets()
             self.refresh_table()
 
@@ -836,8 +1550,79 @@ class Finances:
 
         return temp
 
+    # Sets a column of all filtered rows to a value or changes it by a
+    # percentage. The derived columns are recomputed in one pass and the
+    # table and the chart are refreshed once. Undo restores all rows at
+    # once.
+    @profiled("bulk_edit")
+    def bulk_edit(self, col, mode, value):
+        try:
+            index = self.filter_df().index
+            old = pd.to_numeric(self.df.loc[index, col], errors="coerce")
+            if mode == "percent":
+                new = old.fillna(0.0) * (1 + value / 100)
+            else:
+                new = pd.Series(float(value), index=index)
+
+            # the same limits as the widgets of the column
+            if col == self.HOURLY_RATE_KEY:
+                new = new.clip(lower=0).round().astype(int)
+            elif col == self.ACQUISITION_HOURS_KEY:
+                new = new.clip(lower=0)
+            else:
+                new = new.clip(0, 100)
+
+            # the journal gets the values of the cell widgets, the hourly
+            # rates are texts
+            with self.journal.group():
+                for idx, old_value, new_value in zip(
+                        index, self.df.loc[index, col], new.tolist()):
+                    if col == self.HOURLY_RATE_KEY:
+                        old_value = str(old_value)
+                        new_value = str(new_value)
+                    self.journal.record(idx, col, old_value, new_value)
+                    self.mark_dirty(idx)
+
+            for idx, new_value in zip(index, new.tolist()):
+                self.df.at[idx, col] = new_value
+            self.recompute_rows(index)
+            self.refresh_table()
+
+            self.bulk_report.value = _("{count} rows changed.").format(
+                count=len(index))
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    # recomputes the derived columns of the given rows with whole columns
+    # instead of row by row, the vacation days stay as they are
+    def recompute_rows(self, index, spread_management=True):
+        df = self.df.loc[index]
+        computed = self.importer.compute_columns(
+            df, self.year.value, self.annual_working_time.value,
+            self.administration_percentage.value,
+            vacation_days=pd.to_numeric(
+                df[self.VACATION_DAYS_KEY], errors="coerce").fillna(0))
+
+        for col in self.label_columns:
+            if col != self.VACATION_DAYS_KEY:
+                self.df.loc[index, col] = computed[col]
+
+        # the management costs and the public funds of all rows, spread
+        # once after the last chunk of a recomputation of all rows
+        if spread_management:
+            self.spread_management_costs()
+
+    def spread_management_costs(self):
+        self.importer.compute_management_costs(
+            self.df, self.management_allowance.value)
+
     def delete_row(self, idx):
         self.df = self.df.drop(index=idx)
+        self.deleted_rows.add(idx)
+        self.dirty_rows.discard(idx)
         self.refresh_table()
 
     def handle_int_update(self, change):
@@ -854,17 +1639,19 @@ class Finances:
     def handle_role_update(self, idx, col, new_value):
         self.df.at[idx, col] = self.REVERSED_ROLES.get(new_value, new_value)
 
+    @profiled("spread_management_allowance")
     def spread_management_allowance(self):
-        for idx in self.df.index:
-            self.df.at[idx, self.MANAGEMENT_COSTS_KEY] = (
-                    self.calculations.get_management_share(
-                        self.management_allowance.value, self.df,
-                        self.IS_MANAGEMENT_KEY, self.df.loc[idx]))
-
-            self.update_administration_hours(idx)
-            self.update_administration_costs(idx)
-            self.update_management_costs_label(idx)
-            self.update_public_funds(idx)
+        with self.batch_labels():
+            for idx in self.df.index:
+                self.df.at[idx, self.MANAGEMENT_COSTS_KEY] = (
+                        self.calculations.get_management_share(
+                            self.management_allowance.value, self.df,
+                            self.IS_MANAGEMENT_KEY, self.df.loc[idx]))
+
+                self.update_administration_hours(idx)
+                self.update_administration_costs(idx)
+                self.update_management_costs_label(idx)
+                self.update_public_funds(idx)
 
     def handle_management_update(self, idx, col, new_value):
         self.df.at[idx, self.IS_MANAGEMENT_KEY] = new_value
@@ -886,8 +1673,9 @@ class Finances:
         except ValueError:
             # if the new value can't be converted to int
             # revert the change
-            change.owner.value = change.old
-            value = change.old
+            if change.owner is not None:
+                change.owner.value = change.old
+            value = self.calculations.get_int(change.old)
 
         new_hourly_rate = value if value else 0
         self.df.at[idx, self.HOURLY_RATE_KEY] = new_hourly_rate
@@ -1019,271 +1807,222 @@ class Finances:
         self.update_public_funds_label(idx)
 
     def handle_cell_update(self, idx, col, change):
+        if self.translating:
+            # only the language of the value has changed
+            return
+
         try:
             new_value = change["new"]
 
-            if col == self.NAME_KEY:
-                self.df.at[idx, col] = new_value
-                self.refresh_visualization()
+            # roles are recorded untranslated
+            if col == self.ROLE_KEY:
+                self.journal.record(
+                    idx, col, self.REVERSED_ROLES.get(change["old"]),
+                    self.REVERSED_ROLES.get(new_value, new_value))
+            else:
+                self.journal.record(idx, col, change["old"], new_value)
 
-            elif col == self.ROLE_KEY:
-                self.handle_role_update(idx, col, new_value)
+            with self.profiler.measure("handle_cell_update: " + col):
+                if col == self.NAME_KEY:
+                    self.df.at[idx, col] = new_value
+                    self.refresh_visualization()
 
-            elif col == self.ILV_KEY:
-                self.df.at[idx, col] = new_value
+                elif col == self.ROLE_KEY:
+                    self.handle_role_update(idx, col, new_value)
 
-            elif col == self.HOURLY_RATE_KEY:
-                self.handle_hourly_rate_update(idx, change)
-                self.refresh_visualization()
+                elif col == self.ILV_KEY:
+                    self.df.at[idx, col] = new_value
 
-            elif col == self.DATE_OF_BIRTH_KEY:
-                self.handle_date_of_birth_update(idx, new_value)
+                elif col == self.HOURLY_RATE_KEY:
+                    self.handle_hourly_rate_update(idx, change)
+                    self.refresh_visualization()
 
-            elif col == self.EMPLOYMENT_PERCENTAGE_KEY:
-                self.handle_employment_percentage_update(idx, new_value)
-                self.refresh_visualization()
+                elif col == self.DATE_OF_BIRTH_KEY:
+                    self.handle_date_of_birth_update(idx, new_value)
 
-            elif col == self.RESEARCH_PERCENTAGE_KEY:
-                self.handle_research_percentage_update(idx, new_value)
+                elif col == self.EMPLOYMENT_PERCENTAGE_KEY:
+                    self.handle_employment_percentage_update(idx, new_value)
+                    self.refresh_visualization()
 
-            elif col == self.ACQUISITION_HOURS_KEY:
-                self.handle_acquisition_hours_update(idx, new_value)
-                self.refresh_visualization()
+                elif col == self.RESEARCH_PERCENTAGE_KEY:
+                    self.handle_research_percentage_update(idx, new_value)
+
+                elif col == self.ACQUISITION_HOURS_KEY:
+                    self.handle_acquisition_hours_update(idx, new_value)
+                    self.refresh_visualization()
+
+                elif col == self.IS_MANAGEMENT_KEY:
+                    self.handle_management_update(idx, col, new_value)
+                    self.refresh_visualization()
 
-            elif col == self.IS_MANAGEMENT_KEY:
-                self.handle_management_update(idx, col, new_value)
-                self.refresh_visualization()
+                elif col in self.OPTIONAL_COLUMNS:
+                    # the columns of the views without cells in the table,
+                    # e.g. the projects of Allocation
+                    self.df.at[idx, col] = new_value
+                    self.refresh_visualization()
+
+            if col == self.IS_MANAGEMENT_KEY:
+                # the management share of all managers has changed
+                self.mark_all_dirty()
+            else:
+                self.mark_dirty(idx)
+            self.validation.check()
 
         except Exception:
             print(traceback.format_exc())
             with self.output:
                 print(traceback.format_exc())
 
-    def get_cell_annual_working_hours(self, idx, row):
-        value = self.calculations.get_annual_working_hours(
-            self.annual_working_time.value,
-            row[self.EMPLOYMENT_PERCENTAGE_KEY],
-            row[self.VACATION_DAYS_KEY])
-        cell = self.get_cost_label(
-            f"{value:.2f}", self.ANNUAL_WORKING_HOURS_KEY)
-        self.annual_working_hours_labels[idx] = cell
-        return cell
-
-    def get_cell_annual_vacation_hours(self, idx, row):
-        try:
-            value = float(row[self.ANNUAL_VACATION_HOURS_KEY])
-            text = f"{value:.2f}"
-        except Exception:
-            text = "0.00"
-        cell = self.get_cost_label(text, self.ANNUAL_VACATION_HOURS_KEY)
-        self.annual_vacation_hours_labels[idx] = cell
-        return cell
-
-    def get_cell_vacation_costs(self, idx, row):
-        value = float(row[self.VACATION_COSTS_KEY])
-        cell = self.get_cost_label(
-            f"{value:,.2f}",
-            self.VACATION_COSTS_KEY
-        )
-        self.vacation_cost_labels[idx] = cell
-        return cell
+    # returns the text of the (read only) label columns
+    def get_label_text(self, row, col):
 
-    def get_cell_vacation_days(self, idx, row):
-        birthdate = row.get(self.DATE_OF_BIRTH_KEY)
-        value = self.calculations.get_vacation_days(birthdate, self.year.value)
-        cell = self.get_cost_label(
-            f"{value:.0f}",
-            self.VACATION_DAYS_KEY
-        )
-        self.vacation_days_labels[idx] = cell
-        return cell
+        if col == self.VACATION_DAYS_KEY:
+            value = self.calculations.get_vacation_days(
+                row.get(self.DATE_OF_BIRTH_KEY), self.year.value)
+            return f"{value:.0f}"
 
-    def get_cell_research_hours(self, idx, row):
-        try:
-            annual_working_hours = float(row[self.ANNUAL_WORKING_HOURS_KEY])
-        except Exception:
-            annual_working_hours = 0.0
-        research_percentage = row[self.RESEARCH_PERCENTAGE_KEY]
-        value = self.calculations.get_research_hours(
-            annual_working_hours, research_percentage)
-        cell = self.get_cost_label(f"{value:.2f}", self.RESEARCH_HOURS_KEY)
-        self.research_hours_labels[idx] = cell
-        return cell
+        elif col == self.ANNUAL_WORKING_HOURS_KEY:
+            value = self.calculations.get_annual_working_hours(
+                self.annual_working_time.value,
+                row[self.EMPLOYMENT_PERCENTAGE_KEY],
+                row[self.VACATION_DAYS_KEY])
+            return f"{value:.2f}"
 
-    def get_cell_acquisistion_costs(self, idx, row):
-        value = self.compute_acquisition_costs(row)
-        cell = self.get_cost_label(f"{value:,.2f}", self.ACQUISITION_COSTS_KEY)
-        self.acquisition_cost_labels[idx] = cell
-        return cell
+        elif col in (self.ANNUAL_VACATION_HOURS_KEY,
+                     self.ADMINISTRATION_HOURS_KEY):
+            try:
+                return f"{float(row[col]):.2f}"
+            except Exception:
+                return "0.00"
 
-    def get_cell_management_costs(self, idx, row):
-        value = float(row[self.MANAGEMENT_COSTS_KEY])
-        cell = self.get_cost_label(
-            f"{value:,.2f}", self.MANAGEMENT_COSTS_KEY)
-        self.management_cost_labels[idx] = cell
-        return cell
+        elif col in (self.VACATION_COSTS_KEY, self.MANAGEMENT_COSTS_KEY):
+            return f"{float(row[col]):,.2f}"
 
-    def get_cell_administration_hours(self, idx, row):
-        try:
-            value = float(row[self.ADMINISTRATION_HOURS_KEY])
-            text = f"{value:.2f}"
-        except Exception:
-            text = "0.00"
-        cell = self.get_cost_label(text, self.ADMINISTRATION_HOURS_KEY)
-        self.administration_hours_labels[idx] = cell
-        return cell
-
-    def get_cell_administration_costs(self, idx, row):
-        value = self.compute_administration_costs(row)
-        cell = self.get_cost_label(
-            f"{value:,.2f}", self.ADMINISTRATION_COSTS_KEY)
-        self.administration_cost_labels[idx] = cell
-        return cell
+        elif col == self.RESEARCH_HOURS_KEY:
+            try:
+                annual_working_hours = float(
+                    row[self.ANNUAL_WORKING_HOURS_KEY])
+            except Exception:
+                annual_working_hours = 0.0
+            value = self.calculations.get_research_hours(
+                annual_working_hours, row[self.RESEARCH_PERCENTAGE_KEY])
+            return f"{value:.2f}"
 
-    def get_cell_public_funds(self, idx, row):
-        value = self.compute_public_funds(row)
-        cell = self.get_cost_label(f"{value:,.2f}", self.PUBLIC_FUNDS_KEY)
-        self.public_funds_labels[idx] = cell
-        return cell
+        elif col == self.ACQUISITION_COSTS_KEY:
+            return f"{self.compute_acquisition_costs(row):,.2f}"
 
-    def get_cell(self, idx, row, col):
+        elif col == self.ADMINISTRATION_COSTS_KEY:
+            return f"{self.compute_administration_costs(row):,.2f}"
 
-        observing = True
+        elif col == self.PUBLIC_FUNDS_KEY:
+            return f"{self.compute_public_funds(row):,.2f}"
 
+    # creates an empty cell for a pooled row, see fill_row_box()
+    def create_cell(self, col):
         if col == self.NAME_KEY:
-            cell = self.get_name_text(row[col])
+            cell = self.get_name_text("")
 
         elif col == self.ROLE_KEY:
-            cell = self.get_role_dropdown(self.ROLES[row[col]])
-
-        elif col == self.ILV_KEY:
-            cell = self.get_checkbox(row.get(col, False), self.ILV_KEY)
+            cell = self.get_role_dropdown(self.DEFAULT_ROLE)
 
-        elif col == self.IS_MANAGEMENT_KEY:
-            cell = self.get_checkbox(
-                row.get(col, False), self.IS_MANAGEMENT_KEY)
+        elif col in (self.ILV_KEY, self.IS_MANAGEMENT_KEY):
+            cell = self.get_checkbox(False, col)
 
         elif col == self.HOURLY_RATE_KEY:
-            cell = self.get_hourly_rate_combobox(row[col])
+            cell = self.get_hourly_rate_combobox("")
 
         elif col == self.DATE_OF_BIRTH_KEY:
-            cell = self.get_date_of_birth_picker(row[col])
-
-        elif col == self.VACATION_DAYS_KEY:
-            cell = self.get_cell_vacation_days(idx, row)
-            observing = False
-
-        elif col == self.EMPLOYMENT_PERCENTAGE_KEY:
-            cell = self.get_float_slider(
-                row[col], self.EMPLOYMENT_PERCENTAGE_KEY)
-
-        elif col == self.ANNUAL_WORKING_HOURS_KEY:
-            cell = self.get_cell_annual_working_hours(idx, row)
-            observing = False
-
-        elif col == self.ANNUAL_VACATION_HOURS_KEY:
-            cell = self.get_cell_annual_vacation_hours(idx, row)
-            observing = False
-
-        elif col == self.VACATION_COSTS_KEY:
-            cell = self.get_cell_vacation_costs(idx, row)
-            observing = False
-
-        elif col == self.RESEARCH_PERCENTAGE_KEY:
-            cell = self.get_float_slider(
-                row[col], self.RESEARCH_PERCENTAGE_KEY)
+            cell = self.get_date_of_birth_picker()
 
-        elif col == self.RESEARCH_HOURS_KEY:
-            cell = self.get_cell_research_hours(idx, row)
-            observing = False
+        elif col in (self.EMPLOYMENT_PERCENTAGE_KEY,
+                     self.RESEARCH_PERCENTAGE_KEY):
+            cell = self.get_float_slider(0, col)
 
         elif col == self.ACQUISITION_HOURS_KEY:
-            cell = self.get_floattext(row[col], self.ACQUISITION_HOURS_KEY)
-
-        elif col == self.ACQUISITION_COSTS_KEY:
-            cell = self.get_cell_acquisistion_costs(idx, row)
-            observing = False
+            cell = self.get_floattext(0, col)
 
-        elif col == self.MANAGEMENT_COSTS_KEY:
-            cell = self.get_cell_management_costs(idx, row)
-            observing = False
+        else:
+            if col not in self.label_columns:
+                print("Warning: unhandled col", col)
+            cell = self.get_cost_label("", col)
+
+        # the row of a cell changes when it is reused, the observer looks
+        # it up when it is called
+        cell.cell_idx = None
+        cell.cell_col = col
+        if col not in self.label_columns:
+            cell.observe(self.handle_cell_change, names="value")
+        return cell
 
-        elif col == self.ADMINISTRATION_HOURS_KEY:
-            cell = self.get_cell_administration_hours(idx, row)
-            observing = False
+    def handle_cell_change(self, change):
+        cell = change["owner"]
+        # None while the cell is filled with the values of another row
+        if cell.cell_idx is not None:
+            self.handle_cell_update(cell.cell_idx, cell.cell_col, change)
 
-        elif col == self.ADMINISTRATION_COSTS_KEY:
-            cell = self.get_cell_administration_costs(idx, row)
-            observing = False
+    def set_cell_value(self, cell, row, col):
+        if col == self.ROLE_KEY:
+            # e.g. a pooled cell from before a language switch
+            options = tuple(self.ROLES.values())
+            if cell.options != options:
+                cell.options = options
+            cell.value = self.ROLES[row[col]]
 
-        elif col == self.PUBLIC_FUNDS_KEY:
-            cell = self.get_cell_public_funds(idx, row)
-            observing = False
+        elif col in (self.ILV_KEY, self.IS_MANAGEMENT_KEY):
+            cell.value = row.get(col, False)
 
-        else:
-            print("Warning: unhandled col", col)
+        elif col == self.HOURLY_RATE_KEY:
+            cell.value = str(row[col])
 
-        if observing:
-            cell.observe(
-                lambda change, i=idx, c=col:
-                    self.handle_cell_update(i, c, change), names="value")
+        elif col in self.label_columns:
+            cell.value = self.get_label_text(row, col)
 
-        return cell
+        else:
+            cell.value = row[col]
 
+    @profiled("refresh_table")
     def refresh_table(self):
 
-        self.annual_working_hours_labels.clear()
-        self.annual_vacation_hours_labels.clear()
-        self.vacation_cost_labels.clear()
-        self.research_hours_labels.clear()
-        self.acquisition_cost_labels.clear()
-        self.management_cost_labels.clear()
-        self.administration_hours_labels.clear()
-        self.administration_cost_labels.clear()
-        self.public_funds_labels.clear()
+        # stop streaming the rows of a previous refresh
+        if self.render_task is not None:
+            self.render_task.cancel()
+            self.render_task = None
+
+        self.release_row_boxes()
+        self.validation.check()
 
         filtered = self.filter_df()
         row_boxes = []
 
         # --- filter and sort rows ---
-        header_widgets = []
-        for col in self.COLUMNS.keys():
-            header_widgets.append(widgets.VBox(
-                [self.sort_buttons[col], self.filter_widgets[col]],
-                layout=widgets.Layout(align_items='center')))
-        header_widgets.append(widgets.Label(""))  # dummy spacer
-        row_boxes.append(widgets.HBox(
-            header_widgets, layout=widgets.Layout(padding="5px")))
+        # built only once, the same widgets are shown after every refresh
+        if self.sort_filter_row is None:
+            header_widgets = []
+            for col in self.COLUMNS.keys():
+                header_widgets.append(widgets.VBox(
+                    [self.sort_buttons[col], self.filter_widgets[col]],
+                    layout=widgets.Layout(align_items='center')))
+            header_widgets.append(widgets.Label(""))  # dummy spacer
+            self.sort_filter_row = widgets.HBox(
+                header_widgets, layout=widgets.Layout(padding="5px"))
+        row_boxes.append(self.sort_filter_row)
 
         # --- data lines ---
-        for idx, row in filtered.iterrows():
-            cells = []
-
-            for col in self.COLUMNS.keys():
-                cell = self.get_cell(idx, row, col)
-                cells.append(cell)
-
-            # delete button
-            # button_style="danger" seems to be too red...
-            # description="X🗑️❌✖✕ⓧ⊗⨯",
-            btn = widgets.Button(
-                description="✖",
-                layout=widgets.Layout(width=self.column_widths[self.ACTIONS]))
-            btn.on_click(lambda b, i=idx: self.delete_row(i))
-            btn.style.button_color = "#C76A2A"
-            btn.style.text_color = "white"
-
-            cells.append(btn)
-
-            row_boxes.append(
-                widgets.HBox(
-                    cells,
-                    layout=widgets.Layout(
-                        padding="0px 5px",
-                        flex="0 0 auto"
-                    )
-                )
-            )
+        loop = self.get_running_loop()
+        if self.grid_table is not None:
+            # the compact table gets all rows in a single message
+            self.refresh_grid_table(filtered)
+            row_boxes.append(self.grid_table)
+            remaining = filtered.iloc[0:0]
+        else:
+            # only the first page is built right away, the remaining rows
+            # are streamed in chunks so that large tables don't block the
+            # kernel
+            row_boxes.extend(
+                self.get_row_boxes(filtered.iloc[:self.FIRST_PAGE_SIZE]))
+            remaining = filtered.iloc[self.FIRST_PAGE_SIZE:]
+            if loop is None:
+                row_boxes.extend(self.get_row_boxes(remaining))
 
         # --- show everything in output_inner ---
         self.output_inner.children = row_boxes
@@ -1298,31 +2037,353 @@ class Finances:
             else:
                 self.sort_buttons[col].description = "↕"
 
-        self.update_total_vacation_costs()
-        self.update_total_acquisition_costs()
-        self.update_total_administration_costs()
-        self.update_remaining_budget()
+        self.update_totals()
+
+        if loop is not None and len(remaining) > 0:
+            self.render_task = loop.create_task(
+                self.render_remaining_rows(remaining))
+        else:
+            self.refresh_visualization()
+
+    async def render_remaining_rows(self, remaining):
+        try:
+            for start in range(0, len(remaining), self.ROW_CHUNK_SIZE):
+                # give the kernel a chance to process other messages
+                await asyncio.sleep(0)
+                with self.profiler.measure("render_remaining_rows"):
+                    chunk = remaining.iloc[start:start + self.ROW_CHUNK_SIZE]
+                    self.output_inner.children += tuple(
+                        self.get_row_boxes(chunk))
+
+            self.render_task = None
+            self.refresh_visualization()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # the task is done, the next refresh must not cancel it
+            self.render_task = None
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    # Rows are taken from the widget pool and filled with the values of
+    # their row. Only new rows create widget models.
+    def get_row_boxes(self, df):
+        row_boxes = []
+
+        for idx, row in df.iterrows():
+            box = self.widget_pool.acquire("row", self.create_row_box)
+            self.fill_row_box(box, idx, row)
+            row_boxes.append(box)
+
+        self.row_boxes.extend(row_boxes)
+        return row_boxes
+
+    def create_row_box(self):
+        cells = [self.create_cell(col) for col in self.COLUMNS.keys()]
+
+        # delete button
+        # button_style="danger" seems to be too red...
+        # description="X🗑️❌✖✕ⓧ⊗⨯",
+        btn = widgets.Button(
+            description="✖",
+            style=self.get_cell_style(
+                widgets.ButtonStyle,
+                button_color="#C76A2A",
+                text_color="white"),
+            layout=self.delete_button_layout)
+        btn.cell_idx = None
+        btn.on_click(self.handle_delete_click)
+
+        cells.append(btn)
+        return widgets.HBox(cells, layout=self.row_layout)
+
+    def fill_row_box(self, box, idx, row):
+        invalid = self.validation.get_cells(idx)
+        for cell, col in zip(box.children, self.COLUMNS.keys()):
+            cell.cell_idx = None
+            self.set_cell_value(cell, row, col)
+            self.validation.highlight(cell, invalid)
+            cell.cell_idx = idx
+            if col in self.label_columns:
+                self.label_columns[col][idx] = cell
+            else:
+                self.input_cells[(idx, col)] = cell
+        box.children[-1].cell_idx = idx
+
+    # returns the rows of the table to the widget pool
+    def release_row_boxes(self):
+        for labels in self.label_columns.values():
+            labels.clear()
+        self.input_cells.clear()
+
+        # in reverse, so that the next refresh takes every box for the
+        # same position and only sends the values that have changed
+        for box in reversed(self.row_boxes):
+            for cell in box.children:
+                cell.cell_idx = None
+            self.widget_pool.release("row", box)
+        self.row_boxes = []
+
+    def handle_delete_click(self, button):
+        if button.cell_idx is not None:
+            self.delete_row(button.cell_idx)
+
+    def toggle_grid_table(self, enabled):
+        try:
+            if enabled:
+                # anywidget is only needed for the compact table
+                from GridTable import GridTable
+                self.grid_table = GridTable(columns=self.get_grid_columns())
+                self.grid_table.on_edit(self.handle_grid_edit)
+                self.grid_table.on_delete(self.delete_row)
+            else:
+                self.grid_table.close()
+                self.grid_table = None
+            self.refresh_table()
+
+            if enabled:
+                # the rows of the widget table are not needed anymore
+                self.widget_pool.clear()
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def get_grid_columns(self):
+        types = {
+            self.NAME_KEY: "text",
+            self.ROLE_KEY: "select",
+            self.ILV_KEY: "checkbox",
+            self.HOURLY_RATE_KEY: "combo",
+            self.DATE_OF_BIRTH_KEY: "date",
+            self.EMPLOYMENT_PERCENTAGE_KEY: "number",
+            self.RESEARCH_PERCENTAGE_KEY: "number",
+            self.ACQUISITION_HOURS_KEY: "number",
+            self.IS_MANAGEMENT_KEY: "checkbox"
+        }
+        columns = []
+        for col in self.COLUMNS.keys():
+            column = {
+                "key": col,
+                "type": types.get(col, "label"),
+                "width": self.column_widths[col]
+            }
+            if col == self.ROLE_KEY:
+                column["options"] = list(self.ROLES.values())
+            elif col == self.HOURLY_RATE_KEY:
+                column["options"] = self.calculations.known_hourly_rates
+            elif col == self.ACQUISITION_HOURS_KEY:
+                column.update(min=0, max=None, step=1)
+            elif column["type"] == "number":
+                column.update(min=0, max=100, step=1)
+            columns.append(column)
+        return columns
+
+    # returns the value of an editable cell the way its widget shows it
+    def get_cell_value(self, row, col):
+        value = row.get(col)
+        if col == self.ROLE_KEY:
+            return self.ROLES.get(value, value)
+        elif col in (self.ILV_KEY, self.IS_MANAGEMENT_KEY):
+            return bool(value) if pd.notna(value) else False
+        elif col == self.HOURLY_RATE_KEY:
+            return str(value)
+        elif col == self.DATE_OF_BIRTH_KEY:
+            return value if isinstance(value, date) else None
+        elif col == self.NAME_KEY:
+            return str(value)
+        elif col in self.OPTIONAL_COLUMNS:
+            return None if pd.isna(value) else value
+        return float(value)
+
+    def get_grid_value(self, row, col):
+        if col in self.label_columns:
+            return self.get_label_text(row, col)
+
+        value = self.get_cell_value(row, col)
+        if col == self.DATE_OF_BIRTH_KEY:
+            return value.isoformat() if value is not None else None
+        return value
+
+    def refresh_grid_table(self, filtered):
+        with self.profiler.measure("refresh_grid_table"):
+            data = {col: [] for col in self.COLUMNS.keys()}
+            for idx, row in filtered.iterrows():
+                for col in self.COLUMNS.keys():
+                    data[col].append(self.get_grid_value(row, col))
+            self.grid_table.set_rows(
+                [int(idx) for idx in filtered.index], data,
+                self.validation.get_invalid())
+
+    def refresh_grid_rows(self, index):
+        if self.grid_table is None:
+            return
+
+        rows = {}
+        for idx in index:
+            if idx in self.df.index:
+                row = self.df.loc[idx]
+                rows[int(idx)] = {
+                    col: self.get_grid_value(row, col)
+                    for col in self.COLUMNS.keys()}
+        self.grid_table.update_rows(rows)
+
+    def handle_grid_edit(self, idx, col, value):
+        if col == self.DATE_OF_BIRTH_KEY:
+            value = date.fromisoformat(value) if value else None
+        self.update_cell(idx, col, value)
+
+    # updates a cell that has no widget, e.g. in the compact table
+    def update_cell(self, idx, col, value):
+        if idx not in self.df.index:
+            return
+
+        # the same kind of change the cell widgets deliver to their
+        # observers, but without an owner widget
+        old = self.get_cell_value(self.df.loc[idx], col)
+        self.handle_cell_update(
+            idx, col, Bunch(name="value", old=old, new=value, owner=None))
+
+        if col == self.IS_MANAGEMENT_KEY:
+            # the management share of all managers has changed
+            self.refresh_grid_rows(self.df.index)
+        else:
+            self.refresh_grid_rows([idx])
+        self.update_totals()
+
+    def undo(self):
+        self.replay_journal(self.journal.undo)
+
+    def redo(self):
+        self.replay_journal(self.journal.redo)
+
+    # The changes of a group, e.g. of a bulk edit or of its undo, are
+    # applied one by one. The chart, the views and the checks are refreshed
+    # once at the end.
+    @contextmanager
+    def batch_changes(self):
+        suspended = self.visualization_suspended
+        self.visualization_suspended = True
+        try:
+            with self.validation.deferred(), self.batch_labels():
+                yield
+        finally:
+            self.visualization_suspended = suspended
+
+        self.update_totals()
+        self.refresh_visualization()
+
+    def replay_journal(self, replay):
+        with self.batch_changes():
+            replay(self.apply_journal_change)
+
+    def update_undo_buttons(self):
+        self.undo_button.disabled = not self.journal.can_undo()
+        self.redo_button.disabled = not self.journal.can_redo()
+
+    def apply_journal_change(self, idx, col, value):
+        try:
+            if idx is None:
+                if col == self.allocation.FUNDING_SOURCES_PARAMETER:
+                    self.allocation.set_funding_sources(value)
+                    return
+
+                # global parameter, its observers do the recomputation
+                getattr(self, col).value = value
+                return
+
+            if idx not in self.df.index:
+                # the row has been deleted in the meantime
+                return
+
+            if col == self.ROLE_KEY:
+                value = self.ROLES.get(value, value)
+
+            cell = self.input_cells.get((idx, col))
+            if cell is not None:
+                # the observer of the cell does the recomputation
+                cell.value = value
+            else:
+                self.update_cell(idx, col, value)
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def get_running_loop(self):
+        # the loop of the kernel (ipykernel or Pyodide) is always running,
+        # plain Python scripts have none
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def run_soon(self, callback):
+        loop = self.get_running_loop()
+
+        # run after the current cell or event handler has finished, so that
+        # the widgets shown so far are already visible
+        if loop is not None:
+            loop.call_soon(callback)
+        else:
+            callback()
+
+    def load_visualization(self):
+        try:
+            with self.profiler.measure("load_visualization"):
+                from Visualization import Visualization
+                self.visualization = Visualization()
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+            # the next refresh tries again
+            self.visualization_pending = False
+            self.visualization_output.clear_output()
+            return
 
         self.refresh_visualization()
 
     def refresh_visualization(self):
+        if self.visualization_suspended:
+            return
+
+        for listener in self.refresh_listeners:
+            listener()
+
+        if self.visualization is None:
+            if not self.visualization_pending:
+                self.visualization_pending = True
+                with self.visualization_output:
+                    display(HTML("<i>" + _("Loading chart...") + "</i>"))
+                self.run_soon(self.load_visualization)
+            return
+
         try:
-            with self.visualization_output:
+            with self.profiler.measure("refresh_visualization"), \
+                    self.visualization_output:
                 self.visualization.show(self)
         except Exception:
             print(traceback.format_exc())
             with self.output:
                 print(traceback.format_exc())
 
+    def get_header_html(self, text):
+        return (
+            "<div style='text-align:center;line-height:1.0;'>"
+            f"<b>{text}</b>"
+            "</div>"
+        )
+
     def get_header_widget(self, text, widht_key):
         # output border + output padding + padding in text fields
         header_padding = "0px " + str(1 + 5 + 8) + "px"
-        return widgets.HTML(
-                value=(
-                    "<div style='text-align:center;line-height:1.0;'>"
-                    f"<b>{text}</b>"
-                    "</div>"
-                ),
+        self.header_widgets[widht_key] = widgets.HTML(
+                value=self.get_header_html(text),
                 layout=widgets.Layout(
                     width=self.column_widths[widht_key],
                     padding=header_padding,
@@ -1330,6 +2391,7 @@ class Finances:
                 ),
                 _dom_classes=["compact-header"]
             )
+        return self.header_widgets[widht_key]
 
     def show(self):
 
@@ -1345,6 +2407,10 @@ class Finances:
             .widget-text input, .widget-combobox input, input[type='number'] {
                 text-align: right !important;
             }
+            .validation-error, .validation-error input,
+            .validation-error select {
+                background-color: #F8D7DA !important;
+            }
         </style>
         """))
 
@@ -1353,7 +2419,12 @@ class Finances:
 
         # load and save buttons
         button_row = widgets.HBox(
-            [self.upload_button, self.save_button, self.download_output],
+            [self.upload_button, self.save_button, self.import_button,
+             self.export_format, self.export_button, self.download_output,
+             self.undo_button, self.redo_button,
+             self.grid_table_checkbox, self.profiling_checkbox,
+             self.export_trace_button, self.reset_trace_button,
+             self.language_dropdown],
             layout=widgets.Layout(padding="5px"))
 
         # --- column name header ---
@@ -1362,7 +2433,7 @@ class Finances:
             for col in self.COLUMNS.keys()
         ]
         header_labels.append(
-            self.get_header_widget(self.ACTIONS, self.ACTIONS)
+            self.get_header_widget(self.ACTIONS, self.ACTIONS_KEY)
         )
         header_row = widgets.HBox(
             header_labels, layout=widgets.Layout(padding="5px"))
@@ -1388,12 +2459,22 @@ class Finances:
             self.vacation_expenses,
             self.acquisition_expenses,
             self.administrative_expenses,
-            self.remaining_budget]
+            self.remaining_budget,
+            self.validation.summary]
         )
 
+        bulk_row = widgets.HBox(
+            [self.bulk_column, self.bulk_mode, self.bulk_value,
+             self.bulk_button, self.bulk_report],
+            layout=widgets.Layout(padding="0px 5px"))
+
         top_box = widgets.VBox([
             button_row,
-            widgets.HBox([parameter_box, budget_box])]
+            bulk_row,
+            self.import_report,
+            self.export_report,
+            widgets.HBox([parameter_box, budget_box]),
+            self.profiling_panel]
         )
 
         scrollable = widgets.VBox(
@@ -1416,8 +2497,19 @@ class Finances:
             )
         )
 
+        # offer restoring an autosaved budget, the autosave starts only
+        # after the decision, otherwise it would overwrite it
+        if self.autosave.exists():
+            self.autosave_label.value = _(
+                "An autosaved budget from {time} was found.").format(
+                    time=self.autosave.get_time().strftime("%Y-%m-%d %H:%M"))
+            self.autosave_box.layout.display = None
+        else:
+            self.start_autosave()
+
         # --- outer container ---
         container = widgets.VBox([
+            self.autosave_box,
             top_box,
             scroll_pane,
             self.visualization_output])
@@ -0,0 +1,261 @@
+import anywidget
+import traitlets
+
+
+class GridTable(anywidget.AnyWidget):
+    # A whole table in a single widget model. The table is sent as one
+    # columnar payload and edits come back as (row, column, value) messages,
+    # instead of one widget model (and comm channel) per cell.
+
+    _esm = """
+    function render({ model, el }) {
+        const table = document.createElement("table");
+        table.className = "grid-table";
+        const lists = document.createElement("div");
+        el.appendChild(lists);
+        el.appendChild(table);
+
+        // datalist ids must be unique in the document and free of spaces
+        const listPrefix = "grid-table-" + Math.random().toString(36).slice(2);
+
+        function send(type, row, column, value) {
+            model.send({ type: type, row: row, column: column, value: value });
+        }
+
+        function setValue(input, column, value) {
+            if (column.type === "checkbox") {
+                input.checked = Boolean(value);
+            } else if (column.type === "label") {
+                input.textContent = value;
+            } else {
+                input.value = value === null ? "" : value;
+            }
+        }
+
+        function createInput(column, row, value) {
+            let input;
+            if (column.type === "label") {
+                input = document.createElement("span");
+            } else if (column.type === "select") {
+                input = document.createElement("select");
+                for (const option of column.options) {
+                    const element = document.createElement("option");
+                    element.value = option;
+                    element.textContent = option;
+                    input.appendChild(element);
+                }
+            } else {
+                input = document.createElement("input");
+                input.type = column.type === "combo" ? "text" : column.type;
+                if (column.type === "combo") {
+                    input.setAttribute("list", listPrefix + column.index);
+                }
+                if (column.type === "number") {
+                    for (const name of ["min", "max", "step"]) {
+                        const limit = column[name];
+                        if (limit !== null && limit !== undefined) {
+                            input[name] = limit;
+                        }
+                    }
+                }
+            }
+            setValue(input, column, value);
+
+            if (column.type !== "label") {
+                input.addEventListener("change", () => {
+                    let newValue = input.value;
+                    if (column.type === "checkbox") {
+                        newValue = input.checked;
+                    } else if (column.type === "number") {
+                        newValue = Number(input.value);
+                    }
+                    send("edit", row, column.key, newValue);
+                });
+            }
+            return input;
+        }
+
+        function build() {
+            const columns = model.get("columns");
+            columns.forEach((column, index) => column.index = index);
+            const data = model.get("data");
+            const rowIds = model.get("row_ids");
+            const body = document.createElement("tbody");
+
+            lists.replaceChildren();
+            for (const column of columns) {
+                if (column.type === "combo") {
+                    const list = document.createElement("datalist");
+                    list.id = listPrefix + column.index;
+                    for (const option of column.options) {
+                        const element = document.createElement("option");
+                        element.value = option;
+                        list.appendChild(element);
+                    }
+                    lists.appendChild(list);
+                }
+            }
+
+            rowIds.forEach((row, i) => {
+                const tr = document.createElement("tr");
+                tr.dataset.row = row;
+                for (const column of columns) {
+                    const td = document.createElement("td");
+                    td.style.width = column.width;
+                    td.style.minWidth = column.width;
+                    td.style.maxWidth = column.width;
+                    td.className = "grid-table-" + column.type;
+                    td.dataset.column = column.key;
+                    td.appendChild(
+                        createInput(column, row, data[column.key][i]));
+                    tr.appendChild(td);
+                }
+                const td = document.createElement("td");
+                const button = document.createElement("button");
+                button.textContent = "✖";
+                button.className = "grid-table-delete";
+                button.addEventListener("click", () => send("delete", row));
+                td.appendChild(button);
+                tr.appendChild(td);
+                body.appendChild(tr);
+            });
+            table.replaceChildren(body);
+            markInvalid();
+        }
+
+        function markInvalid() {
+            const invalid = model.get("invalid");
+            for (const td of table.querySelectorAll("td.grid-table-invalid")) {
+                td.classList.remove("grid-table-invalid");
+            }
+            for (const [row, keys] of Object.entries(invalid)) {
+                const tr = table.querySelector(`tr[data-row="${row}"]`);
+                if (!tr) {
+                    continue;
+                }
+                for (const key of keys) {
+                    const td = tr.querySelector(
+                        `td[data-column="${CSS.escape(key)}"]`);
+                    if (td) {
+                        td.classList.add("grid-table-invalid");
+                    }
+                }
+            }
+        }
+
+        function update(rows) {
+            const columns = model.get("columns");
+            for (const [row, values] of Object.entries(rows)) {
+                const tr = table.querySelector(`tr[data-row="${row}"]`);
+                if (!tr) {
+                    continue;
+                }
+                for (const column of columns) {
+                    if (!(column.key in values)) {
+                        continue;
+                    }
+                    const td = tr.querySelector(
+                        `td[data-column="${CSS.escape(column.key)}"]`);
+                    setValue(td.firstChild, column, values[column.key]);
+                }
+            }
+        }
+
+        model.on("change:data", build);
+        model.on("change:columns", build);
+        model.on("change:invalid", markInvalid);
+        model.on("msg:custom", (msg) => {
+            if (msg.type === "update") {
+                update(msg.rows);
+            }
+        });
+        build();
+    }
+    export default { render };
+    """
+
+    _css = """
+    .grid-table {
+        border-collapse: collapse;
+        table-layout: fixed;
+        font-size: var(--jp-widgets-font-size);
+    }
+    .grid-table td {
+        padding: 1px 2px;
+        box-sizing: border-box;
+    }
+    .grid-table input, .grid-table select {
+        width: 100%;
+        box-sizing: border-box;
+    }
+    .grid-table input[type="checkbox"] {
+        width: auto;
+    }
+    .grid-table-label, .grid-table-number, .grid-table-combo input {
+        text-align: right;
+    }
+    .grid-table-invalid, .grid-table-invalid input,
+    .grid-table-invalid select {
+        background-color: #F8D7DA;
+    }
+    .grid-table-delete {
+        width: 100%;
+        background-color: #C76A2A;
+        color: white;
+        border: none;
+    }
+    """
+
+    # list of {"key", "type", "width"} and "options", "min", "max", "step"
+    # where needed, type is one of label, text, number, checkbox, date,
+    # select or combo
+    columns = traitlets.List().tag(sync=True)
+
+    # column key -> list of values, in the order of row_ids
+    data = traitlets.Dict().tag(sync=True)
+    row_ids = traitlets.List().tag(sync=True)
+
+    # row id -> keys of the highlighted columns, e.g. inconsistent values
+    invalid = traitlets.Dict().tag(sync=True)
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.edit_callbacks = []
+        self.delete_callbacks = []
+        self.on_msg(self._handle_message)
+
+    def on_edit(self, callback):
+        self.edit_callbacks.append(callback)
+
+    def on_delete(self, callback):
+        self.delete_callbacks.append(callback)
+
+    def set_rows(self, row_ids, data, invalid=None):
+        # row_ids first, so that the front end rebuilds only once
+        with self.hold_sync():
+            self.row_ids = row_ids
+            self.invalid = invalid or {}
+            self.data = data
+
+    def update_rows(self, rows):
+        # rows: row id -> {column key -> value}
+        if not rows:
+            return
+
+        positions = {row: i for i, row in enumerate(self.row_ids)}
+        for row, values in rows.items():
+            if row in positions:
+                for key, value in values.items():
+                    self.data[key][positions[row]] = value
+
+        # only the changed values are sent, the data trait is updated
+        # silently so that new views still show the current values
+        self.send({"type": "update", "rows": rows})
+
+    def _handle_message(self, widget, content, buffers):
+        if content.get("type") == "edit":
+            for callback in self.edit_callbacks:
+                callback(content["row"], content["column"], content["value"])
+        elif content.get("type") == "delete":
+            for callback in self.delete_callbacks:
+                callback(content["row"])
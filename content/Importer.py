@@ -0,0 +1,326 @@
+from Language import _
+import html
+import io
+import pandas as pd
+
+
+class Importer:
+    # Imports employees from CSV or Excel exports, e.g. of an HR system.
+    # All validations and calculations work on whole columns, so importing
+    # hundreds of employees costs about the same as importing a single one.
+
+    def __init__(self, finances) -> None:
+        self.finances = finances
+        self.calculations = finances.calculations
+
+        # columns that can be imported, all other columns are calculated
+        self.INPUT_COLUMNS = [
+            finances.NAME_KEY,
+            finances.ROLE_KEY,
+            finances.ILV_KEY,
+            finances.HOURLY_RATE_KEY,
+            finances.DATE_OF_BIRTH_KEY,
+            finances.EMPLOYMENT_PERCENTAGE_KEY,
+            finances.RESEARCH_PERCENTAGE_KEY,
+            finances.ACQUISITION_HOURS_KEY,
+            finances.IS_MANAGEMENT_KEY
+        ]
+
+        # normalized column name in the file -> column key
+        # (the column keys and the translated column headers are always
+        # recognized, see get_column_mapping())
+        self.COLUMN_ALIASES = {
+            "employee": finances.NAME_KEY,
+            "full name": finances.NAME_KEY,
+            "mitarbeiter": finances.NAME_KEY,
+            "mitarbeiterin": finances.NAME_KEY,
+            "function": finances.ROLE_KEY,
+            "funktion": finances.ROLE_KEY,
+            "position": finances.ROLE_KEY,
+            "rolle": finances.ROLE_KEY,
+            "hourly rate": finances.HOURLY_RATE_KEY,
+            "rate": finances.HOURLY_RATE_KEY,
+            "stundensatz": finances.HOURLY_RATE_KEY,
+            "stundensatz (chf)": finances.HOURLY_RATE_KEY,
+            "birthdate": finances.DATE_OF_BIRTH_KEY,
+            "birth date": finances.DATE_OF_BIRTH_KEY,
+            "dob": finances.DATE_OF_BIRTH_KEY,
+            "geburtsdatum": finances.DATE_OF_BIRTH_KEY,
+            "employment": finances.EMPLOYMENT_PERCENTAGE_KEY,
+            "fte (%)": finances.EMPLOYMENT_PERCENTAGE_KEY,
+            "pensum": finances.EMPLOYMENT_PERCENTAGE_KEY,
+            "pensum (%)": finances.EMPLOYMENT_PERCENTAGE_KEY,
+            "beschäftigungsgrad": finances.EMPLOYMENT_PERCENTAGE_KEY,
+            "beschäftigungsgrad (%)": finances.EMPLOYMENT_PERCENTAGE_KEY,
+            "research": finances.RESEARCH_PERCENTAGE_KEY,
+            "forschung (%)": finances.RESEARCH_PERCENTAGE_KEY,
+            "acquisition": finances.ACQUISITION_HOURS_KEY,
+            "akquisition (h)": finances.ACQUISITION_HOURS_KEY,
+            "management": finances.IS_MANAGEMENT_KEY,
+            "führung": finances.IS_MANAGEMENT_KEY,
+            "leitung": finances.IS_MANAGEMENT_KEY,
+            "step": finances.STEP_KEY,
+            "stufe": finances.STEP_KEY,
+            "lohnstufe": finances.STEP_KEY
+        }
+
+        self.TRUE_VALUES = {"true", "yes", "y", "x", "1", "1.0", "ja", "j"}
+        self.FALSE_VALUES = {"false", "no", "n", "0", "0.0", "nein", ""}
+
+        # the line of the first data row in a file with a header line
+        self.FIRST_LINE = 2
+
+    def import_file(self, content, file_name, existing_names=()):
+        # returns the valid rows and a report of the rejected values
+        df = self.read(content, file_name)
+        df = df.rename(columns=self.get_column_mapping(df.columns))
+        df = df.loc[:, ~df.columns.duplicated()]
+
+        # e.g. empty lines at the end of an Excel sheet
+        df = df[(df != "").any(axis=1)]
+        return self.validate(df, existing_names)
+
+    def read(self, content, file_name):
+        # everything is read as text, the columns are converted by
+        # validate() so that all files follow the same rules
+        data = io.BytesIO(bytes(content))
+        if file_name.lower().endswith((".xlsx", ".xlsm")):
+            # needs openpyxl, which is not part of the default installation
+            return pd.read_excel(data, dtype=str, keep_default_na=False)
+
+        # sniffs the delimiter, e.g. ";" in Swiss Excel exports
+        return pd.read_csv(
+            data, dtype=str, keep_default_na=False, sep=None,
+            engine="python", encoding="utf-8-sig")
+
+    def get_column_mapping(self, columns):
+        finances = self.finances
+        known = dict(self.COLUMN_ALIASES)
+        for key in self.INPUT_COLUMNS:
+            known[self.normalize(key)] = key
+            known[self.normalize(finances.COLUMNS[key])] = key
+
+        mapping = {}
+        for column in columns:
+            key = known.get(self.normalize(column))
+            if key is not None:
+                mapping[column] = key
+        return mapping
+
+    def normalize(self, column):
+        return " ".join(
+            str(column).replace("<br>", " ").strip().lower().split())
+
+    # ISO dates (e.g. of the exports) and the Swiss day first format, NaT
+    # for anything else. The ISO dates are parsed explicitly, the day first
+    # rule of a mixed format would swap day and month of 1980-07-01.
+    def parse_dates(self, text):
+        parsed = pd.to_datetime(text, errors="coerce", format="ISO8601")
+        missing = parsed.isna()
+        if missing.any():
+            parsed[missing] = pd.to_datetime(
+                text[missing], errors="coerce", format="%d.%m.%Y")
+        return parsed
+
+    def validate(self, df, existing_names=()):
+        finances = self.finances
+        errors = []
+        result = pd.DataFrame(index=df.index)
+
+        def column(key):
+            if key in df.columns:
+                return df[key].astype(str).str.strip()
+            return pd.Series("", index=df.index)
+
+        def reject(key, text, invalid, message):
+            for idx, value in text[invalid].items():
+                errors.append({
+                    "line": idx + self.FIRST_LINE,
+                    "column": key,
+                    "value": value,
+                    "message": message
+                })
+
+        names = column(finances.NAME_KEY)
+        reject(finances.NAME_KEY, names, names == "", _("missing name"))
+
+        # the visualization needs unique names
+        reject(
+            finances.NAME_KEY, names,
+            (names != "") & (
+                names.duplicated() | names.isin(list(existing_names))),
+            _("duplicate name"))
+        result[finances.NAME_KEY] = names
+
+        # untranslated and translated roles are accepted
+        roles = column(finances.ROLE_KEY)
+        known_roles = {}
+        for role, translation in finances.ROLES.items():
+            known_roles[role.lower()] = role
+            known_roles[translation.lower()] = role
+        result[finances.ROLE_KEY] = roles.str.lower().map(known_roles)
+        result.loc[roles == "", finances.ROLE_KEY] = (
+            finances.REVERSED_ROLES[finances.DEFAULT_ROLE])
+        reject(
+            finances.ROLE_KEY, roles, result[finances.ROLE_KEY].isna(),
+            _("unknown role"))
+
+        # the same rules as Calculations.get_int(), but invalid and negative
+        # rates are reported instead of silently replaced by 0
+        rates = column(finances.HOURLY_RATE_KEY)
+        valid_rates = rates.str.fullmatch(r"[+-]?\d+(\.0*)?")
+        reject(
+            finances.HOURLY_RATE_KEY, rates, ~valid_rates & (rates != ""),
+            _("not a whole number"))
+        numbers = pd.to_numeric(rates.where(valid_rates), errors="coerce")
+        reject(
+            finances.HOURLY_RATE_KEY, rates, numbers < 0,
+            _("negative rate"))
+        result[finances.HOURLY_RATE_KEY] = (
+            numbers.where(numbers >= 0).fillna(0).astype(int))
+
+        # ISO dates and the Swiss day first format, e.g. 31.12.1980
+        birthdates = column(finances.DATE_OF_BIRTH_KEY)
+        parsed = self.parse_dates(birthdates)
+        reject(
+            finances.DATE_OF_BIRTH_KEY, birthdates,
+            parsed.isna() & (birthdates != ""), _("not a date"))
+        result[finances.DATE_OF_BIRTH_KEY] = pd.Series(
+            parsed.dt.date, index=df.index, dtype=object).where(
+                parsed.notna(), None)
+
+        for key in (finances.EMPLOYMENT_PERCENTAGE_KEY,
+                    finances.RESEARCH_PERCENTAGE_KEY):
+            text = column(key)
+            values = pd.to_numeric(
+                text.str.rstrip("%").str.strip(), errors="coerce")
+            reject(
+                key, text, values.isna() & (text != ""),
+                _("not a number"))
+            reject(
+                key, text, (values < 0) | (values > 100),
+                _("not between 0 and 100"))
+            result[key] = values.fillna(0.0).astype(float)
+
+        text = column(finances.ACQUISITION_HOURS_KEY)
+        values = pd.to_numeric(text, errors="coerce")
+        reject(
+            finances.ACQUISITION_HOURS_KEY, text,
+            values.isna() & (text != ""), _("not a number"))
+        reject(
+            finances.ACQUISITION_HOURS_KEY, text, values < 0, _("negative"))
+        result[finances.ACQUISITION_HOURS_KEY] = (
+            values.fillna(0.0).astype(float))
+
+        for key in (finances.ILV_KEY, finances.IS_MANAGEMENT_KEY):
+            text = column(key).str.lower()
+            reject(
+                key, text,
+                ~text.isin(self.TRUE_VALUES | self.FALSE_VALUES),
+                _("not yes or no"))
+            result[key] = text.isin(self.TRUE_VALUES)
+
+        # optional, the hourly rate then comes from the rate card
+        if finances.STEP_KEY in df.columns:
+            text = column(finances.STEP_KEY)
+            valid = text.str.fullmatch(r"\d+(\.0*)?")
+            reject(
+                finances.STEP_KEY, text, ~valid & (text != ""),
+                _("not a whole number"))
+            steps = pd.to_numeric(text.where(valid), errors="coerce")
+            result[finances.STEP_KEY] = pd.Series(
+                [int(step) if step > 0 else None for step in steps.fillna(0)],
+                index=df.index, dtype=object)
+
+        report = pd.DataFrame(
+            errors, columns=["line", "column", "value", "message"])
+        bad_rows = report["line"] - self.FIRST_LINE
+        result = result.drop(index=bad_rows.unique())
+
+        return result.reset_index(drop=True), report.sort_values(
+            "line", kind="stable", ignore_index=True)
+
+    def compute_columns(self, df, year, annual_working_time,
+                        administration_percentage, vacation_days=None):
+        # vectorized version of the calculations in Finances.add_row(),
+        # the management costs depend on all rows, see
+        # compute_management_costs()
+        finances = self.finances
+        hours_per_day = self.calculations.HOURS_PER_DAY
+
+        # existing rows keep their vacation days, see
+        # Finances.recompute_chunk()
+        if vacation_days is None:
+            vacation_days = pd.Series(
+                self.calculations.vacation_days_for(
+                    df[finances.DATE_OF_BIRTH_KEY], year),
+                index=df.index)
+
+        # the columns of Finances.df are object columns
+        employment = df[finances.EMPLOYMENT_PERCENTAGE_KEY].astype(float)
+        hourly_rate = pd.to_numeric(
+            df[finances.HOURLY_RATE_KEY], errors="coerce").fillna(0.0)
+        is_ilv = df[finances.ILV_KEY].fillna(False).astype(bool)
+        is_management = df[finances.IS_MANAGEMENT_KEY].fillna(False).astype(
+            bool)
+        annual_working_hours = (
+            (annual_working_time - vacation_days * hours_per_day) *
+            employment / 100)
+        annual_vacation_hours = (
+            vacation_days * hours_per_day * employment / 100)
+        administration_hours = (
+            annual_working_hours * administration_percentage / 100).where(
+                ~is_management, 0.0)
+
+        df = df.copy()
+        df[finances.VACATION_DAYS_KEY] = vacation_days
+        df[finances.ANNUAL_WORKING_HOURS_KEY] = annual_working_hours
+        df[finances.ANNUAL_VACATION_HOURS_KEY] = annual_vacation_hours
+        df[finances.VACATION_COSTS_KEY] = (
+            hourly_rate * annual_vacation_hours).where(~is_ilv, 0.0)
+        df[finances.RESEARCH_HOURS_KEY] = (
+            annual_working_hours *
+            df[finances.RESEARCH_PERCENTAGE_KEY].astype(float) / 100)
+        df[finances.ACQUISITION_COSTS_KEY] = (
+            hourly_rate * df[finances.ACQUISITION_HOURS_KEY].astype(float))
+        df[finances.MANAGEMENT_COSTS_KEY] = 0.0
+        df[finances.ADMINISTRATION_HOURS_KEY] = administration_hours
+        df[finances.ADMINISTRATION_COSTS_KEY] = (
+            hourly_rate * administration_hours)
+        df[finances.PUBLIC_FUNDS_KEY] = 0.0
+        return df[list(finances.COLUMNS.keys()) + [
+            col for col in finances.OPTIONAL_COLUMNS if col in df.columns]]
+
+    def compute_management_costs(self, df, management_allowance):
+        # the allowance is spread evenly over all managers, like
+        # Calculations.get_management_share()
+        finances = self.finances
+        is_management = df[finances.IS_MANAGEMENT_KEY].fillna(False).astype(
+            bool)
+        managers = is_management.sum()
+
+        df[finances.MANAGEMENT_COSTS_KEY] = (
+            management_allowance / managers if managers else 0.0)
+        df.loc[~is_management, finances.MANAGEMENT_COSTS_KEY] = 0.0
+        df[finances.PUBLIC_FUNDS_KEY] = (
+            df[finances.VACATION_COSTS_KEY].astype(float) +
+            df[finances.ACQUISITION_COSTS_KEY].astype(float) +
+            df[finances.MANAGEMENT_COSTS_KEY].astype(float) +
+            df[finances.ADMINISTRATION_COSTS_KEY].astype(float))
+
+    def to_html(self, report, limit=20):
+        rows = "".join(
+            "<tr>"
+            f"<td>{row.line}</td>"
+            f"<td>{row.column}</td>"
+            f"<td>{html.escape(str(row.value))}</td>"
+            f"<td>{row.message}</td>"
+            "</tr>"
+            for row in report.head(limit).itertuples()
+        )
+        return (
+            "<table style='font-size:11px'>"
+            "<tr><th>" + _("Line") + "</th><th>" + _("Column") + "</th>"
+            "<th>" + _("Value") + "</th><th>" + _("Problem") + "</th></tr>" +
+            f"{rows}</table>"
+        )
@@ -0,0 +1,124 @@
+from collections import deque
+from contextlib import contextmanager
+import time
+
+
+class Journal:
+
+    def __init__(self) -> None:
+        # the number of transactions that can be undone
+        self.MAX_TRANSACTIONS = 1000
+
+        # consecutive changes of the same cell within this time span are
+        # merged into one record, e.g. while a slider is dragged
+        self.MERGE_SECONDS = 1.0
+
+        # A transaction is a tuple of (row, column, old, new) records.
+        # Global parameters use None as row.
+        self.undo_stack = deque(maxlen=self.MAX_TRANSACTIONS)
+        self.redo_stack = []
+
+        self.transaction = None
+        self.depth = 0
+        self.replaying = False
+        self.mergeable = False
+        self.last_record_time = 0.0
+        self.listeners = []
+
+    @contextmanager
+    def group(self):
+        # all records within this context are undone and redone together
+        self.depth += 1
+        if self.depth == 1:
+            self.transaction = []
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                records = self.transaction
+                self.transaction = None
+                if records:
+                    self._push(tuple(records), mergeable=False)
+
+    def record(self, row, column, old, new):
+        if self.replaying or old == new:
+            return
+
+        record = (row, column, old, new)
+
+        if self.transaction is not None:
+            self.transaction.append(record)
+            return
+
+        now = time.monotonic()
+        if (self.mergeable and self.undo_stack and
+                now - self.last_record_time < self.MERGE_SECONDS):
+            last_row, last_column, first_old, _ = self.undo_stack[-1][0]
+            if (last_row, last_column) == (row, column):
+                self.last_record_time = now
+                self.undo_stack.pop()
+                if first_old != new:
+                    self.undo_stack.append(((row, column, first_old, new),))
+                else:
+                    # e.g. an invalid input that was reverted
+                    self.mergeable = False
+                self._notify()
+                return
+
+        self.last_record_time = now
+        self._push((record,), mergeable=True)
+
+    def undo(self, apply):
+        if not self.undo_stack:
+            return False
+
+        records = self.undo_stack.pop()
+        self.redo_stack.append(records)
+        self._replay(
+            apply,
+            [(row, column, old) for row, column, old, _ in reversed(records)])
+        return True
+
+    def redo(self, apply):
+        if not self.redo_stack:
+            return False
+
+        records = self.redo_stack.pop()
+        self.undo_stack.append(records)
+        self._replay(
+            apply, [(row, column, new) for row, column, _, new in records])
+        return True
+
+    def can_undo(self):
+        return len(self.undo_stack) > 0
+
+    def can_redo(self):
+        return len(self.redo_stack) > 0
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.mergeable = False
+        self._notify()
+
+    def _push(self, records, mergeable):
+        self.undo_stack.append(records)
+        self.redo_stack.clear()
+        self.mergeable = mergeable
+        self._notify()
+
+    def _replay(self, apply, changes):
+        # changes applied here must not be recorded again
+        self.replaying = True
+        try:
+            for row, column, value in changes:
+                apply(row, column, value)
+        finally:
+            self.replaying = False
+            self.mergeable = False
+            self._notify()
+
+    def _notify(self):
+        for listener in self.listeners:
+            listener()
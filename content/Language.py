@@ -0,0 +1,43 @@
+import gettext
+import os
+
+# The catalog of the current language. All modules translate with _() of
+# this module, so that a language switch applies to every text that is
+# translated afterwards.
+
+DOMAIN = "finances"
+DIRECTORY = "translations"
+
+# language code -> name of the language in this language
+LANGUAGES = {
+    "en": "English",
+    "de": "Deutsch"
+}
+
+# the initial language comes from the environment (LANGUAGE, LANG, ...),
+# the catalog path ends with <language>/LC_MESSAGES/<domain>.mo and the
+# untranslated texts are English
+_path = gettext.find(DOMAIN, DIRECTORY)
+_language = _path.split(os.sep)[-3] if _path else "en"
+_translation = gettext.translation(DOMAIN, DIRECTORY, fallback=True)
+
+
+def _(message):
+    return _translation.gettext(message)
+
+
+# marks a message for xgettext that is translated later with _(), e.g. in
+# a dict of messages
+def N_(message):
+    return message
+
+
+def get_language():
+    return _language
+
+
+def set_language(language):
+    global _language, _translation
+    _language = language
+    _translation = gettext.translation(
+        DOMAIN, DIRECTORY, languages=[language], fallback=True)
@@ -0,0 +1,113 @@
+from collections import deque
+from contextlib import contextmanager
+from Language import _
+import functools
+import time
+
+
+def profiled(name):
+    # measures a Finances method with the profiler of its instance
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.profiler.measure(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Profiler:
+
+    def __init__(self) -> None:
+        self.enabled = False
+
+        # the number of trace events we keep for exporting
+        self.MAX_EVENTS = 10000
+
+        # name -> [calls, total seconds, max seconds]
+        self.records = {}
+        self.events = deque(maxlen=self.MAX_EVENTS)
+        self.depth = 0
+        self.listeners = []
+
+    @contextmanager
+    def measure(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.depth -= 1
+            self.record(name, duration, start)
+
+            # only notify once per top level call, otherwise the listeners
+            # would add their own costs to every nested measurement
+            if self.depth == 0:
+                for listener in self.listeners:
+                    listener()
+
+    def record(self, name, duration, start=None):
+        record = self.records.setdefault(name, [0, 0.0, 0.0])
+        record[0] += 1
+        record[1] += duration
+        record[2] = max(record[2], duration)
+        self.events.append((
+            name,
+            time.perf_counter() - duration if start is None else start,
+            duration,
+            self.depth))
+
+    def reset(self):
+        self.records.clear()
+        self.events.clear()
+
+    def get_summary(self):
+        # sorted by total time, most expensive first
+        rows = [
+            {
+                "name": name,
+                "calls": calls,
+                "total_ms": total * 1000,
+                "mean_ms": total * 1000 / calls,
+                "max_ms": maximum * 1000
+            }
+            for name, (calls, total, maximum) in self.records.items()
+        ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def get_trace(self):
+        return {
+            "summary": self.get_summary(),
+            "events": [
+                {
+                    "name": name,
+                    "start": start,
+                    "duration_ms": duration * 1000,
+                    "depth": depth
+                }
+                for name, start, duration, depth in self.events
+            ]
+        }
+
+    def to_html(self, limit=15):
+        rows = "".join(
+            "<tr>"
+            f"<td style='text-align:left'>{row['name']}</td>"
+            f"<td>{row['calls']}</td>"
+            f"<td>{row['total_ms']:,.1f}</td>"
+            f"<td>{row['mean_ms']:,.2f}</td>"
+            f"<td>{row['max_ms']:,.1f}</td>"
+            "</tr>"
+            for row in self.get_summary()[:limit]
+        )
+        return (
+            "<table style='font-size:11px;text-align:right'>"
+            "<tr><th></th><th>" + _("calls") + "</th><th>" +
+            _("total (ms)") + "</th><th>" + _("mean (ms)") + "</th><th>" +
+            _("max (ms)") + f"</th></tr>{rows}</table>"
+        )
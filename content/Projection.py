@@ -0,0 +1,419 @@
+from IPython.display import clear_output, display, HTML
+from Language import _
+import ipywidgets as widgets
+import numpy as np
+import pandas as pd
+import re
+import traceback
+
+
+class Projection:
+    # Spreads the annual costs of the employees over the months of the
+    # year. Contracts may start or end during the year and the employment
+    # may change at given dates. Both are computed for all employees at
+    # once as a months × employees matrix of the effective employment,
+    # which scales the annual costs of every employee. The totals of the
+    # budget panel are scaled the same way, see get_factors().
+
+    def __init__(self, finances) -> None:
+        self.finances = finances
+        self.MONTHS = 12
+
+        # employment changes are written like "2026-07-01: 60, 2026-10-01: 80"
+        self.CHANGE_PATTERN = r"(\d{4}-\d{2}-\d{2})\s*:\s*(\d+(?:\.\d*)?)"
+
+        self.BUDGET_COLOR = "#3C8D5A"
+        self.PLAN_COLOR = "#9E9E9E"
+        self.COSTS_COLOR = "#C76A2A"
+
+        # seconds without a change before the chart is rebuilt, plotly
+        # takes much longer than the computation of the months
+        self.CHART_DELAY = 0.5
+
+        self.employee_dropdown = widgets.Dropdown()
+        self.employee_dropdown.observe(
+            lambda change: self.show_employee(), names="value")
+        self.start_date = widgets.DatePicker()
+        self.end_date = widgets.DatePicker()
+        self.changes_text = widgets.Text(
+            placeholder="2026-07-01: 60, 2026-10-01: 80",
+            style={"description_width": "150px"},
+            layout=widgets.Layout(width="450px"))
+        self.apply_button = widgets.Button()
+        self.apply_button.on_click(lambda b: self.apply_employee())
+        self.message = widgets.HTML()
+
+        self.totals = widgets.HTML()
+        self.output = widgets.Output()
+        self.chart_output = widgets.Output()
+
+        # the months shown by the chart and its scheduled rebuild
+        self.chart_data = None
+        self.chart_handle = None
+
+        # nothing is computed before the projection is shown
+        self.shown = False
+        finances.refresh_listeners.append(self.refresh)
+        finances.translation_listeners.append(self.translate)
+        self.translate()
+
+    # sets the texts of the widgets, again after every language switch
+    def translate(self):
+        self.employee_dropdown.description = _("Employee")
+        self.start_date.description = _("Start Date")
+        self.end_date.description = _("End Date")
+        self.changes_text.description = _("Employment Changes")
+        self.apply_button.description = _("Apply")
+        self.message.value = ""
+
+    def get_months(self, year):
+        return np.arange(
+            f"{year:04d}-01", f"{year + 1:04d}-01", dtype="datetime64[M]")
+
+    def get_dates(self, values, default):
+        # missing dates are replaced by the default, e.g. the first day of
+        # the year for the start of a contract
+        dates = pd.to_datetime(pd.Series(values), errors="coerce")
+        return dates.fillna(pd.Timestamp(default)).to_numpy().astype(
+            "datetime64[D]")
+
+    def get_overlap(self, first, last, start, end):
+        # share of the days from first to last (months) between start and
+        # end (employees or changes), the end days are excluded
+        overlap = (np.minimum(last[:, None], end[None, :]) -
+                   np.maximum(first[:, None], start[None, :]))
+        days = (last - first).astype(float)
+        return np.clip(overlap.astype(float), 0, None) / days[:, None]
+
+    def get_changes(self, df):
+        # one row per employment change with the position of its employee
+        finances = self.finances
+        if finances.EMPLOYMENT_CHANGES_KEY not in df.columns:
+            return pd.DataFrame(columns=["position", "date", "employment"])
+
+        texts = pd.Series(
+            df[finances.EMPLOYMENT_CHANGES_KEY].to_numpy(), dtype=object)
+        changes = texts.where(texts.notna(), "").astype(str).str.extractall(
+            self.CHANGE_PATTERN)
+        changes = pd.DataFrame({
+            "position": changes.index.get_level_values(0),
+            "date": pd.to_datetime(changes[0], errors="coerce").to_numpy(),
+            "employment": changes[1].astype(float).to_numpy()
+        }).dropna()
+        return changes.sort_values(["position", "date"], ignore_index=True)
+
+    def get_employment(self, df, year):
+        # months × employees matrix of the employment (%), a change is in
+        # effect from its date until the next change of the same employee
+        finances = self.finances
+        months = self.get_months(year)
+        first = months.astype("datetime64[D]")
+        last = (months + 1).astype("datetime64[D]")
+
+        nominal = pd.to_numeric(
+            df[finances.EMPLOYMENT_PERCENTAGE_KEY],
+            errors="coerce").fillna(0.0).to_numpy()
+        employment = np.tile(nominal, (self.MONTHS, 1))
+
+        changes = self.get_changes(df)
+        if len(changes) > 0:
+            position = changes["position"].to_numpy()
+            start = changes["date"].to_numpy().astype("datetime64[D]")
+            end = np.roll(start, -1)
+            # the last change of an employee lasts beyond the year
+            last_change = np.append(position[1:] != position[:-1], True)
+            end[last_change] = last[-1]
+
+            shares = self.get_overlap(first, last, start, end)
+            np.add.at(
+                employment, (slice(None), position),
+                shares * (changes["employment"].to_numpy() -
+                          nominal[position]))
+        return employment
+
+    def get_activity(self, df, year):
+        # months × employees matrix of the share of the days within the
+        # contract
+        finances = self.finances
+        months = self.get_months(year)
+        first = months.astype("datetime64[D]")
+        last = (months + 1).astype("datetime64[D]")
+
+        start = self.get_dates(
+            df.get(finances.START_DATE_KEY, pd.Series(index=df.index)),
+            first[0])
+        end = self.get_dates(
+            df.get(finances.END_DATE_KEY, pd.Series(index=df.index)),
+            last[-1] - 1) + 1
+        return self.get_overlap(first, last, start, end)
+
+    def get_column(self, df, key):
+        return pd.to_numeric(df[key], errors="coerce").fillna(0.0).to_numpy()
+
+    def get_variable_costs(self, df):
+        # annual costs per employee that depend on the working time
+        finances = self.finances
+        return (
+            self.get_column(df, finances.VACATION_COSTS_KEY) +
+            self.get_column(df, finances.ACQUISITION_COSTS_KEY) +
+            self.get_column(df, finances.ADMINISTRATION_COSTS_KEY))
+
+    def get_monthly_factors(self, df, year):
+        # months × employees matrix of the effective employment relative
+        # to the employment of the table
+        nominal = self.get_column(df, self.finances.EMPLOYMENT_PERCENTAGE_KEY)
+        employment = self.get_employment(df, year)
+        factors = np.divide(
+            employment, nominal, out=np.zeros_like(employment),
+            where=nominal > 0)
+        return factors * self.get_activity(df, year)
+
+    def has_dates(self, df):
+        finances = self.finances
+        for key in (finances.START_DATE_KEY, finances.END_DATE_KEY,
+                    finances.EMPLOYMENT_CHANGES_KEY):
+            if key in df.columns:
+                values = df[key]
+                if (values.notna() & (values.astype(str) != "")).any():
+                    return True
+        return False
+
+    def get_factors(self, df, year):
+        # share of the annual costs of every employee that depend on the
+        # working time, e.g. 0.5 for a contract starting in July, the
+        # totals of the budget panel are multiplied by it
+        if not self.has_dates(df):
+            return 1.0
+
+        return self.get_monthly_factors(df, year).mean(axis=0)
+
+    def get_category_costs(self, df, year, weights=None):
+        # employees × cost columns summed up over the months, every month
+        # weighted, e.g. with the share of the month until a date
+        finances = self.finances
+        if weights is None:
+            weights = np.ones(self.MONTHS)
+
+        shares = self.get_monthly_factors(df, year).T @ weights / self.MONTHS
+        keys = [finances.VACATION_COSTS_KEY, finances.ACQUISITION_COSTS_KEY,
+                finances.ADMINISTRATION_COSTS_KEY]
+        costs = df[keys + [finances.MANAGEMENT_COSTS_KEY]].apply(
+            pd.to_numeric, errors="coerce").fillna(0.0)
+        costs[keys] = costs[keys].mul(shares, axis=0)
+        costs[finances.MANAGEMENT_COSTS_KEY] *= weights.sum() / self.MONTHS
+        return costs
+
+    def get_monthly_costs(self, df, year):
+        # months × employees matrix of the costs, the costs that depend on
+        # the working time are scaled by the effective employment, the
+        # management share is paid every month
+        return (
+            self.get_monthly_factors(df, year) *
+            self.get_variable_costs(df) / self.MONTHS +
+            self.get_column(df, self.finances.MANAGEMENT_COSTS_KEY) /
+            self.MONTHS)
+
+    def get_burn_down(self):
+        # one row per month with the costs and the remaining budget
+        finances = self.finances
+        year = int(finances.year.value)
+        costs = self.get_monthly_costs(finances.df, year).sum(axis=1)
+        costs += finances.budgeted_sick_leave.value / self.MONTHS
+
+        total_budget = finances.total_budget.value
+        planned = total_budget - finances.remaining_budget.value
+        months = self.get_months(year)
+        return pd.DataFrame({
+            "month": months.astype("datetime64[D]"),
+            "costs": costs,
+            "remaining": total_budget - costs.cumsum(),
+            "plan": total_budget - planned * np.arange(
+                1, self.MONTHS + 1) / self.MONTHS
+        })
+
+    def refresh(self):
+        if not self.shown:
+            return
+
+        try:
+            self.refresh_employees()
+            burn_down = self.get_burn_down()
+            self.show_totals(burn_down)
+
+            # edits that change no month, e.g. of a name, keep the chart
+            if (self.chart_data is not None and
+                    burn_down.equals(self.chart_data)):
+                return
+            self.chart_data = burn_down
+            self.schedule_chart()
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def schedule_chart(self):
+        # the chart is rebuilt once after a series of edits
+        if self.chart_handle is not None:
+            self.chart_handle.cancel()
+            self.chart_handle = None
+
+        loop = self.finances.get_running_loop()
+        if loop is None:
+            self.draw_chart()
+        else:
+            self.chart_handle = loop.call_later(
+                self.CHART_DELAY, self.draw_chart)
+
+    def draw_chart(self):
+        self.chart_handle = None
+        try:
+            self.refresh_chart(self.chart_data)
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def show_totals(self, burn_down):
+        finances = self.finances
+        projected = burn_down["costs"].sum()
+        full_year = (
+            self.get_variable_costs(finances.df).sum() +
+            self.get_column(finances.df, finances.MANAGEMENT_COSTS_KEY).sum() +
+            finances.budgeted_sick_leave.value)
+        summary = {
+            _("Costs for a Full Year (CHF)"): full_year,
+            _("Projected Costs (CHF)"): projected,
+            _("Projected Remaining Budget (CHF)"):
+                burn_down["remaining"].iloc[-1]
+        }
+        self.totals.value = (
+            "<table style='text-align:right'>" +
+            "".join(
+                f"<tr><td style='text-align:left'>{name}</td>"
+                f"<td>{value:,.2f}</td></tr>"
+                for name, value in summary.items()) +
+            "</table>"
+        )
+
+    def refresh_chart(self, burn_down):
+        # imported here like in Visualization, plotly is expensive
+        import plotly.graph_objects as go
+
+        months = burn_down["month"].dt.strftime("%Y-%m")
+        fig = go.Figure([
+            go.Bar(
+                x=months, y=burn_down["costs"], name=_("Monthly Costs"),
+                marker_color=self.COSTS_COLOR,
+                hovertemplate="CHF %{y:,.2f}<extra></extra>"),
+            go.Scatter(
+                x=months, y=burn_down["remaining"],
+                name=_("Remaining Budget"), mode="lines+markers",
+                line=dict(color=self.BUDGET_COLOR),
+                hovertemplate="CHF %{y:,.2f}<extra></extra>"),
+            go.Scatter(
+                x=months, y=burn_down["plan"],
+                name=_("Remaining Budget (Plan)"), mode="lines",
+                line=dict(color=self.PLAN_COLOR, dash="dash"),
+                hovertemplate="CHF %{y:,.2f}<extra></extra>")
+        ])
+        fig.update_layout(
+            title_text="<b>" + _("Budget Burn-Down") + "</b>",
+            height=500, font_size=11,
+            margin=dict(t=80, b=40, l=0, r=0))
+
+        with self.chart_output:
+            clear_output(wait=True)
+            display(HTML(fig.to_html(include_plotlyjs='cdn')))
+
+    def refresh_employees(self):
+        finances = self.finances
+        options = [
+            (str(name), idx)
+            for idx, name in finances.df[finances.NAME_KEY].items()]
+        if list(self.employee_dropdown.options) != options:
+            value = self.employee_dropdown.value
+            self.employee_dropdown.options = options
+            if value in finances.df.index:
+                self.employee_dropdown.value = value
+
+    def show_employee(self):
+        finances = self.finances
+        idx = self.employee_dropdown.value
+        if idx is None or idx not in finances.df.index:
+            return
+
+        row = finances.df.loc[idx]
+
+        def value(key):
+            value = row.get(key)
+            return None if pd.isna(value) else value
+
+        self.start_date.value = value(finances.START_DATE_KEY)
+        self.end_date.value = value(finances.END_DATE_KEY)
+        self.changes_text.value = value(finances.EMPLOYMENT_CHANGES_KEY) or ""
+        self.message.value = ""
+
+    def apply_employee(self):
+        finances = self.finances
+        idx = self.employee_dropdown.value
+        if idx is None or idx not in finances.df.index:
+            return
+
+        try:
+            text = self.changes_text.value.strip()
+            parts = [part.strip() for part in text.split(",") if part.strip()]
+            for part in parts:
+                match = re.fullmatch(self.CHANGE_PATTERN, part)
+                if (match is None or pd.isna(pd.to_datetime(
+                        match.group(1), errors="coerce")) or
+                        float(match.group(2)) > 100):
+                    self.message.value = _(
+                        "Invalid employment change: {change}").format(
+                            change=part)
+                    return
+
+            if (self.start_date.value is not None and
+                    self.end_date.value is not None and
+                    self.end_date.value < self.start_date.value):
+                self.message.value = _(
+                    "The end date is before the start date.")
+                return
+
+            for key in (finances.START_DATE_KEY, finances.END_DATE_KEY,
+                        finances.EMPLOYMENT_CHANGES_KEY):
+                if key not in finances.df.columns:
+                    finances.df[key] = None
+            finances.df.at[idx, finances.START_DATE_KEY] = (
+                self.start_date.value)
+            finances.df.at[idx, finances.END_DATE_KEY] = self.end_date.value
+            finances.df.at[idx, finances.EMPLOYMENT_CHANGES_KEY] = (
+                ", ".join(parts))
+            finances.mark_dirty(idx)
+
+            # the totals of the budget panel follow the dates, the
+            # projection is refreshed with the chart
+            self.message.value = ""
+            finances.update_totals()
+            finances.refresh_visualization()
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def show(self):
+        self.shown = True
+        display(widgets.VBox([
+            widgets.HBox(
+                [self.employee_dropdown, self.start_date, self.end_date],
+                layout=widgets.Layout(padding="5px")),
+            widgets.HBox(
+                [self.changes_text, self.apply_button, self.message],
+                layout=widgets.Layout(padding="5px")),
+            self.totals,
+            self.output,
+            self.chart_output]))
+        self.refresh()
+        self.show_employee()
@@ -0,0 +1,352 @@
+from IPython.display import display
+from Language import _
+import ipywidgets as widgets
+import pandas as pd
+import traceback
+
+
+class RateCard:
+    # Hourly rates by role, step and year, e.g. the salary scale of HR.
+    # Employees with a step get the rate of their role and step in the
+    # plan year, resolved for the whole table with one join. The step of
+    # an employee is valid for the year it was set in (Step Year) and
+    # increases by one every year up to the highest step of the role.
+    # Employees without a step keep their hourly rate.
+
+    def __init__(self, finances) -> None:
+        self.finances = finances
+
+        # columns of the rate card file
+        self.ROLE_KEY = "Role"
+        self.STEP_KEY = "Step"
+        self.YEAR_KEY = "Year"
+        self.RATE_KEY = "Rate"
+
+        # normalized column name in the file -> column key
+        self.COLUMN_ALIASES = {
+            "role": self.ROLE_KEY,
+            "rolle": self.ROLE_KEY,
+            "funktion": self.ROLE_KEY,
+            "step": self.STEP_KEY,
+            "stufe": self.STEP_KEY,
+            "year": self.YEAR_KEY,
+            "jahr": self.YEAR_KEY,
+            "rate": self.RATE_KEY,
+            "hourly rate": self.RATE_KEY,
+            "hourly rate (chf)": self.RATE_KEY,
+            "stundensatz": self.RATE_KEY,
+            "stundensatz (chf)": self.RATE_KEY
+        }
+
+        # one row per role, step and year, None until a file is loaded
+        self.rates = None
+
+        self.upload_button = widgets.FileUpload(
+            accept=".csv,.xlsx",
+            multiple=False, layout=widgets.Layout(width="150px"))
+        self.upload_button.observe(self.load_file, names="value")
+        self.report = widgets.HTML()
+
+        self.employee_dropdown = widgets.Dropdown()
+        self.employee_dropdown.observe(
+            lambda change: self.show_employee(), names="value")
+        self.step_text = widgets.BoundedIntText(
+            min=0, max=99,
+            layout=widgets.Layout(width="200px"))
+        self.apply_button = widgets.Button()
+        self.apply_button.on_click(lambda b: self.apply_employee())
+        self.message = widgets.HTML()
+
+        self.table = widgets.HTML()
+        self.output = widgets.Output()
+
+        self.shown = False
+        finances.refresh_listeners.append(self.refresh)
+        finances.translation_listeners.append(self.translate)
+        self.translate()
+
+    # sets the texts of the widgets, again after every language switch
+    def translate(self):
+        self.upload_button.description = _("Open Rate Card")
+        self.employee_dropdown.description = _("Employee")
+        self.step_text.description = _("Step")
+        self.apply_button.description = _("Apply")
+        self.message.value = ""
+
+    def load_file(self, change):
+        if not change["new"]:
+            return
+
+        try:
+            upload = self.upload_button.value[0]
+            rates, report = self.read(upload["content"], upload["name"])
+
+            text = _("{count} rates loaded.").format(count=len(rates))
+            if len(report) > 0:
+                text += " " + _("{rejected} rows were rejected:").format(
+                    rejected=report["line"].nunique())
+                text += self.finances.importer.to_html(report)
+            self.report.value = text
+
+            if len(rates) > 0:
+                self.rates = rates
+                self.apply()
+
+            self.upload_button.value = ()
+            self.upload_button._counter = 0
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def read(self, content, file_name):
+        # returns the valid rates and a report of the rejected values, like
+        # Importer.import_file()
+        importer = self.finances.importer
+        df = importer.read(content, file_name)
+        df = df.rename(columns={
+            column: self.COLUMN_ALIASES[importer.normalize(column)]
+            for column in df.columns
+            if importer.normalize(column) in self.COLUMN_ALIASES})
+        df = df.loc[:, ~df.columns.duplicated()]
+        df = df[(df != "").any(axis=1)]
+        return self.validate(df)
+
+    def validate(self, df):
+        finances = self.finances
+        importer = finances.importer
+        errors = []
+        result = pd.DataFrame(index=df.index)
+
+        def reject(key, text, invalid, message):
+            for idx, value in text[invalid].items():
+                errors.append({
+                    "line": idx + importer.FIRST_LINE,
+                    "column": key,
+                    "value": value,
+                    "message": message
+                })
+
+        for key in (self.ROLE_KEY, self.STEP_KEY, self.YEAR_KEY,
+                    self.RATE_KEY):
+            if key not in df.columns:
+                raise ValueError(
+                    _("The rate card has no column {column}.").format(
+                        column=key))
+
+        # untranslated and translated roles are accepted
+        roles = df[self.ROLE_KEY].astype(str).str.strip()
+        known_roles = {}
+        for role, translation in finances.ROLES.items():
+            known_roles[role.lower()] = role
+            known_roles[translation.lower()] = role
+        result[self.ROLE_KEY] = roles.str.lower().map(known_roles)
+        reject(
+            self.ROLE_KEY, roles, result[self.ROLE_KEY].isna(),
+            _("unknown role"))
+
+        for key in (self.STEP_KEY, self.YEAR_KEY, self.RATE_KEY):
+            text = df[key].astype(str).str.strip()
+            valid = text.str.fullmatch(r"\d+(\.0*)?")
+            reject(key, text, ~valid, _("not a whole number"))
+            result[key] = pd.to_numeric(
+                text.where(valid), errors="coerce").fillna(0).astype(int)
+
+        duplicated = result.duplicated(
+            [self.ROLE_KEY, self.STEP_KEY, self.YEAR_KEY], keep="last")
+        reject(
+            self.STEP_KEY, df[self.STEP_KEY].astype(str), duplicated,
+            _("duplicate step"))
+
+        report = pd.DataFrame(
+            errors, columns=["line", "column", "value", "message"])
+        bad_rows = report["line"] - importer.FIRST_LINE
+        result = result.drop(index=bad_rows.unique())
+
+        return result.reset_index(drop=True), report.sort_values(
+            "line", kind="stable", ignore_index=True)
+
+    def get_steps(self, df, year):
+        # the steps in the plan year, 0 for employees without a step
+        finances = self.finances
+        if finances.STEP_KEY not in df.columns:
+            return pd.Series(0, index=df.index)
+
+        steps = pd.to_numeric(
+            df[finances.STEP_KEY], errors="coerce").fillna(0)
+        step_years = pd.to_numeric(
+            df.get(finances.STEP_YEAR_KEY, pd.Series(index=df.index)),
+            errors="coerce").fillna(year)
+        highest = df[finances.ROLE_KEY].map(
+            self.rates.groupby(self.ROLE_KEY)[self.STEP_KEY].max())
+
+        advanced = (steps + year - step_years).clip(lower=1)
+        advanced = advanced.where(advanced <= highest, highest)
+        return advanced.where(steps > 0, 0).fillna(0).astype(int)
+
+    def resolve(self, df, year):
+        # the hourly rates of the employees in the plan year, NaN for
+        # employees without a step or a rate, the latest rates until the
+        # plan year are used
+        if self.rates is None:
+            return pd.Series(float("nan"), index=df.index)
+
+        rates = self.rates[self.rates[self.YEAR_KEY] <= year]
+        current = rates.sort_values(self.YEAR_KEY).groupby(
+            [self.ROLE_KEY, self.STEP_KEY])[self.RATE_KEY].last()
+
+        keys = pd.DataFrame({
+            self.ROLE_KEY: df[self.finances.ROLE_KEY],
+            self.STEP_KEY: self.get_steps(df, year)
+        }, index=df.index)
+        return keys.join(current, on=[self.ROLE_KEY, self.STEP_KEY])[
+            self.RATE_KEY]
+
+    def update_rates(self, index):
+        # sets the resolved rates of the given rows, e.g. after a change of
+        # the plan year, the derived columns are recomputed by the caller
+        finances = self.finances
+        if self.rates is None or finances.STEP_KEY not in finances.df.columns:
+            return
+
+        rates = self.resolve(finances.df.loc[index], int(finances.year.value))
+        rates = rates.dropna().astype(int)
+        for idx, rate in rates.items():
+            finances.df.at[idx, finances.HOURLY_RATE_KEY] = rate
+
+    def apply(self):
+        # sets the rates of all employees with a step at once, one undo
+        # restores the previous rates
+        finances = self.finances
+        rates = self.resolve(finances.df, int(finances.year.value)).dropna()
+        rates = rates.astype(int)
+
+        with finances.journal.group():
+            for idx, rate in rates.items():
+                old = finances.df.at[idx, finances.HOURLY_RATE_KEY]
+                finances.journal.record(
+                    idx, finances.HOURLY_RATE_KEY, str(old), str(rate))
+                finances.df.at[idx, finances.HOURLY_RATE_KEY] = rate
+                finances.mark_dirty(idx)
+
+        finances.recompute_rows(rates.index)
+        finances.refresh_table()
+
+    def refresh(self):
+        if not self.shown:
+            return
+
+        try:
+            self.refresh_employees()
+            self.table.value = self.to_html(int(self.finances.year.value))
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def to_html(self, year):
+        # the rates of the plan year, one row per role and one column per
+        # step
+        if self.rates is None:
+            return ""
+
+        rates = self.rates[self.rates[self.YEAR_KEY] <= year]
+        table = rates.sort_values(self.YEAR_KEY).pivot_table(
+            index=self.ROLE_KEY, columns=self.STEP_KEY,
+            values=self.RATE_KEY, aggfunc="last")
+        header = "".join(f"<th>{step}</th>" for step in table.columns)
+        rows = "".join(
+            f"<tr><td style='text-align:left'>"
+            f"{self.finances.ROLES.get(role, role)}</td>" +
+            "".join(
+                f"<td>{rate:,.0f}</td>" if pd.notna(rate) else "<td></td>"
+                for rate in row) +
+            "</tr>"
+            for role, row in table.iterrows()
+        )
+        return (
+            "<b>" + _("Hourly Rates {year} (CHF)").format(year=year) +
+            "</b><table style='text-align:right'>"
+            "<tr><th>" + _("Step") + f"</th>{header}</tr>{rows}</table>"
+        )
+
+    def refresh_employees(self):
+        finances = self.finances
+        options = [
+            (str(name), idx)
+            for idx, name in finances.df[finances.NAME_KEY].items()]
+        if list(self.employee_dropdown.options) != options:
+            value = self.employee_dropdown.value
+            self.employee_dropdown.options = options
+            if value in finances.df.index:
+                self.employee_dropdown.value = value
+
+    def show_employee(self):
+        finances = self.finances
+        idx = self.employee_dropdown.value
+        if idx is None or idx not in finances.df.index or self.rates is None:
+            self.step_text.value = 0
+            return
+
+        steps = self.get_steps(
+            finances.df.loc[[idx]], int(finances.year.value))
+        self.step_text.value = int(steps[idx])
+        self.message.value = ""
+
+    def apply_employee(self):
+        finances = self.finances
+        idx = self.employee_dropdown.value
+        if idx is None or idx not in finances.df.index:
+            return
+
+        try:
+            if self.rates is None:
+                self.message.value = _("Open a rate card first.")
+                return
+
+            # the step is valid for the plan year
+            year = int(finances.year.value)
+            step = self.step_text.value
+            row = finances.df.loc[[idx]].copy()
+            row[finances.STEP_KEY] = step if step else None
+            row[finances.STEP_YEAR_KEY] = year if step else None
+            rate = self.resolve(row, year)[idx]
+            if step and pd.isna(rate):
+                self.message.value = _(
+                    "The rate card has no rate for this role and step.")
+                return
+
+            # the step and the rate are undone together
+            self.message.value = ""
+            with finances.journal.group(), finances.batch_changes():
+                for key in (finances.STEP_KEY, finances.STEP_YEAR_KEY):
+                    if key not in finances.df.columns:
+                        finances.df[key] = None
+                    finances.update_cell(idx, key, row.at[idx, key])
+                if step:
+                    finances.update_cell(
+                        idx, finances.HOURLY_RATE_KEY, str(int(rate)))
+            if step:
+                finances.refresh_table()
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def show(self):
+        self.shown = True
+        display(widgets.VBox([
+            widgets.HBox(
+                [self.upload_button, self.report],
+                layout=widgets.Layout(padding="5px")),
+            widgets.HBox(
+                [self.employee_dropdown, self.step_text, self.apply_button,
+                 self.message],
+                layout=widgets.Layout(padding="5px")),
+            self.table,
+            self.output]))
+        self.refresh()
+        self.show_employee()
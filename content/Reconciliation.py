@@ -0,0 +1,332 @@
+from IPython.display import display
+from Language import _
+import csv
+import html
+import io
+import ipywidgets as widgets
+import numpy as np
+import pandas as pd
+import traceback
+
+
+class Reconciliation:
+    # Compares the plan with the actual bookings of the accounting system.
+    # The bookings (often hundreds of thousands of lines for a year) are
+    # summed up per employee and cost category with one groupby and
+    # aligned with the planned costs of the employees.
+
+    def __init__(self, finances) -> None:
+        self.finances = finances
+
+        # columns of the bookings file
+        self.EMPLOYEE_KEY = "Employee"
+        self.CATEGORY_KEY = "Category"
+        self.AMOUNT_KEY = "Amount"
+        self.HOURS_KEY = "Hours"
+        self.DATE_KEY = "Date"
+
+        # normalized column name in the file -> column key
+        self.COLUMN_ALIASES = {
+            "employee": self.EMPLOYEE_KEY,
+            "name": self.EMPLOYEE_KEY,
+            "mitarbeiter": self.EMPLOYEE_KEY,
+            "mitarbeiterin": self.EMPLOYEE_KEY,
+            "category": self.CATEGORY_KEY,
+            "activity": self.CATEGORY_KEY,
+            "kategorie": self.CATEGORY_KEY,
+            "tätigkeit": self.CATEGORY_KEY,
+            "amount": self.AMOUNT_KEY,
+            "amount (chf)": self.AMOUNT_KEY,
+            "betrag": self.AMOUNT_KEY,
+            "betrag (chf)": self.AMOUNT_KEY,
+            "hours": self.HOURS_KEY,
+            "hours (h)": self.HOURS_KEY,
+            "stunden": self.HOURS_KEY,
+            "date": self.DATE_KEY,
+            "datum": self.DATE_KEY
+        }
+
+        # normalized category of a booking -> cost column of the plan, the
+        # other categories are summed up as OTHER_KEY
+        self.CATEGORY_ALIASES = {
+            "acquisition": finances.ACQUISITION_COSTS_KEY,
+            "akquisition": finances.ACQUISITION_COSTS_KEY,
+            "administration": finances.ADMINISTRATION_COSTS_KEY,
+            "verwaltung": finances.ADMINISTRATION_COSTS_KEY,
+            "management": finances.MANAGEMENT_COSTS_KEY,
+            "führung": finances.MANAGEMENT_COSTS_KEY,
+            "vacation": finances.VACATION_COSTS_KEY,
+            "ferien": finances.VACATION_COSTS_KEY,
+            "urlaub": finances.VACATION_COSTS_KEY
+        }
+        self.OTHER_KEY = "Other (CHF)"
+
+        # columns of the variance table
+        self.PLAN_KEY = "Plan (CHF)"
+        self.ACTUAL_KEY = "Actual (CHF)"
+        self.VARIANCE_KEY = "Variance (CHF)"
+        self.VARIANCE_PERCENTAGE_KEY = "Variance (%)"
+
+        # employees shown in the view, the largest variances first
+        self.MAX_ROWS = 50
+
+        # one row per booking, None until a file is loaded
+        self.bookings = None
+
+        self.upload_button = widgets.FileUpload(
+            description=_("Open Bookings"), accept=".csv", multiple=False,
+            layout=widgets.Layout(width="150px"))
+        self.upload_button.observe(self.load_file, names="value")
+        self.pro_rata_checkbox = widgets.Checkbox(
+            value=True, indent=False,
+            description=_("Plan until the last booking"))
+        self.pro_rata_checkbox.observe(
+            lambda change: self.refresh(), names="value")
+        self.report = widgets.HTML()
+        self.table = widgets.HTML()
+        self.output = widgets.Output()
+
+        self.shown = False
+        finances.refresh_listeners.append(self.refresh)
+
+    def get_categories(self):
+        finances = self.finances
+        return [
+            finances.ACQUISITION_COSTS_KEY,
+            finances.ADMINISTRATION_COSTS_KEY,
+            finances.MANAGEMENT_COSTS_KEY,
+            finances.VACATION_COSTS_KEY,
+            self.OTHER_KEY
+        ]
+
+    def get_labels(self):
+        # key -> translated header of the variance tables, the keys are
+        # never translated
+        finances = self.finances
+        return {
+            finances.ACQUISITION_COSTS_KEY: _("Acquisition (CHF)"),
+            finances.ADMINISTRATION_COSTS_KEY: _("Administration (CHF)"),
+            finances.MANAGEMENT_COSTS_KEY: _("Management (CHF)"),
+            finances.VACATION_COSTS_KEY: _("Vacation (CHF)"),
+            self.OTHER_KEY: _("Other (CHF)"),
+            self.PLAN_KEY: _("Plan (CHF)"),
+            self.ACTUAL_KEY: _("Actual (CHF)"),
+            self.VARIANCE_KEY: _("Variance (CHF)"),
+            self.VARIANCE_PERCENTAGE_KEY: _("Variance (%)")
+        }
+
+    def load_file(self, change):
+        if not change["new"]:
+            return
+
+        try:
+            upload = self.upload_button.value[0]
+            self.bookings = self.read(upload["content"])
+            self.report.value = _("{count} bookings loaded.").format(
+                count=len(self.bookings))
+            self.refresh()
+
+            self.upload_button.value = ()
+            self.upload_button._counter = 0
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def read(self, content):
+        # the C parser of pandas with only the known columns, the delimiter
+        # is sniffed from the header line instead of by the python parser
+        # of Importer.read(), which is too slow for files of this size
+        data = bytes(content)
+        header = data[:4096].decode("utf-8-sig", errors="ignore")
+        delimiter = csv.Sniffer().sniff(
+            header.splitlines()[0], delimiters=",;\t|").delimiter
+
+        normalize = self.finances.importer.normalize
+        columns = pd.read_csv(
+            io.BytesIO(data), sep=delimiter, nrows=0,
+            encoding="utf-8-sig").columns
+        mapping = {}
+        for column in columns:
+            key = self.COLUMN_ALIASES.get(normalize(column))
+            if key is not None and key not in mapping.values():
+                mapping[column] = key
+
+        for key in (self.EMPLOYEE_KEY, self.CATEGORY_KEY):
+            if key not in mapping.values():
+                raise ValueError(
+                    _("The bookings have no column {column}.").format(
+                        column=key))
+        if (self.AMOUNT_KEY not in mapping.values() and
+                self.HOURS_KEY not in mapping.values()):
+            raise ValueError(_("The bookings have no amounts or hours."))
+
+        # names and categories repeat in every line, as categoricals they
+        # are stored and grouped once per distinct value
+        bookings = pd.read_csv(
+            io.BytesIO(data), sep=delimiter, encoding="utf-8-sig",
+            usecols=list(mapping), dtype={
+                column: "category"
+                if key in (self.EMPLOYEE_KEY, self.CATEGORY_KEY) else str
+                for column, key in mapping.items()})
+        bookings = bookings.rename(columns=mapping)
+
+        for key in (self.AMOUNT_KEY, self.HOURS_KEY):
+            if key in bookings.columns:
+                bookings[key] = pd.to_numeric(
+                    bookings[key].str.replace("'", "", regex=False),
+                    errors="coerce")
+        if self.DATE_KEY in bookings.columns:
+            bookings[self.DATE_KEY] = self.finances.importer.parse_dates(
+                bookings[self.DATE_KEY].str.strip())
+
+        bookings[self.EMPLOYEE_KEY] = bookings[self.EMPLOYEE_KEY].map({
+            name: str(name).strip()
+            for name in bookings[self.EMPLOYEE_KEY].cat.categories
+        }).astype("category")
+        bookings[self.CATEGORY_KEY] = bookings[self.CATEGORY_KEY].map({
+            category: self.CATEGORY_ALIASES.get(
+                normalize(category), self.OTHER_KEY)
+            for category in bookings[self.CATEGORY_KEY].cat.categories
+        }).astype("category")
+        return bookings
+
+    def get_plan(self, weights):
+        # employees × categories of the planned costs of the weighted
+        # months, with the contract dates and employment changes of the
+        # projection
+        finances = self.finances
+        plan = finances.projection.get_category_costs(
+            finances.df, int(finances.year.value), weights)
+        plan = plan[self.get_categories()[:-1]]
+        plan[self.OTHER_KEY] = 0.0
+        return plan.groupby(
+            finances.df[finances.NAME_KEY].astype(str).str.strip()).sum()
+
+    def get_actuals(self, bookings):
+        # employees × categories of the booked costs, bookings with hours
+        # and without an amount are valued with the hourly rate of the plan
+        finances = self.finances
+        amounts = bookings.get(self.AMOUNT_KEY)
+        if self.HOURS_KEY in bookings.columns:
+            rates = pd.to_numeric(
+                finances.df[finances.HOURLY_RATE_KEY], errors="coerce")
+            rates = rates.groupby(
+                finances.df[finances.NAME_KEY].astype(str).str.strip()).max()
+            valued = bookings[self.HOURS_KEY] * bookings[
+                self.EMPLOYEE_KEY].map(rates).astype(float)
+            amounts = valued if amounts is None else amounts.fillna(valued)
+
+        actuals = amounts.fillna(0.0).astype(float).groupby(
+            [bookings[self.EMPLOYEE_KEY], bookings[self.CATEGORY_KEY]],
+            observed=True).sum().unstack(fill_value=0.0)
+        actuals.index = actuals.index.astype(str)
+        actuals.columns = actuals.columns.astype(str)
+        return actuals.reindex(columns=self.get_categories(), fill_value=0.0)
+
+    def get_weights(self, bookings):
+        # the share of every month of the year until the last booking, e.g.
+        # for a comparison in the middle of the year
+        projection = self.finances.projection
+        if (not self.pro_rata_checkbox.value or
+                self.DATE_KEY not in bookings.columns or
+                bookings[self.DATE_KEY].isna().all()):
+            return np.ones(projection.MONTHS)
+
+        months = projection.get_months(int(self.finances.year.value))
+        first = months.astype("datetime64[D]")
+        days = ((months + 1).astype("datetime64[D]") - first).astype(float)
+        last = np.datetime64(bookings[self.DATE_KEY].max().date(), "D")
+        return np.clip((last + 1 - first).astype(float) / days, 0, 1)
+
+    def get_variance(self, bookings):
+        # the plan and the actual costs per employee and per category, the
+        # employees of the plan and of the bookings are both included
+        weights = self.get_weights(bookings)
+        share = weights.mean()
+        plan = self.get_plan(weights)
+        actuals = self.get_actuals(bookings)
+        names = plan.index.union(actuals.index)
+        plan = plan.reindex(names, fill_value=0.0)
+        actuals = actuals.reindex(names, fill_value=0.0)
+
+        def variance(plan, actual):
+            return pd.DataFrame({
+                self.PLAN_KEY: plan,
+                self.ACTUAL_KEY: actual,
+                self.VARIANCE_KEY: actual - plan,
+                self.VARIANCE_PERCENTAGE_KEY:
+                    (actual - plan) / plan.where(plan > 0) * 100
+            })
+
+        employees = variance(plan.sum(axis=1), actuals.sum(axis=1))
+        employees = employees.sort_values(
+            self.VARIANCE_KEY, key=abs, ascending=False, kind="stable")
+
+        planned = plan.sum(axis=0)
+        booked = actuals.sum(axis=0)
+        planned[_("Total")] = planned.sum()
+        booked[_("Total")] = booked.sum()
+        categories = variance(planned, booked)
+
+        # booked names that are not in the plan, e.g. misspelled names
+        unknown = actuals.index[
+            (actuals.sum(axis=1) != 0) & (plan.sum(axis=1) == 0)]
+        return employees, categories, share, list(unknown)
+
+    def refresh(self):
+        if not self.shown or self.bookings is None:
+            return
+
+        try:
+            employees, categories, share, unknown = self.get_variance(
+                self.bookings)
+            text = ""
+            if share < 1:
+                last = self.bookings[self.DATE_KEY].max()
+                text += _(
+                    "Plan until {date} ({share:.0%} of the year).").format(
+                        date=last.strftime("%Y-%m-%d"), share=share)
+            if len(unknown) > 0:
+                text += " " + _(
+                    "Bookings without planned costs: {names}").format(
+                        names=html.escape(", ".join(unknown)))
+            self.table.value = (
+                f"<p>{text}</p>" +
+                "<b>" + _("Variance per Category") + "</b>" +
+                self.to_html(categories.rename(index=self.get_labels())) +
+                "<b>" + _("Variance per Employee") + "</b>" +
+                self.to_html(employees.head(self.MAX_ROWS)))
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def to_html(self, table):
+        labels = self.get_labels()
+        header = "".join(
+            f"<th>{labels.get(col, col)}</th>" for col in table.columns)
+        rows = "".join(
+            f"<tr><td style='text-align:left'>{html.escape(str(name))}</td>" +
+            "".join(
+                f"<td>{value:,.2f}</td>" if pd.notna(value) else "<td></td>"
+                for value in row) +
+            "</tr>"
+            for name, row in table.iterrows()
+        )
+        return (
+            "<table style='text-align:right'>"
+            f"<tr><th></th>{header}</tr>{rows}</table>"
+        )
+
+    def show(self):
+        self.shown = True
+        display(widgets.VBox([
+            widgets.HBox(
+                [self.upload_button, self.pro_rata_checkbox, self.report],
+                layout=widgets.Layout(padding="5px")),
+            self.table,
+            self.output]))
+        self.refresh()
@@ -0,0 +1,276 @@
+from IPython.display import clear_output, display, HTML
+from Language import _
+import ipywidgets as widgets
+import numpy as np
+import pandas as pd
+import traceback
+
+
+class Simulation:
+    # Estimates the risk of a budget overrun. Sick leave, hiring delays and
+    # changes of the hourly rates are drawn from distributions, and the
+    # costs of the whole employee table are computed for all draws at once
+    # as a draws × employees array, in chunks to limit the memory.
+    #
+    # sick leave: days per employee and year, negative binomial with the
+    #     given mean and standard deviation (Poisson for small deviations),
+    #     replaces the budgeted sick leave
+    # hiring delays: months until an employee starts, exponential with the
+    #     given mean, only for contracts that start during the year
+    # rate changes: normal with the given mean and standard deviation (%),
+    #     the same for all employees of a draw, e.g. a general pay rise
+
+    def __init__(self, finances) -> None:
+        self.finances = finances
+
+        # draws computed together, a chunk has draws × employees values
+        self.CHUNK_SIZE = 1000
+        self.DAYS_PER_MONTH = 365.25 / 12
+
+        # the same draws for the same inputs
+        self.SEED = 42
+
+        self.COSTS_COLOR = "#C76A2A"
+        self.BUDGET_COLOR = "#3C8D5A"
+
+        style = {"description_width": "230px"}
+        layout = widgets.Layout(width="330px")
+        self.sick_days_mean = widgets.FloatText(
+            value=7, style=style, layout=layout)
+        self.sick_days_deviation = widgets.FloatText(
+            value=10, style=style, layout=layout)
+        self.hiring_delay_mean = widgets.FloatText(
+            value=1, style=style, layout=layout)
+        self.rate_change_mean = widgets.FloatText(
+            value=1, style=style, layout=layout)
+        self.rate_change_deviation = widgets.FloatText(
+            value=1, style=style, layout=layout)
+        self.draws = widgets.BoundedIntText(
+            value=10000, min=100, max=1000000, step=1000, style=style,
+            layout=layout)
+        self.run_button = widgets.Button()
+        self.run_button.on_click(lambda b: self.run())
+
+        self.message = widgets.HTML()
+        self.totals = widgets.HTML()
+        self.output = widgets.Output()
+        self.chart_output = widgets.Output()
+
+        # the simulated total costs of every draw, None before a run
+        self.costs = None
+
+        self.shown = False
+        finances.refresh_listeners.append(self.refresh)
+        finances.translation_listeners.append(self.translate)
+        self.translate()
+
+    # sets the texts of the widgets, again after every language switch
+    def translate(self):
+        self.sick_days_mean.description = _("Sick Days per Year (mean)")
+        self.sick_days_deviation.description = _(
+            "Sick Days per Year (deviation)")
+        self.hiring_delay_mean.description = _(
+            "Hiring Delay in Months (mean)")
+        self.rate_change_mean.description = _("Rate Change in % (mean)")
+        self.rate_change_deviation.description = _(
+            "Rate Change in % (deviation)")
+        self.draws.description = _("Draws")
+        self.run_button.description = _("Run Simulation")
+        if self.costs is not None:
+            self.show_results()
+
+    def get_arrays(self, df, year):
+        # the per employee inputs of the simulation, the contract dates and
+        # the employment changes are taken from the projection
+        finances = self.finances
+        projection = finances.projection
+
+        def column(key):
+            return projection.get_column(df, key)
+
+        months = projection.get_months(year)
+        first = months.astype("datetime64[D]")
+        last = (months + 1).astype("datetime64[D]")
+        start = projection.get_dates(
+            df.get(finances.START_DATE_KEY, pd.Series(index=df.index)),
+            first[0])
+        end = projection.get_dates(
+            df.get(finances.END_DATE_KEY, pd.Series(index=df.index)),
+            last[-1] - 1) + 1
+
+        # months × employees, the employment relative to the table within
+        # the contract, the delays remove it from the start of the contract
+        factors = projection.get_monthly_factors(df, year)
+        activity = projection.get_activity(df, year)
+        ratios = np.divide(
+            factors, activity, out=np.zeros_like(factors),
+            where=activity > 0)
+
+        def days(dates):
+            return (dates - first[0]).astype(float)
+
+        return {
+            # costs that depend on the hourly rate and the working time
+            "variable": projection.get_variable_costs(df),
+            "management": column(finances.MANAGEMENT_COSTS_KEY).sum(),
+            # costs of a sick day
+            "daily": (
+                self.finances.calculations.HOURS_PER_DAY *
+                column(finances.EMPLOYMENT_PERCENTAGE_KEY) / 100 *
+                column(finances.HOURLY_RATE_KEY)),
+            # share of the annual costs without a delay, like the totals
+            # of the budget panel
+            "shares": factors.mean(axis=0),
+            "ratios": ratios,
+            # days from the start of the year, the delays shift the start
+            "first": days(first),
+            "last": days(last),
+            "start": days(np.maximum(start, first[0])),
+            "end": days(np.minimum(end, last[-1])),
+            "hired": start > first[0]
+        }
+
+    def get_lost_shares(self, arrays, hired, delays):
+        # draws × hired employees, the share of the annual costs between
+        # the start of the contract and the delayed start
+        start = arrays["start"][hired]
+        end = np.minimum(start + delays, arrays["end"][hired])
+        first = arrays["first"][:, None, None]
+        last = arrays["last"][:, None, None]
+        overlap = np.clip(
+            np.minimum(last, end) - np.maximum(first, start), 0, None) / (
+            last - first)
+        return (overlap * arrays["ratios"][:, None, hired]).mean(axis=0)
+
+    def sample_sick_days(self, rng, shape):
+        mean = max(self.sick_days_mean.value, 0.0)
+        variance = self.sick_days_deviation.value ** 2
+        if mean == 0:
+            return np.zeros(shape)
+        if variance <= mean:
+            return rng.poisson(mean, size=shape).astype(float)
+
+        # the number of sick days varies more than a Poisson distribution,
+        # most employees are rarely sick and a few are sick for long
+        n = mean * mean / (variance - mean)
+        return rng.negative_binomial(n, mean / variance, size=shape).astype(
+            float)
+
+    def simulate(self, df, year, draws):
+        # the total costs of every draw
+        arrays = self.get_arrays(df, year)
+        rng = np.random.default_rng(self.SEED)
+        hired = np.flatnonzero(arrays["hired"])
+        delay_mean = max(self.hiring_delay_mean.value, 0.0) * (
+            self.DAYS_PER_MONTH)
+
+        costs = np.empty(draws)
+        for first in range(0, draws, self.CHUNK_SIZE):
+            n = min(self.CHUNK_SIZE, draws - first)
+            rates = 1 + rng.normal(
+                self.rate_change_mean.value,
+                max(self.rate_change_deviation.value, 0.0),
+                size=(n, 1)) / 100
+
+            # share of the annual costs, the start of the contracts during
+            # the year is delayed
+            shares = np.tile(arrays["shares"], (n, 1))
+            if len(hired) > 0 and delay_mean > 0:
+                shares[:, hired] -= self.get_lost_shares(
+                    arrays, hired,
+                    rng.exponential(delay_mean, size=(n, len(hired))))
+
+            sick_days = self.sample_sick_days(rng, shares.shape)
+            costs[first:first + n] = (
+                (shares * (arrays["variable"] +
+                           sick_days * arrays["daily"])).sum(axis=1) *
+                rates[:, 0] + arrays["management"])
+        return costs
+
+    def get_summary(self, costs, budget):
+        overrun = np.clip(costs - budget, 0, None)
+        overrun_probability = (overrun > 0).mean()
+        return {
+            _("Expected Costs (CHF)"): costs.mean(),
+            _("Costs, 5% Percentile (CHF)"): np.percentile(costs, 5),
+            _("Costs, Median (CHF)"): np.percentile(costs, 50),
+            _("Costs, 95% Percentile (CHF)"): np.percentile(costs, 95),
+            _("Probability of an Overrun (%)"): overrun_probability * 100,
+            _("Expected Overrun (CHF)"): overrun.mean(),
+            _("Expected Overrun if Overrun (CHF)"):
+                overrun[overrun > 0].mean() if overrun_probability else 0.0
+        }
+
+    def run(self):
+        try:
+            finances = self.finances
+            self.costs = self.simulate(
+                finances.df, int(finances.year.value), self.draws.value)
+            self.message.value = ""
+            self.show_results()
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+
+    def refresh(self):
+        # a run takes about a second in the browser, so the results are
+        # not recomputed with every change of the table
+        if not self.shown or self.costs is None:
+            return
+
+        self.message.value = _(
+            "The budget has changed, run the simulation again.")
+
+    def show_results(self):
+        finances = self.finances
+        budget = finances.total_budget.value
+        planned = budget - finances.remaining_budget.value
+        summary = {_("Planned Costs (CHF)"): planned}
+        summary.update(self.get_summary(self.costs, budget))
+        self.totals.value = (
+            "<table style='text-align:right'>" +
+            "".join(
+                f"<tr><td style='text-align:left'>{name}</td>"
+                f"<td>{value:,.2f}</td></tr>"
+                for name, value in summary.items()) +
+            "</table>"
+        )
+        self.refresh_chart(budget)
+
+    def refresh_chart(self, budget):
+        # imported here like in Visualization, plotly is expensive
+        import plotly.graph_objects as go
+
+        fig = go.Figure(go.Histogram(
+            x=self.costs, nbinsx=60, name=_("Simulated Costs"),
+            marker_color=self.COSTS_COLOR,
+            hovertemplate="CHF %{x}<br>%{y}<extra></extra>"))
+        fig.add_vline(
+            x=budget, line=dict(color=self.BUDGET_COLOR, dash="dash"),
+            annotation_text=_("Total Budget"))
+        fig.update_layout(
+            title_text="<b>" + _("Simulated Costs") + "</b>",
+            height=400, font_size=11, bargap=0.05,
+            margin=dict(t=80, b=40, l=0, r=0))
+
+        with self.chart_output:
+            clear_output(wait=True)
+            display(HTML(fig.to_html(include_plotlyjs='cdn')))
+
+    def show(self):
+        self.shown = True
+        display(widgets.VBox([
+            widgets.HBox([
+                widgets.VBox([
+                    self.sick_days_mean, self.sick_days_deviation,
+                    self.hiring_delay_mean]),
+                widgets.VBox([
+                    self.rate_change_mean, self.rate_change_deviation,
+                    self.draws, self.run_button])],
+                layout=widgets.Layout(padding="5px")),
+            self.message,
+            self.totals,
+            self.output,
+            self.chart_output]))
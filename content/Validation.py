@@ -0,0 +1,180 @@
+from Language import _, N_
+from contextlib import contextmanager
+import ipywidgets as widgets
+import pandas as pd
+
+
+class Validation:
+    # Consistency checks of the employee table, each a vectorized
+    # expression over the columns. After an edit only the changed rows are
+    # checked again, the rows with violations are kept with one column per
+    # check. The cells of a violation are highlighted with a CSS class and
+    # the budget panel shows the number of violations per check.
+
+    def __init__(self, finances) -> None:
+        self.finances = finances
+
+        # the CSS class of highlighted cells, see Finances.show()
+        self.CSS_CLASS = "validation-error"
+
+        # rounding of the computed hours
+        self.TOLERANCE = 0.01
+
+        # check -> message and the columns that are highlighted
+        self.CHECKS = {
+            "over_allocated": (
+                N_("Research, acquisition and administration hours exceed "
+                   "the annual working hours"),
+                [finances.RESEARCH_HOURS_KEY, finances.ACQUISITION_HOURS_KEY,
+                 finances.ADMINISTRATION_HOURS_KEY]),
+            "management_ilv": (
+                N_("ILV employees with a management share"),
+                [finances.ILV_KEY, finances.IS_MANAGEMENT_KEY]),
+            "management_role": (
+                N_("Research assistants with a management share"),
+                [finances.ROLE_KEY, finances.IS_MANAGEMENT_KEY]),
+            "missing_rate": (
+                N_("Employees without an hourly rate"),
+                [finances.HOURLY_RATE_KEY])
+        }
+
+        # rows with at least one violation, one column per check
+        self.violations = pd.DataFrame(columns=list(self.CHECKS), dtype=bool)
+
+        # rows to check, all rows after e.g. loading a file
+        self.dirty_rows = set()
+        self.all_dirty = True
+
+        # > 0 while many rows change one by one, e.g. the undo of a bulk
+        # edit, the rows are checked together at the end
+        self.defer_depth = 0
+
+        self.summary = widgets.HTML()
+
+    def mark_dirty(self, idx):
+        self.dirty_rows.add(idx)
+
+    def mark_rows_dirty(self, index):
+        self.dirty_rows.update(index)
+
+    def mark_all_dirty(self):
+        self.all_dirty = True
+
+    @contextmanager
+    def deferred(self):
+        self.defer_depth += 1
+        try:
+            yield
+        finally:
+            self.defer_depth -= 1
+            if self.defer_depth == 0:
+                self.check()
+
+    def get_violations(self, df):
+        # one row per row of df, True where a check fails
+        finances = self.finances
+
+        def number(key):
+            return pd.to_numeric(df[key], errors="coerce").fillna(0.0)
+
+        def flag(key):
+            return df[key].fillna(False).astype(bool)
+
+        hours = (
+            number(finances.RESEARCH_HOURS_KEY) +
+            number(finances.ACQUISITION_HOURS_KEY) +
+            number(finances.ADMINISTRATION_HOURS_KEY))
+        management = flag(finances.IS_MANAGEMENT_KEY)
+        return pd.DataFrame({
+            "over_allocated": hours > (
+                number(finances.ANNUAL_WORKING_HOURS_KEY) + self.TOLERANCE),
+            "management_ilv": management & flag(finances.ILV_KEY),
+            "management_role": management & (
+                df[finances.ROLE_KEY] == "Research Assistant"),
+            "missing_rate": (number(finances.HOURLY_RATE_KEY) <= 0) & (
+                number(finances.EMPLOYMENT_PERCENTAGE_KEY) > 0)
+        }, index=df.index)
+
+    def check(self):
+        # checks the dirty rows and updates the highlights and the summary
+        if self.defer_depth > 0:
+            return
+
+        df = self.finances.df
+        if self.all_dirty:
+            index = df.index
+        else:
+            index = df.index.intersection(list(self.dirty_rows))
+        if len(index) == 0 and self.violations.index.isin(df.index).all():
+            return
+
+        previous = self.violations
+        checked = self.get_violations(df.loc[index])
+        checked = checked[checked.any(axis=1)]
+
+        # deleted rows are dropped with the checked rows
+        kept = previous[
+            previous.index.isin(df.index) & ~previous.index.isin(index)]
+        self.violations = pd.concat([kept, checked]) if len(kept) else checked
+        self.dirty_rows = set()
+        self.all_dirty = False
+
+        # only the rows whose cells change are highlighted again
+        both = previous.index.union(self.violations.index)
+        changed = both[(
+            previous.reindex(both, fill_value=False) !=
+            self.violations.reindex(both, fill_value=False)).any(axis=1)]
+
+        self.update_highlights(changed)
+        self.update_summary()
+
+    def get_cells(self, idx):
+        # the columns of the violations of a row
+        if idx not in self.violations.index:
+            return set()
+
+        row = self.violations.loc[idx]
+        return {
+            col for check, (message, columns) in self.CHECKS.items()
+            if row[check] for col in columns}
+
+    def highlight(self, cell, cells):
+        if cell.cell_col in cells:
+            cell.add_class(self.CSS_CLASS)
+        else:
+            cell.remove_class(self.CSS_CLASS)
+
+    def update_highlights(self, index):
+        finances = self.finances
+        for idx in index:
+            cells = self.get_cells(idx)
+            for col in finances.COLUMNS:
+                if col in finances.label_columns:
+                    cell = finances.label_columns[col].get(idx)
+                else:
+                    cell = finances.input_cells.get((idx, col))
+                if cell is not None:
+                    self.highlight(cell, cells)
+
+        if finances.grid_table is not None:
+            finances.grid_table.invalid = self.get_invalid()
+
+    def get_invalid(self):
+        # row -> highlighted columns, for the compact table
+        return {
+            str(int(idx)): sorted(self.get_cells(idx))
+            for idx in self.violations.index}
+
+    def update_summary(self):
+        counts = self.violations.sum()
+        lines = [
+            f"{_(message)}: {int(counts[check])}"
+            for check, (message, columns) in self.CHECKS.items()
+            if counts.get(check, 0) > 0]
+        if not lines:
+            self.summary.value = ""
+            return
+
+        self.summary.value = (
+            "<div style='color:#C76A2A'><b>" + _("Inconsistencies") +
+            "</b><br>" + "<br>".join(lines) + "</div>")
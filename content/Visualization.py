@@ -1,128 +1,147 @@
-import plotly.graph_objects as go
 from IPython.display import clear_output, display, HTML
-import gettext
-
-gettext.bindtextdomain('finances', 'translations')
-gettext.textdomain('finances')
-
-_ = gettext.gettext
+from Language import _
+import numpy as np
 
 
 class Visualization:
 
+    def __init__(self) -> None:
+        # translated node labels and colors, see get_labels()
+        self.labels = None
+
+        # node indices of the fixed part of the chart
+        self.TOTAL_BUDGET = 0
+        self.PERSONNEL_COSTS = 1
+        self.ACQUISITION = 2
+        self.ADMINISTRATION = 3
+        self.MANAGEMENT = 4
+        self.VACATION = 5
+        self.SICK_LEAVE = 6
+        self.REMAINING = 7
+
+        self.EMPLOYEE_COLOR = "#D8E4E8"
+
+    # The translated labels and the colors of the fixed nodes only change
+    # with the language, they are computed once and reused by every render.
+    # A language switch must call clear_labels().
+    def get_labels(self):
+        if self.labels is None:
+            node_colors = [
+                "#C76A2A",  # Total Budget (warm orange)
+                "#E6B98C",  # Personnel Costs (soft sand)
+                "#5BAE6E",  # Acquisition (green)
+                "#9E9E9E",  # Administration (neutral grey)
+                "#4A6FA5",  # Management (calm blue)
+                "#FFC067",  # Vacation (orange)
+                "#D9534F",  # Sick Leave (muted red)
+                "#3C8D5A",  # Remaining (strong green)
+            ]
+            self.labels = {
+                "nodes": [
+                    _("Total Budget"), _("Personnel Costs"),
+                    _("Acquisition"), _("Administration"), _("Management"),
+                    _("Vacation"), _("Sick Leave"), _("Remaining")],
+                "node_colors": node_colors,
+                "link_colors": [
+                    self.with_alpha(color) for color in node_colors],
+                "title": _("Budget Flow Analysis"),
+                "subtitle": _(
+                    "Utilization: {utilization_percentage:.1f}% |"
+                    " Budget: {budget:,.2f} CHF")
+            }
+        return self.labels
+
+    def clear_labels(self):
+        self.labels = None
+
+    def with_alpha(self, hex_color, alpha=0.45):
+        h = hex_color.lstrip("#")
+        r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
+        return f"rgba({r},{g},{b},{alpha})"
+
     def show(self, finances):
+        # imported here because plotly is the most expensive import of the
+        # notebook and only needed once the chart is rendered
+        import plotly.graph_objects as go
+
+        labels = self.get_labels()
+        # the costs scaled by the contract dates like the budget panel
+        df = finances.get_projected_df()
 
         budget = finances.total_budget.value
         budgeted_sick_leave = finances.budgeted_sick_leave.value
-        total_spent = (
-            finances.df[finances.PUBLIC_FUNDS_KEY].sum() + budgeted_sick_leave)
+        total_spent = df[finances.PUBLIC_FUNDS_KEY].sum() + budgeted_sick_leave
         remaining_budget = max(0, budget - total_spent)
         utilization_percentage = (
             (total_spent / budget) * 100 if budget > 0 else 0)
 
-        # create sorted list of employees names (big spenders first)
-        sorted_df = finances.df.sort_values(
-            finances.PUBLIC_FUNDS_KEY, ascending=False)
+        # employees sorted by costs (big spenders first)
+        sorted_df = df.sort_values(finances.PUBLIC_FUNDS_KEY, ascending=False)
         sorted_names = sorted_df[finances.NAME_KEY].tolist()
-
-        # --- nodes and positioning ---
-        all_labels = (
-            [_("Total Budget"), _("Personnel Costs"), _("Acquisition"),
-             _("Administration"), _("Management"), _("Vacation"),
-             _("Sick Leave"), _("Remaining")] + sorted_names)
-        label_map = {name: i for i, name in enumerate(all_labels)}
+        employee_nodes = len(labels["nodes"]) + np.arange(len(sorted_names))
 
         # --- links ---
-        sources, targets, values, = [], [], []
-
-        # total budget splitting
+        sources = [
+            self.TOTAL_BUDGET, self.TOTAL_BUDGET,
+            self.PERSONNEL_COSTS, self.PERSONNEL_COSTS,
+            self.PERSONNEL_COSTS, self.PERSONNEL_COSTS,
+            self.PERSONNEL_COSTS]
+        targets = [
+            self.PERSONNEL_COSTS, self.REMAINING,
+            self.ACQUISITION, self.ADMINISTRATION, self.VACATION,
+            self.SICK_LEAVE, self.MANAGEMENT]
+        values = [
+            total_spent, remaining_budget,
+            df[finances.ACQUISITION_COSTS_KEY].sum(),
+            df[finances.ADMINISTRATION_COSTS_KEY].sum(),
+            df[finances.VACATION_COSTS_KEY].sum(),
+            budgeted_sick_leave,
+            df[finances.MANAGEMENT_COSTS_KEY].sum()]
+
+        # category -> employee links, one row per employee and one column
+        # per category, flattened row by row (all links of an employee
+        # next to each other)
+        categories = np.array([
+            self.ACQUISITION, self.ADMINISTRATION, self.MANAGEMENT,
+            self.VACATION])
+        costs = sorted_df[[
+            finances.ACQUISITION_COSTS_KEY,
+            finances.ADMINISTRATION_COSTS_KEY,
+            finances.MANAGEMENT_COSTS_KEY,
+            finances.VACATION_COSTS_KEY]].to_numpy(dtype=float)
+        mask = costs > 0
         sources.extend(
-            [label_map[_("Total Budget")], label_map[_("Total Budget")]])
+            np.broadcast_to(categories, costs.shape)[mask].tolist())
         targets.extend(
-            [label_map[_("Personnel Costs")], label_map[_("Remaining")]])
-        values.extend([total_spent, remaining_budget])
-
-        # personnel cost splitting
-        sources.extend([
-            label_map[_("Personnel Costs")],
-            label_map[_("Personnel Costs")],
-            label_map[_("Personnel Costs")],
-            label_map[_("Personnel Costs")],
-            label_map[_("Personnel Costs")]])
-        targets.extend([
-            label_map[_("Acquisition")],
-            label_map[_("Administration")],
-            label_map[_("Vacation")],
-            label_map[_("Sick Leave")],
-            label_map[_("Management")]])
-        values.extend(
-            [finances.df[finances.ACQUISITION_COSTS_KEY].sum(),
-             finances.df[finances.ADMINISTRATION_COSTS_KEY].sum(),
-             finances.df[finances.VACATION_COSTS_KEY].sum(),
-             budgeted_sick_leave,
-             finances.df[finances.MANAGEMENT_COSTS_KEY].sum()])
-
-        # acquisition, administration and management cost splitting
-        name_df = finances.df.set_index(finances.NAME_KEY)
-        for name in sorted_names:
-            acquisition_costs = name_df.loc[
-                name, finances.ACQUISITION_COSTS_KEY]
-            administration_costs = name_df.loc[
-                name, finances.ADMINISTRATION_COSTS_KEY]
-            management_costs = name_df.loc[
-                name, finances.MANAGEMENT_COSTS_KEY]
-            vacation_costs = name_df.loc[
-                name, finances.VACATION_COSTS_KEY]
-
-            if acquisition_costs > 0:
-                sources.append(label_map[_("Acquisition")])
-                targets.append(label_map[name])
-                values.append(acquisition_costs)
-
-            if administration_costs > 0:
-                sources.append(label_map[_("Administration")])
-                targets.append(label_map[name])
-                values.append(administration_costs)
-
-            if management_costs > 0:
-                sources.append(label_map[_("Management")])
-                targets.append(label_map[name])
-                values.append(management_costs)
-
-            if vacation_costs > 0:
-                sources.append(label_map[_("Vacation")])
-                targets.append(label_map[name])
-                values.append(vacation_costs)
+            np.broadcast_to(employee_nodes[:, None], costs.shape)[
+                mask].tolist())
+        values.extend(costs[mask].tolist())
+        link_colors = [labels["link_colors"][src] for src in sources]
+
+        # employee -> project -> funding source, only with allocations
+        (project_labels, project_colors, project_sources, project_targets,
+         project_values) = finances.allocation.get_links(
+            sorted_df, employee_nodes,
+            len(labels["nodes"]) + len(sorted_names))
+        project_link_colors = {
+            color: self.with_alpha(color)
+            for color in [self.EMPLOYEE_COLOR] + project_colors}
 
         # --- plot ---
-
-        # custom colors
-        employee_color = "#D8E4E8"
-
-        node_colors = [
-            "#C76A2A",  # Total Budget (warm orange)
-            "#E6B98C",  # Personnel Costs (soft sand)
-            "#5BAE6E",  # Acquisition (green)
-            "#9E9E9E",  # Administration (neutral grey)
-            "#4A6FA5",  # Management (calm blue)
-            "#FFC067",  # Vacation (orange)
-            "#D9534F",  # Sick Leave (muted red)
-            "#3C8D5A",  # Remaining (strong green)
-        ]
-
-        node_colors.extend([employee_color] * len(sorted_names))
-
-        def with_alpha(hex_color, alpha=0.45):
-            h = hex_color.lstrip("#")
-            r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
-            return f"rgba({r},{g},{b},{alpha})"
-
-        link_colors = [with_alpha(node_colors[src]) for src in sources]
+        node_colors = (
+            labels["node_colors"] +
+            [self.EMPLOYEE_COLOR] * len(sorted_names) +
+            project_colors)
+        sources.extend(project_sources)
+        targets.extend(project_targets)
+        values.extend(project_values)
+        link_colors.extend(
+            project_link_colors[node_colors[src]] for src in project_sources)
 
         fig = go.Figure(data=[go.Sankey(
             arrangement="fixed",
             node=dict(
-                label=all_labels,
+                label=labels["nodes"] + sorted_names + project_labels,
                 color=node_colors,
                 pad=16,
                 thickness=15,
@@ -141,10 +160,9 @@ class Visualization:
         )])
 
         title_str = (
-            "<b>" + _("Budget Flow Analysis") + "</b><br>" +
-            _("Utilization: {utilization_percentage:.1f}% |"
-              " Budget: {budget:,.2f} CHF").format(
-                  utilization_percentage=utilization_percentage, budget=budget)
+            "<b>" + labels["title"] + "</b><br>" +
+            labels["subtitle"].format(
+                utilization_percentage=utilization_percentage, budget=budget)
         )
         fig.update_layout(
             title_text=title_str,
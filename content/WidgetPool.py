@@ -0,0 +1,51 @@
+from ipywidgets.widgets import widget
+
+
+class WidgetPool:
+    # Keeps the widgets of table rows that are not shown anymore, so that
+    # the next refresh reuses them instead of creating new widget models.
+    # Widgets that don't fit into the pool are closed, which frees their
+    # models in the kernel and in the browser.
+
+    def __init__(self) -> None:
+        # the number of free widgets kept per kind
+        self.MAX_SIZE = 1000
+
+        # kind -> list of free widgets
+        self.free = {}
+
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, kind, create):
+        free = self.free.get(kind)
+        if free:
+            self.reused += 1
+            return free.pop()
+
+        self.created += 1
+        return create()
+
+    def release(self, kind, item):
+        free = self.free.setdefault(kind, [])
+        if len(free) < self.MAX_SIZE:
+            free.append(item)
+        else:
+            self.close(item)
+
+    def clear(self):
+        for free in self.free.values():
+            for item in free:
+                self.close(item)
+        self.free.clear()
+
+    def close(self, item):
+        # the shared Layout and style models are not closed, they are
+        # traits and not children
+        for child in getattr(item, "children", ()):
+            self.close(child)
+        item.close()
+
+    def get_live_count(self):
+        # all widget models of the kernel that have not been closed yet
+        return len(widget._instances)
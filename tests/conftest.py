@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+CONTENT = os.path.join(os.path.dirname(__file__), os.pardir, "content")
+sys.path.insert(0, CONTENT)
+
+
+@pytest.fixture
+def content(monkeypatch):
+    # the translations are found relative to the notebook directory
+    monkeypatch.chdir(CONTENT)
+    yield CONTENT
+
+    from Language import set_language
+    set_language("en")
+
+
+@pytest.fixture
+def finances(content):
+    from Finances import Finances
+    return Finances()
+
+
+@pytest.fixture
+def add_employees(finances):
+    # imports employees into finances, the given columns replace the
+    # defaults, e.g. {finances.HOURLY_RATE_KEY: [87, 0]}
+    import pandas as pd
+    from datetime import date
+
+    def add(count, columns=None):
+        employees = pd.DataFrame({
+            finances.NAME_KEY: [f"Employee {i}" for i in range(count)],
+            finances.ROLE_KEY: "Lecturer",
+            finances.ILV_KEY: False,
+            finances.HOURLY_RATE_KEY: 87,
+            finances.DATE_OF_BIRTH_KEY: date(1970, 1, 1),
+            finances.EMPLOYMENT_PERCENTAGE_KEY: 80.0,
+            finances.RESEARCH_PERCENTAGE_KEY: 50.0,
+            finances.ACQUISITION_HOURS_KEY: 10.0,
+            finances.IS_MANAGEMENT_KEY: False
+        }, index=range(count))
+        for key, values in (columns or {}).items():
+            employees[key] = values
+        finances.import_rows(employees)
+        return finances.df.index[-count:]
+
+    return add
@@ -0,0 +1,75 @@
+import pytest
+
+
+@pytest.fixture
+def allocation(finances, add_employees):
+    add_employees(3, {finances.PROJECTS_KEY: [
+        "SNF-1: 40, EU-2: 20", "", "EU-2: 50, <i>X</i>: 10"]})
+    return finances.allocation
+
+
+def test_project_costs_match_a_loop_over_the_rows(finances, allocation):
+    table = allocation.get_project_costs(finances.df)
+
+    columns = allocation.get_cost_columns()
+    expected = {}
+    for idx, row in finances.df.iterrows():
+        for part in filter(None, row[finances.PROJECTS_KEY].split(", ")):
+            project, share = part.split(": ")
+            for key, label in columns.items():
+                expected[project, label] = expected.get(
+                    (project, label), 0.0) + row[key] * float(share) / 100
+    for (project, label), value in expected.items():
+        assert table.loc[project, label] == pytest.approx(value)
+
+    total = sum(finances.df[key].sum() for key in columns)
+    assert table["Total"].sum() == pytest.approx(total)
+
+
+def test_allocations_are_undone(finances, allocation):
+    idx = finances.df.index[1]
+    allocation.employee_dropdown.options = [("", idx)]
+    allocation.employee_dropdown.value = idx
+    allocation.projects_text.value = "SNF-1: 100"
+    allocation.apply_employee()
+    assert finances.df.at[idx, finances.PROJECTS_KEY] == "SNF-1: 100"
+
+    finances.undo()
+    assert finances.df.at[idx, finances.PROJECTS_KEY] == ""
+    finances.redo()
+    assert finances.df.at[idx, finances.PROJECTS_KEY] == "SNF-1: 100"
+
+
+def test_funding_sources_are_saved_and_undone(
+        finances, allocation, tmp_path):
+    from Autosave import Autosave
+
+    finances.autosave = Autosave(
+        finances.file_handler, str(tmp_path / ".autosave"))
+    finances.save_autosave()
+    allocation.funding_sources_text.value = "SNF-1: SNF\nEU-2: EU"
+    allocation.apply_funding_sources()
+    finances.save_autosave()
+
+    finances.undo()
+    assert allocation.funding_sources == {}
+    finances.redo()
+    assert allocation.funding_sources == {"SNF-1": "SNF", "EU-2": "EU"}
+
+    allocation.set_funding_sources({})
+    finances.restore_autosave()
+    assert allocation.funding_sources == {"SNF-1": "SNF", "EU-2": "EU"}
+    assert "EU-2: EU" in allocation.funding_sources_text.value
+
+
+def test_project_names_are_escaped(finances, allocation):
+    allocation.shown = True
+    allocation.refresh()
+    assert "&lt;i&gt;X&lt;/i&gt;" in allocation.table.value
+    assert "<i>X" not in allocation.table.value
+
+
+def test_texts_follow_the_language(finances, allocation):
+    finances.switch_language("de")
+    assert allocation.projects_text.description == "Projekte (%)"
+    assert allocation.funding_sources_button.description == "Übernehmen"
@@ -0,0 +1,51 @@
+def use_autosave(finances, tmp_path):
+    from Autosave import Autosave
+
+    finances.autosave = Autosave(
+        finances.file_handler, str(tmp_path / ".autosave"))
+
+
+def add(finances, name):
+    finances.input_widgets[finances.NAME_KEY].value = name
+    finances.add_row()
+
+
+def get_names(rows, finances):
+    return {idx: row[finances.NAME_KEY] for idx, row in rows.items()}
+
+
+def test_restore_after_delete_and_add(finances, tmp_path):
+    use_autosave(finances, tmp_path)
+    for name in "ABCD":
+        add(finances, name)
+    finances.save_autosave()
+
+    finances.delete_row(1)
+    add(finances, "E")
+    finances.save_autosave()
+
+    data, rows = finances.autosave.restore()
+    assert get_names(rows, finances) == {0: "A", 2: "C", 3: "D", 4: "E"}
+
+
+def test_restore_row_deleted_and_added_in_one_delta(finances, tmp_path):
+    use_autosave(finances, tmp_path)
+    add(finances, "A")
+    finances.save_autosave()
+
+    finances.deleted_rows.add(0)
+    finances.mark_dirty(0)
+    finances.save_autosave()
+
+    data, rows = finances.autosave.restore()
+    assert get_names(rows, finances) == {0: "A"}
+
+
+def test_index_of_deleted_row_is_not_reused(finances, tmp_path):
+    use_autosave(finances, tmp_path)
+    for name in "AB":
+        add(finances, name)
+    finances.delete_row(1)
+    add(finances, "C")
+
+    assert list(finances.df.index) == [0, 2]
@@ -0,0 +1,13 @@
+from BudgetGenerator import BudgetGenerator
+
+
+def test_generates_without_a_budget(content, capsys):
+    data = BudgetGenerator(seed=1).generate(5, year=2026)
+    # no widgets are built and nothing is displayed
+    assert capsys.readouterr().out == ""
+
+    from Finances import Finances
+    finances = Finances()
+    assert data == BudgetGenerator(finances, seed=1).generate(5, year=2026)
+    assert set(data[finances.file_handler.EMPLOYEES_KEY][0]) == set(
+        finances.COLUMNS)
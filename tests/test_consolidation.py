@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from Consolidation import Consolidation
+
+
+@pytest.fixture
+def consolidation(finances):
+    consolidation = Consolidation(finances)
+    file_handler = finances.file_handler
+    groups = pd.DataFrame({
+        consolidation.GROUP_KEY: ["Vacation", "<b>B</b>"],
+        file_handler.YEAR_KEY: [2026, 2026],
+        file_handler.TOTAL_BUDGET_KEY: [10000, 5000],
+        file_handler.MANAGEMENT_ALLOWANCE_KEY: [0, 0],
+        file_handler.BUDGETED_SICK_LEAVE_KEY: [0, 0]
+    })
+    employees = [
+        pd.DataFrame({
+            finances.NAME_KEY: ["Remaining"],
+            finances.VACATION_COSTS_KEY: [1000.0],
+            finances.PUBLIC_FUNDS_KEY: [1000.0]
+        }).assign(**{consolidation.GROUP_KEY: group})
+        for group in groups[consolidation.GROUP_KEY]]
+    consolidation.set_data(groups, employees)
+    return consolidation
+
+
+def test_nodes_with_the_same_name_stay_apart(finances, consolidation):
+    labels, colors, sources, targets, values = consolidation.get_links(
+        consolidation.df, consolidation.groups)
+    links = dict(zip(zip(sources, targets), values))
+    # the group "Vacation" is the first node, the categories follow the
+    # groups
+    category = labels.index("Vacation", 2)
+    remaining = labels.index("Remaining", 2)
+    employee = labels.index("Remaining (Vacation)")
+    assert links[(0, category)] == 1000
+    assert links[(0, remaining)] == 9000
+    assert links[(category, employee)] == 1000
+    assert len(labels) == 2 + 6 + 2
+
+
+def test_totals_escape_the_group_names(finances, consolidation):
+    totals = consolidation.get_totals()
+    assert totals.loc["Total", finances.VACATION_COSTS_KEY] == 2000
+    assert "&lt;b&gt;B&lt;/b&gt;" in consolidation.totals.value
+    assert "<b>B</b>" not in consolidation.totals.value
+
+
+def test_texts_follow_the_language(finances, consolidation):
+    consolidation.group_dropdown.value = "Vacation"
+    finances.switch_language("de")
+    assert consolidation.group_dropdown.value == "Vacation"
+    assert consolidation.group_dropdown.options[0][0] == "Alle Gruppen"
+    assert "Ferien" in consolidation.totals.value
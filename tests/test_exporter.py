@@ -0,0 +1,20 @@
+from datetime import date
+
+import pytest
+
+
+def test_employee_costs_add_up_to_the_summary(finances, add_employees):
+    finances.year.value = 2026
+    add_employees(2)
+    finances.df[finances.START_DATE_KEY] = [None, date(2026, 7, 1)]
+    finances.update_totals()
+
+    exporter = finances.exporter
+    employees = exporter.get_employee_table()
+    summary = exporter.get_summary_table().set_index("Item")["Value"]
+    assert employees[finances.VACATION_COSTS_KEY].sum() == pytest.approx(
+        summary["Vacation Costs (CHF)"])
+    assert employees[finances.ADMINISTRATION_COSTS_KEY].sum() == (
+        pytest.approx(summary["Administrative Costs (CHF)"]))
+    costs = employees[finances.VACATION_COSTS_KEY]
+    assert costs[1] == pytest.approx(costs[0] / 2, rel=0.01)
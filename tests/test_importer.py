@@ -0,0 +1,24 @@
+import pandas as pd
+
+
+def test_parse_dates_keeps_iso_and_swiss_dates(finances):
+    importer = finances.importer
+    parsed = importer.parse_dates(
+        pd.Series(["1980-07-01", "01.07.1980", "31.12.1980", "", "x"]))
+    assert parsed.tolist()[:3] == [
+        pd.Timestamp("1980-07-01"), pd.Timestamp("1980-07-01"),
+        pd.Timestamp("1980-12-31")]
+    assert parsed[3:].isna().all()
+
+
+def test_negative_rates_are_rejected(finances):
+    content = (
+        "Name;Role;Hourly Rate\n"
+        "A;Lecturer;+90\n"
+        "B;Lecturer;-90\n"
+        "<i>C</i>;Lecturer;<b>x</b>\n").encode()
+    df, report = finances.importer.import_file(content, "employees.csv")
+    assert df[finances.NAME_KEY].tolist() == ["A"]
+    assert df[finances.HOURLY_RATE_KEY].tolist() == [90]
+    assert report["value"].tolist() == ["-90", "<b>x</b>"]
+    assert "&lt;b&gt;x&lt;/b&gt;" in finances.importer.to_html(report)
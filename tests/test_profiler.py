@@ -0,0 +1,6 @@
+def test_headers_follow_the_language(finances):
+    finances.profiler.enabled = True
+    finances.update_totals()
+    assert "<th>calls</th>" in finances.profiler.to_html()
+    finances.switch_language("de")
+    assert "<th>Aufrufe</th>" in finances.profiler.to_html()
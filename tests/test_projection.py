@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+
+
+def test_contract_dates_scale_the_totals(finances, add_employees):
+    finances.year.value = 2026
+    idx = add_employees(1)[0]
+    finances.update_totals()
+    full_year = finances.vacation_expenses.value
+    assert full_year > 0
+
+    projection = finances.projection
+    projection.employee_dropdown.options = [("", idx)]
+    projection.employee_dropdown.value = idx
+    projection.start_date.value = date(2026, 7, 1)
+    projection.apply_employee()
+    assert finances.vacation_expenses.value == pytest.approx(full_year / 2)
+
+    projection.shown = True
+    burn_down = projection.get_burn_down()
+    assert round(burn_down["remaining"].iloc[-1], 2) == (
+        finances.remaining_budget.value)
+
+
+def test_projected_table_adds_up_to_the_panel(finances, add_employees):
+    finances.year.value = 2026
+    index = add_employees(3, {
+        finances.IS_MANAGEMENT_KEY: [True, False, False]})
+    finances.management_allowance.value = 12000
+    finances.df[finances.START_DATE_KEY] = [None, date(2026, 4, 1), None]
+    finances.df[finances.END_DATE_KEY] = None
+    finances.df[finances.EMPLOYMENT_CHANGES_KEY] = [
+        "", "", "2026-07-01: 40"]
+    finances.update_totals()
+
+    projected = finances.get_projected_df()
+    assert projected.loc[index[0], finances.VACATION_COSTS_KEY] == (
+        finances.df.loc[index[0], finances.VACATION_COSTS_KEY])
+    assert projected.loc[index[1], finances.VACATION_COSTS_KEY] == (
+        pytest.approx(finances.df.loc[
+            index[1], finances.VACATION_COSTS_KEY] * 0.75))
+    spent = (projected[finances.PUBLIC_FUNDS_KEY].sum() +
+             finances.budgeted_sick_leave.value)
+    assert spent == pytest.approx(
+        finances.total_budget.value - finances.remaining_budget.value)
+
+
+def test_texts_follow_the_language(finances):
+    projection = finances.projection
+    finances.switch_language("de")
+    assert projection.start_date.description == "Startdatum"
+    assert projection.changes_text.description == (
+        "Änderungen des Beschäftigungsgrads")
@@ -0,0 +1,56 @@
+import pytest
+
+RATES = (
+    "Role;Step;Year;Rate\n"
+    "Lecturer;1;2025;100\n"
+    "Lecturer;2;2025;110\n"
+    "Lecturer;3;2025;120\n"
+    "Lecturer;2;2026;115\n"
+    "Scientific Staff;1;2025;80\n")
+
+
+@pytest.fixture
+def rate_card(finances, add_employees):
+    finances.year.value = 2026
+    add_employees(2)
+    rate_card = finances.rate_card
+    rates, report = rate_card.read(RATES.encode(), "rates.csv")
+    assert len(report) == 0
+    rate_card.rates = rates
+    return rate_card
+
+
+def test_steps_advance_every_year(finances, rate_card):
+    df = finances.df.copy()
+    df[finances.STEP_KEY] = [1, 2]
+    df[finances.STEP_YEAR_KEY] = [2025, 2025]
+    # one step more in 2026, never above the highest step of the role
+    assert rate_card.get_steps(df, 2026).tolist() == [2, 3]
+    assert rate_card.get_steps(df, 2030).tolist() == [3, 3]
+    # the latest rates until the plan year
+    assert rate_card.resolve(df, 2026).tolist() == [115, 120]
+    assert rate_card.resolve(df, 2025).tolist() == [100, 110]
+
+
+def test_step_and_rate_are_undone_together(finances, rate_card):
+    idx = finances.df.index[0]
+    rate_card.employee_dropdown.options = [("", idx)]
+    rate_card.employee_dropdown.value = idx
+    rate_card.step_text.value = 2
+    rate_card.apply_employee()
+    assert finances.df.at[idx, finances.STEP_KEY] == 2
+    assert finances.df.at[idx, finances.HOURLY_RATE_KEY] == 115
+
+    finances.undo()
+    assert finances.df.at[idx, finances.STEP_KEY] is None
+    assert float(finances.df.at[idx, finances.HOURLY_RATE_KEY]) == 87
+
+    # the next recomputation keeps the old rate
+    finances.recompute_all()
+    assert float(finances.df.at[idx, finances.HOURLY_RATE_KEY]) == 87
+
+
+def test_texts_follow_the_language(finances, rate_card):
+    finances.switch_language("de")
+    assert rate_card.upload_button.description == "Lohntabelle öffnen"
+    assert rate_card.step_text.description == "Stufe"
@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+BOOKINGS = (
+    "Employee;Category;Amount;Date\n"
+    "Employee 0;Acquisition;100;2026-06-30\n"
+    "Employee 1;Akquisition;50;2026-02-01\n"
+    "<b>Unknown</b>;Travel;10;2026-06-30\n")
+
+
+@pytest.fixture
+def reconciliation(finances, add_employees):
+    from Reconciliation import Reconciliation
+
+    finances.year.value = 2026
+    add_employees(2)
+    finances.df[finances.START_DATE_KEY] = None
+    finances.df[finances.END_DATE_KEY] = [None, date(2026, 3, 31)]
+    reconciliation = Reconciliation(finances)
+    reconciliation.bookings = reconciliation.read(BOOKINGS.encode())
+    return reconciliation
+
+
+def test_plan_follows_the_contract_dates(finances, reconciliation):
+    employees, categories, share, unknown = reconciliation.get_variance(
+        reconciliation.bookings)
+    assert share == pytest.approx(0.5)
+    assert unknown == ["<b>Unknown</b>"]
+
+    acquisition = finances.df[finances.ACQUISITION_COSTS_KEY].tolist()
+    plan = reconciliation.get_plan(
+        reconciliation.get_weights(reconciliation.bookings))
+    assert plan.loc["Employee 0", finances.ACQUISITION_COSTS_KEY] == (
+        pytest.approx(acquisition[0] / 2))
+    # the contract ends in March, before the last booking
+    assert plan.loc["Employee 1", finances.ACQUISITION_COSTS_KEY] == (
+        pytest.approx(acquisition[1] / 4))
+    assert employees.loc["Employee 1", reconciliation.ACTUAL_KEY] == 50
+
+
+def test_booked_names_are_escaped(reconciliation):
+    reconciliation.shown = True
+    reconciliation.refresh()
+    assert "&lt;b&gt;Unknown&lt;/b&gt;" in reconciliation.table.value
+    assert "<b>Unknown" not in reconciliation.table.value
@@ -0,0 +1,50 @@
+from datetime import date
+
+import pytest
+
+from Simulation import Simulation
+
+
+@pytest.fixture
+def simulation(finances, add_employees):
+    finances.year.value = 2026
+    add_employees(3, {finances.IS_MANAGEMENT_KEY: [True, False, False]})
+    finances.management_allowance.value = 12000
+    finances.budgeted_sick_leave.value = 0
+    finances.df[finances.START_DATE_KEY] = [None, date(2026, 4, 1), None]
+    finances.df[finances.END_DATE_KEY] = None
+    finances.df[finances.EMPLOYMENT_CHANGES_KEY] = [
+        "", "", "2026-07-01: 40"]
+    finances.update_totals()
+    return Simulation(finances)
+
+
+def test_mean_is_the_plan_without_randomness(finances, simulation):
+    simulation.sick_days_mean.value = 0
+    simulation.hiring_delay_mean.value = 0
+    simulation.rate_change_mean.value = 0
+    simulation.rate_change_deviation.value = 0
+    costs = simulation.simulate(finances.df, 2026, 100)
+    planned = finances.total_budget.value - finances.remaining_budget.value
+    assert costs.mean() == pytest.approx(planned, abs=0.01)
+
+
+def test_hiring_delays_lower_the_costs(finances, simulation):
+    simulation.sick_days_mean.value = 0
+    simulation.rate_change_deviation.value = 0
+    simulation.hiring_delay_mean.value = 0
+    without_delays = simulation.simulate(finances.df, 2026, 100)
+    simulation.hiring_delay_mean.value = 2
+    costs = simulation.simulate(finances.df, 2026, 100)
+    assert (costs < without_delays).all()
+    # only the employee starting in April is delayed, at most by the
+    # rest of the year
+    arrays = simulation.get_arrays(finances.df, 2026)
+    assert arrays["hired"].tolist() == [False, True, False]
+    assert (without_delays - costs <= 1.01 * arrays["variable"][1] *
+            arrays["shares"][1]).all()
+
+
+def test_texts_follow_the_language(finances, simulation):
+    finances.switch_language("de")
+    assert simulation.run_button.description == "Simulation starten"
@@ -0,0 +1,17 @@
+import asyncio
+
+
+def test_failed_rendering_clears_the_task(
+        finances, add_employees, monkeypatch):
+    add_employees(3)
+
+    def fail(df):
+        raise ValueError("broken row")
+
+    async def render():
+        finances.render_task = asyncio.current_task()
+        await finances.render_remaining_rows(finances.df)
+
+    monkeypatch.setattr(finances, "get_row_boxes", fail)
+    asyncio.run(render())
+    assert finances.render_task is None
@@ -0,0 +1,42 @@
+import asyncio
+
+
+def test_checks_follow_a_scheduled_recompute(finances, add_employees):
+    add_employees(300)
+    validation = finances.validation
+    assert len(validation.violations) == 0
+
+    async def change_working_time():
+        finances.annual_working_time.value = 100
+        # an edit before the recomputation checks the old hours
+        validation.check()
+        while finances.recompute_task is not None:
+            await asyncio.sleep(0.05)
+
+    asyncio.run(change_working_time())
+    expected = validation.get_violations(finances.df)
+    assert validation.violations["over_allocated"].sum() == (
+        expected["over_allocated"].sum()) == 300
+
+
+def test_each_check_flags_its_rows(finances, add_employees):
+    index = add_employees(4, {
+        finances.ROLE_KEY: [
+            "Lecturer", "Lecturer", "Research Assistant", "Lecturer"],
+        finances.ILV_KEY: [False, True, False, False],
+        finances.HOURLY_RATE_KEY: [87.0, 87.0, 87.0, 0.0],
+        finances.IS_MANAGEMENT_KEY: [False, True, True, False]})
+    validation = finances.validation
+    violations = validation.violations.reindex(index, fill_value=False)
+    assert violations["management_ilv"].tolist() == [
+        False, True, False, False]
+    assert violations["management_role"].tolist() == [
+        False, False, True, False]
+    assert violations["missing_rate"].tolist() == [
+        False, False, False, True]
+    assert validation.get_cells(index[3]) == {finances.HOURLY_RATE_KEY}
+
+    finances.df.at[index[3], finances.HOURLY_RATE_KEY] = 87.0
+    finances.mark_dirty(index[3])
+    validation.check()
+    assert index[3] not in validation.violations.index
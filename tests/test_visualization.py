@@ -0,0 +1,12 @@
+import sys
+
+
+def test_failed_chart_load_is_retried(finances, monkeypatch):
+    monkeypatch.setitem(sys.modules, "Visualization", None)
+    finances.refresh_visualization()
+    assert finances.visualization is None
+    assert not finances.visualization_pending
+
+    monkeypatch.delitem(sys.modules, "Visualization")
+    finances.refresh_visualization()
+    assert finances.visualization is not None